@@ -1,9 +1,16 @@
 import click
+import contextlib
+import io
 import json
+import os
+import sys
+import time
+import traceback
 
-from pyworkflow import Workflow, WorkflowException
-from pyworkflow import NodeException
-from pyworkflow.nodes import ReadCsvNode, WriteCsvNode
+import cli_server
+
+# pyworkflow is imported where it is used, so that submitting to a
+# `pyworkflow serve` process does not have to load it
 
 
 class Config(object):
@@ -22,68 +29,532 @@ def cli():
 @cli.command()
 @click.argument('filenames', type=click.Path(exists=True), nargs=-1)
 @click.option('--verbose', is_flag=True, help='Enables verbose mode.')
-def execute(filenames, verbose):
-    """Execute Workflow file(s)."""
+@click.option('--chunksize', type=click.IntRange(min=1), default=None,
+              help='Stream row-wise nodes in chunks of this many rows.')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=1,
+              help='Number of workflows to execute at once, each in its own process.')
+@click.option('--socket', 'socket_path', type=click.Path(), envvar='PYWORKFLOW_SOCKET', default=None,
+              help='Submit to the `pyworkflow serve` process listening on this socket, if running.')
+@click.option('--cache-dir', type=click.Path(file_okay=False), envvar='PYWORKFLOW_CACHE_DIR', default=None,
+              help='Load unchanged node output from, and save new output to, a cache in this directory.')
+def execute(filenames, verbose, chunksize, jobs, socket_path, cache_dir):
+    """Execute Workflow file(s).
+
+    Exits with status 1 if any workflow failed to load or execute.
+    """
     # Check whether to log to terminal, or redirect output
     log = click.get_text_stream('stdout').isatty()
 
+    if socket_path is not None:
+        status = submit_to_server(socket_path, filenames, log, verbose, chunksize, jobs, cache_dir)
+
+        if status is not None:
+            sys.exit(status)
+
+    if run_workflows(filenames, log, verbose, chunksize, jobs, cache_dir):
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--socket', 'socket_path', type=click.Path(), envvar='PYWORKFLOW_SOCKET', required=True,
+              help='Location of the Unix socket to listen on.')
+def serve(socket_path):
+    """Execute workflows for `pyworkflow execute --socket`.
+
+    Keeps pandas and the Node classes loaded, so that workflows submitted
+    through the socket start executing immediately.
+    """
+    warm_up()
+    click.echo('Listening on %s' % socket_path)
+
+    try:
+        cli_server.serve(socket_path, execute_request)
+    except OSError as e:
+        click.echo(f"Issues starting server: {e}", err=True)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command()
+@click.argument('workflow_file', type=click.Path(exists=True))
+@click.option('--json', 'json_path', type=click.Path(), default=None,
+              help='Also write the report as JSON to this file; "-" prints it instead of the table.')
+@click.option('--cprofile', 'cprofile_dir', type=click.Path(file_okay=False), default=None,
+              help='Save a cProfile dump of each node to <node_id>.prof in this directory.')
+@click.option('--cache-dir', type=click.Path(file_okay=False), default=None,
+              help='Load unchanged node output from the cache in this directory.')
+def profile(workflow_file, json_path, cprofile_dir, cache_dir):
+    """Execute a workflow and report where it spends time and memory.
+
+    Nodes are executed one at a time, without streaming or fusing, so that
+    each measurement belongs to a single node.
+    """
+    try:
+        workflow = open_workflow(workflow_file, cache_dir)
+        report = profile_workflow(workflow, cprofile_dir)
+    except OSError as e:
+        click.echo(f"Issues loading workflow file: {e}", err=True)
+        sys.exit(1)
+
+    report['workflow_file'] = workflow_file
+
+    if json_path is not None:
+        with click.open_file(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if json_path != '-':
+        report_profile(report)
+
+    if any(node['error'] for node in report['nodes']):
+        sys.exit(1)
+
+
+def run_workflows(filenames, log, verbose, chunksize=None, jobs=1, cache_dir=None):
+    """Execute workflow files, in parallel if more than one job is allowed.
+
+    Returns:
+        list of the workflow files that failed
+    """
+    if jobs > 1 and len(filenames) > 1:
+        results = execute_batch(filenames, log, verbose, chunksize, jobs, cache_dir)
+        return [result['workflow_file'] for result in results if result['errors']]
+
     # Execute each workflow in the args
+    failed = list()
+
     for workflow_file in filenames:
+        if run_workflow(workflow_file, log, verbose, chunksize, cache_dir=cache_dir):
+            failed.append(workflow_file)
+
+    return failed
+
+
+def submit_to_server(socket_path, filenames, log, verbose, chunksize, jobs, cache_dir=None):
+    """Execute workflow files in a `pyworkflow serve` process.
+
+    stdin is sent to the server unless it is a terminal; the output of the
+    workflows is written to stdout and stderr as the server sends it.
+
+    Returns:
+        The exit status, or None if no server is listening on the socket
+    """
+    stdin = click.get_binary_stream('stdin')
+    stdin_tty = stdin.isatty()
+
+    request = {
+        'filenames': [os.path.abspath(workflow_file) for workflow_file in filenames],
+        'cwd': os.getcwd(),
+        'log': log,
+        'verbose': verbose,
+        'chunksize': chunksize,
+        'jobs': jobs,
+        'cache_dir': None if cache_dir is None else os.path.abspath(cache_dir),
+        'stdin_tty': stdin_tty,
+    }
+
+    try:
+        return cli_server.submit(
+            socket_path,
+            request,
+            None if stdin_tty else stdin,
+            click.get_binary_stream('stdout'),
+            click.get_binary_stream('stderr')
+        )
+    except OSError as e:
+        if verbose:
+            click.echo(f"No server at {socket_path} ({e}); executing locally", err=True)
+
+        return None
+
+
+def execute_request(request):
+    """Execute a request from `submit_to_server()`, in the server's child process."""
+    os.chdir(request['cwd'])
+
+    failed = run_workflows(request['filenames'], request['log'], request['verbose'],
+                           request['chunksize'], request['jobs'], request.get('cache_dir'))
+
+    return 1 if failed else 0
+
+
+def warm_up():
+    """Import the modules workflows need, before any are executed."""
+    import pandas
+    from pyworkflow import node_registry
+    from pyworkflow.nodes import NODES
+    from pyworkflow.store import HAS_PYARROW, arrow
+
+    if HAS_PYARROW:
+        arrow()
+
+    for node_type, modules in NODES.items():
+        for node_key in modules:
+            node_registry.node_class(node_type, node_key)
+
+    node_registry.plugin_nodes()
+
+
+def run_workflow(workflow_file, log, verbose, chunksize=None, redirect=True, cache_dir=None):
+    """Load and execute a workflow file, reporting any issues on stderr.
+
+    Args:
+        workflow_file - Location of the workflow file
+        log - True, for outputting to terminal; False for stdout redirection
+        verbose - True, for outputting debug information; False otherwise
+        chunksize - rows per chunk to stream row-wise nodes; None to disable
+        redirect - True, to redirect I/O nodes to stdin/stdout
+        cache_dir - Directory of the execution cache; None to execute every node
+
+    Returns:
+        list of error messages; empty if the workflow succeeded
+    """
+    from pyworkflow import WorkflowException
+
+    if log:
+        click.echo('Loading workflow file from %s' % workflow_file)
 
-        if workflow_file is None:
-            click.echo('Please specify a workflow to run', err=True)
-            return
+    try:
+        workflow = open_workflow(workflow_file, cache_dir)
+        errors = execute_workflow(workflow, log, verbose, chunksize, redirect)
+    except OSError as e:
+        click.echo(f"Issues loading workflow file: {e}", err=True)
+        return [f"Issues loading workflow file: {e}"]
+    except WorkflowException as e:
+        click.echo(f"Issues during workflow execution\n{e}", err=True)
+        return [str(e)]
 
-        if log:
-            click.echo('Loading workflow file from %s' % workflow_file)
+    return [f"Node {node_id}: {e}" for node_id, e in errors.items()]
 
+
+def execute_batch(filenames, log, verbose, chunksize, jobs, cache_dir=None):
+    """Execute workflow files concurrently on a pool of processes.
+
+    The output of each workflow is captured and printed once it finishes,
+    so output from different workflows is never interleaved. Nodes are not
+    redirected to stdin/stdout, as these are shared by all workflows. A
+    summary of all workflows is reported at the end.
+
+    Returns:
+        list of results, as returned by `run_batch_job()`
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    start = time.time()
+    results = list()
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_batch_job, workflow_file, log, verbose, chunksize, cache_dir)
+                   for workflow_file in filenames]
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+
+            click.echo(result['stdout'], nl=False)
+
+            if result['stderr']:
+                click.echo('==> %s <==' % result['workflow_file'], err=True)
+                click.echo(result['stderr'], nl=False, err=True)
+
+    report_batch(results, time.time() - start, log)
+    return results
+
+
+def run_batch_job(workflow_file, log, verbose, chunksize, cache_dir=None):
+    """Execute one workflow of a batch, in a worker process.
+
+    Returns:
+        dict with the workflow file, the captured stdout and stderr, the
+        seconds taken and a list of error messages
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    start = time.time()
+
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
         try:
-            workflow = open_workflow(workflow_file)
-            execute_workflow(workflow, log, verbose)
-        except OSError as e:
-            click.echo(f"Issues loading workflow file: {e}", err=True)
-        except WorkflowException as e:
-            click.echo(f"Issues during workflow execution\n{e}", err=True)
+            errors = run_workflow(workflow_file, log, verbose, chunksize, redirect=False, cache_dir=cache_dir)
+        except Exception as e:
+            # Don't let one broken workflow stop the batch
+            traceback.print_exc()
+            errors = [f"{type(e).__name__}: {e}"]
+
+    return {
+        'workflow_file': workflow_file,
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue(),
+        'seconds': time.time() - start,
+        'errors': errors,
+    }
+
+
+def report_batch(results, seconds, log):
+    """Print a summary of a batch; to stderr if stdout is redirected."""
+    failed = [result for result in results if result['errors']]
+
+    click.echo('\nExecuted %d workflows in %.1fs: %d succeeded, %d failed'
+               % (len(results), seconds, len(results) - len(failed), len(failed)), err=not log)
 
+    for result in sorted(failed, key=lambda result: result['workflow_file']):
+        click.echo('FAILED %s (%.1fs)' % (result['workflow_file'], result['seconds']), err=not log)
 
-def execute_workflow(workflow, log, verbose):
-    """Execute a workflow file, node-by-node.
+        for error in result['errors']:
+            click.echo('    ' + error.replace('\n', ' '), err=not log)
 
-    Retrieves the execution order from the Workflow and iterates through nodes.
-    If any I/O nodes are present AND stdin/stdout redirection is provided in the
-    command-line, overwrite the stored options and then replace before saving.
+
+def execute_workflow(workflow, log, verbose, chunksize=None, redirect=True):
+    """Execute a workflow file.
+
+    Nodes are executed by the Workflow as soon as their predecessors finish,
+    so independent branches run concurrently. If any I/O nodes are present
+    AND stdin/stdout redirection is provided in the command-line, overwrite
+    the stored options and then replace before saving.
 
     Args:
         workflow - Workflow object loaded from file
         log - True, for outputting to terminal; False for stdout redirection
         verbose - True, for outputting debug information; False otherwise
+        chunksize - rows per chunk to stream row-wise nodes; None to disable
+        redirect - True, to redirect I/O nodes to stdin/stdout
+
+    Returns:
+        dict of Node ids to the exceptions raised executing them
     """
     execution_order = workflow.execution_order()
 
-    # Execute each node in the order returned by the Workflow
+    # Redirect any I/O nodes to stdin/stdout before execution starts
+    original_file_options = dict()
     for node in execution_order:
-        try:
-            node_to_execute = workflow.get_node(node)
+        node_to_execute = workflow.get_node(node)
+
+        if redirect:
             original_file_option = pre_execute(workflow, node_to_execute, log)
+        else:
+            original_file_option = None
+
+        if original_file_option is not None:
+            original_file_options[node] = original_file_option
 
-            if verbose:
-                print('Executing node of type ' + str(type(node_to_execute)))
+        if verbose:
+            print('Executing node of type ' + str(type(node_to_execute)))
 
-            # perform execution
-            executed_node = workflow.execute(node)
+    # perform execution; node output is not inspected, so fuse chains
+    errors = workflow.execute_all(chunksize=chunksize, fuse=True)
 
-            # If file was replaced with stdin/stdout, restore original option
-            if original_file_option is not None:
-                executed_node.option_values["file"] = original_file_option
+    for node, e in errors.items():
+        click.echo(f"Issues during node execution\n{e}", err=True)
 
-            # Update Node in Workflow with changes (saved data file)
-            workflow.update_or_add_node(executed_node)
-        except NodeException as e:
-            click.echo(f"Issues during node execution\n{e}", err=True)
+    # If file was replaced with stdin/stdout, restore original option
+    for node, original_file_option in original_file_options.items():
+        executed_node = workflow.get_node(node)
+        executed_node.option_values["file"] = original_file_option
+
+        # Update Node in Workflow with changes (saved data file)
+        workflow.update_or_add_node(executed_node)
 
     if verbose:
         click.echo('Completed workflow execution!')
 
+    return errors
+
+
+def profile_workflow(workflow, cprofile_dir=None):
+    """Execute each Node of a workflow, measuring its resource use.
+
+    For each Node, reports the metrics the Workflow records (time spent
+    loading input, executing and storing output, and the rows, columns and
+    in-memory bytes of its input and output), with the CPU time and the
+    peak memory allocated while it executed (traced by `tracemalloc`).
+
+    The bytes are the sizes of the DataFrames in memory, not the bytes
+    read from or written to the ResultStore, which may not touch disk.
+
+    Output is only loaded from the cache if the Workflow has an
+    ExecutionCache.
+
+    Args:
+        workflow - Workflow object loaded from file
+        cprofile_dir - Directory to save a cProfile dump per Node; None to skip
+
+    Returns:
+        dict with a list of measurements per Node, in execution order, and
+        their total
+    """
+    from pyworkflow import NodeException, WorkflowException
+
+    if cprofile_dir is not None:
+        os.makedirs(cprofile_dir, exist_ok=True)
+
+    execution_order = workflow.execution_order()
+
+    hook = ProfileHook(cprofile_dir)
+    workflow.add_hook(hook)
+    failed = None
+
+    try:
+        for node_id in execution_order:
+            node = workflow.get_node(node_id)
+            unmeasured = {'node_id': node_id, 'name': node.name, 'node_key': node.node_key}
+
+            if failed is not None:
+                hook.measurements[node_id] = dict(unmeasured, error='Skipped because node %s failed.' % failed)
+                continue
+
+            try:
+                executed_node = workflow.execute(node_id)
+                workflow.update_or_add_node(executed_node)
+            except (NodeException, WorkflowException) as e:
+                hook.measurements.setdefault(node_id, dict(unmeasured, error=str(e)))
+                failed = node_id
+    finally:
+        workflow.remove_hook(hook)
+        hook.stop()
+
+    workflow.flush_node_data()
+
+    nodes = [dict(EMPTY_MEASUREMENT, **hook.measurements[node_id]) for node_id in execution_order]
+    total = {
+        'wall_seconds': sum(node['wall_seconds'] or 0 for node in nodes),
+        'cpu_seconds': sum(node['cpu_seconds'] or 0 for node in nodes),
+        'peak_memory_bytes': max([node['peak_memory_bytes'] or 0 for node in nodes], default=0),
+    }
+
+    return {'nodes': nodes, 'total': total}
+
+
+EMPTY_MEASUREMENT = {
+    'node_id': None,
+    'name': None,
+    'node_key': None,
+    'wall_seconds': None,
+    'cpu_seconds': None,
+    'peak_memory_bytes': None,
+    'timers': {},
+    'cache_hits': None,
+    'rows_in': None,
+    'columns_in': None,
+    'bytes_in': None,
+    'rows_out': None,
+    'columns_out': None,
+    'bytes_out': None,
+    'error': None,
+}
+
+
+class ProfileHook:
+    """ExecutionHook measuring the CPU time and memory of each Node.
+
+    Attributes:
+        cprofile_dir - Directory to save a cProfile dump per Node, or None
+        measurements - dict of measurements, by node_id
+    """
+    def __init__(self, cprofile_dir=None):
+        self.cprofile_dir = cprofile_dir
+        self.measurements = dict()
+        self._profiler = None
+        self._cpu_start = None
+
+    def before_node(self, workflow, node):
+        import cProfile
+        import tracemalloc
+
+        tracemalloc.start()
+        self._cpu_start = time.process_time()
+
+        if self.cprofile_dir is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def after_node(self, workflow, node, metrics, error):
+        import tracemalloc
+
+        cpu_seconds = time.process_time() - self._cpu_start
+        peak_memory = tracemalloc.get_traced_memory()[1]
+
+        try:
+            if self._profiler is not None:
+                self._profiler.disable()
+                self._profiler.dump_stats(os.path.join(self.cprofile_dir, '%s.prof' % node.node_id))
+        finally:
+            self.stop()
+
+        measurement = {
+            'node_id': node.node_id,
+            'name': node.name,
+            'node_key': node.node_key,
+            'wall_seconds': metrics.seconds,
+            'cpu_seconds': cpu_seconds,
+            'peak_memory_bytes': peak_memory,
+            'timers': metrics.timers,
+            'error': metrics.error,
+        }
+        measurement.update(metrics.counters)
+        self.measurements[node.node_id] = measurement
+
+    def stop(self):
+        """Stop tracing, e.g. if a Node was interrupted before `after_node()`."""
+        import tracemalloc
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler = None
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def report_profile(report):
+    """Print a profile as a table, slowest nodes first."""
+    def size(n):
+        if n is None:
+            return '-'
+
+        for unit in ['B', 'KiB', 'MiB']:
+            if abs(n) < 1024:
+                return '%.0f %s' % (n, unit) if unit == 'B' else '%.1f %s' % (n, unit)
+            n /= 1024
+
+        return '%.1f GiB' % n
+
+    def number(n, format='%d'):
+        return '-' if n is None else format % n
+
+    columns = ['Node', 'Type', 'Wall s', 'Exec s', 'CPU s', 'Peak mem', 'Cached', 'Rows in', 'Cols in',
+               'Rows out', 'Cols out', 'Mem in', 'Mem out']
+    rows = [columns]
+
+    for node in sorted(report['nodes'], key=lambda node: -(node['wall_seconds'] or 0)):
+        rows.append([
+            node['node_id'],
+            node['node_key'] or '',
+            number(node['wall_seconds'], '%.3f'),
+            number(node['timers'].get('execute'), '%.3f'),
+            number(node['cpu_seconds'], '%.3f'),
+            size(node['peak_memory_bytes']),
+            number(node['cache_hits']),
+            number(node['rows_in']),
+            number(node['columns_in']),
+            number(node['rows_out']),
+            number(node['columns_out']),
+            size(node['bytes_in']),
+            size(node['bytes_out']),
+        ])
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+
+    for row in rows:
+        click.echo('  '.join(cell.ljust(width) if i < 2 else cell.rjust(width)
+                             for i, (cell, width) in enumerate(zip(row, widths))).rstrip())
+
+    total = report['total']
+    click.echo('\nTotal: %.3f s wall, %.3f s CPU, %s peak memory'
+               % (total['wall_seconds'], total['cpu_seconds'], size(total['peak_memory_bytes'])))
+
+    for node in report['nodes']:
+        if node['error']:
+            click.echo('Node %s: %s' % (node['node_id'], node['error']), err=True)
+
 
 def pre_execute(workflow, node_to_execute, log):
     """Pre-execution steps, to overwrite file options with stdin/stdout.
@@ -98,9 +569,9 @@ def pre_execute(workflow, node_to_execute, log):
     """
     stdin = click.get_text_stream('stdin')
 
-    if type(node_to_execute) is ReadCsvNode and not stdin.isatty():
+    if node_to_execute.node_key == 'ReadCsvNode' and not stdin.isatty():
         new_file_location = stdin
-    elif type(node_to_execute) is WriteCsvNode and not log:
+    elif node_to_execute.node_key == 'WriteCsvNode' and not log:
         new_file_location = click.get_text_stream('stdout')
     else:
         # No file redirection needed
@@ -116,8 +587,12 @@ def pre_execute(workflow, node_to_execute, log):
     return original_file_option
 
 
-def open_workflow(workflow_file):
+def open_workflow(workflow_file, cache_dir=None):
+    from pyworkflow import Workflow
+    from pyworkflow.cache import ExecutionCache
+
     with open(workflow_file) as f:
         json_content = json.load(f)
 
-    return Workflow.from_json(json_content['pyworkflow'])
+    cache = ExecutionCache(cache_dir) if cache_dir is not None else None
+    return Workflow.from_json(json_content['pyworkflow'], cache=cache)
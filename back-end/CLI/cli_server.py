@@ -0,0 +1,201 @@
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import traceback
+
+
+# Each message from the server is a channel, a length and a payload
+FRAME = struct.Struct('>cI')
+# The payload of the EXIT frame; any int, as `sys.exit()` accepts
+STATUS = struct.Struct('>i')
+STDOUT = b'o'
+STDERR = b'e'
+EXIT = b'x'
+
+
+class WorkflowServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Executes requests from `pyworkflow execute` in a warm process.
+
+    Requests are handled in a child process forked from the server, so
+    modules imported by the server (pandas, the Node classes, ...) are
+    already loaded, and each request gets its own working directory and
+    standard streams.
+
+    A client sends a JSON line with the request, followed by its stdin.
+    The server sends back the stdout and stderr of the execution as they
+    are written, then the exit status.
+
+    Attributes:
+        execute: Function called with the request in the child process,
+            returning the exit status.
+    """
+    def __init__(self, socket_path, execute):
+        self.execute = execute
+        super().__init__(socket_path, ExecuteHandler)
+
+
+class ExecuteHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        status = 1
+
+        try:
+            request = json.loads(self.rfile.readline())
+
+            sys.stdin = io.TextIOWrapper(io.BufferedReader(SocketReader(self.rfile, request['stdin_tty'])))
+            sys.stdout = io.TextIOWrapper(io.BufferedWriter(FrameWriter(self.wfile, STDOUT)))
+            sys.stderr = io.TextIOWrapper(io.BufferedWriter(FrameWriter(self.wfile, STDERR)), line_buffering=True)
+
+            status = self.server.execute(request)
+        except SystemExit as e:
+            if e.code is None:
+                status = 0
+            else:
+                status = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                self.wfile.write(FRAME.pack(EXIT, STATUS.size) + STATUS.pack(status))
+            except OSError:
+                # The client went away
+                pass
+
+
+class SocketReader(io.RawIOBase):
+    """The client's stdin, as sent after the request."""
+    def __init__(self, rfile, tty):
+        self.rfile = rfile
+        self.tty = tty
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self.rfile.read1(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def isatty(self):
+        return self.tty
+
+
+class FrameWriter(io.RawIOBase):
+    """Sends everything written as frames on one of the client's streams."""
+    def __init__(self, wfile, channel):
+        self.wfile = wfile
+        self.channel = channel
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.wfile.write(FRAME.pack(self.channel, len(b)) + bytes(b))
+        return len(b)
+
+
+def serve(socket_path, execute):
+    """Accept requests on a Unix socket until interrupted.
+
+    Raises:
+        OSError: another server is using the socket
+    """
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+        except OSError:
+            # Left behind by a server that stopped
+            os.remove(socket_path)
+        else:
+            raise OSError('A server is already listening on %s' % socket_path)
+
+    # Only the current user may submit workflows
+    umask = os.umask(0o177)
+    try:
+        server = WorkflowServer(socket_path, execute)
+    finally:
+        os.umask(umask)
+
+    # Remove the socket when stopped by `kill`, too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+def submit(socket_path, request, stdin, stdout, stderr):
+    """Send a request to a server and copy its output to the given streams.
+
+    Args:
+        socket_path: Location of the server's socket.
+        request: JSON-serializable request for the server's `execute`.
+        stdin: Binary stream to send to the server, or None.
+        stdout: Binary stream for the output of the execution.
+        stderr: Binary stream for errors of the execution.
+
+    Returns:
+        The exit status of the execution
+
+    Raises:
+        OSError: no server is listening on the socket
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+
+        if stdin is None:
+            sock.shutdown(socket.SHUT_WR)
+        else:
+            # Send stdin while reading output, so neither side blocks
+            threading.Thread(target=send_stream, args=(sock, stdin), daemon=True).start()
+
+        rfile = sock.makefile('rb')
+        streams = {STDOUT: stdout, STDERR: stderr}
+
+        while True:
+            header = rfile.read(FRAME.size)
+
+            if len(header) < FRAME.size:
+                stderr.write(b'Connection to pyworkflow server lost\n')
+                stderr.flush()
+                return 1
+
+            channel, length = FRAME.unpack(header)
+            payload = rfile.read(length)
+
+            if channel == EXIT:
+                return STATUS.unpack(payload)[0]
+
+            streams[channel].write(payload)
+            streams[channel].flush()
+    finally:
+        sock.close()
+
+
+def send_stream(sock, stream):
+    try:
+        while True:
+            data = stream.read1(65536)
+
+            if not data:
+                break
+
+            sock.sendall(data)
+
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        # The server finished without reading everything
+        pass
@@ -2,7 +2,7 @@ from setuptools import setup
 
 setup(name='CLI',
       version='0.0.0',
-      py_modules= ['cli'],
+      py_modules= ['cli', 'cli_server'],
       install_requires=[
             'Click',
       ],
@@ -0,0 +1,200 @@
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+import networkx as nx
+from click.testing import CliRunner
+
+import cli
+import cli_server
+from pyworkflow import Node, Workflow
+
+
+CSV = "key,A\nK0,0\nK1,1\nK2,2\n"
+
+
+class ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.socket_path = os.path.join(self.tmp_dir, "pyworkflow.sock")
+
+    def start_server(self, execute):
+        server = cli_server.WorkflowServer(self.socket_path, execute)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+    def submit(self, request, stdin=None):
+        stdout = io.BytesIO()
+        stderr = io.BytesIO()
+        status = cli_server.submit(self.socket_path, request, stdin, stdout, stderr)
+
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_submit(self):
+        def execute(request):
+            sys.stdout.write(sys.stdin.read().upper())
+            sys.stderr.write("Executed %s\n" % request["name"])
+            return 0
+
+        self.start_server(execute)
+        status, stdout, stderr = self.submit({"name": "upper", "stdin_tty": False}, io.BytesIO(b"abc\n"))
+
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout, b"ABC\n")
+        self.assertEqual(stderr, b"Executed upper\n")
+
+    def test_submit_exit_status(self):
+        def execute(request):
+            if request["exit"]:
+                sys.exit(request["status"])
+
+            return request["status"]
+
+        self.start_server(execute)
+
+        for status in [1, 255, 256, 300, -1]:
+            for exit in [False, True]:
+                self.assertEqual(self.submit({"status": status, "exit": exit, "stdin_tty": True})[0], status)
+
+        self.assertEqual(self.submit({"status": None, "exit": True, "stdin_tty": True})[0], 0)
+
+    def test_submit_error(self):
+        def execute(request):
+            raise RuntimeError("boom")
+
+        self.start_server(execute)
+        status, stdout, stderr = self.submit({"stdin_tty": True})
+
+        self.assertEqual(status, 1)
+        self.assertIn(b"RuntimeError: boom", stderr)
+
+    def test_submit_no_server(self):
+        with self.assertRaises(OSError):
+            self.submit({"stdin_tty": True})
+
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+        self.input_file = os.path.join(self.tmp_dir, "input.csv")
+        with open(self.input_file, "w") as f:
+            f.write(CSV)
+
+        self.runner = CliRunner()
+
+    def write_workflow(self, name, input_file, output_file):
+        """Save a workflow reading `input_file` and writing it to `output_file`."""
+        workflow = Workflow(name, root_dir=self.tmp_dir, graph=nx.DiGraph())
+
+        read_csv_node = Node({
+            "name": "Read CSV",
+            "node_id": "1",
+            "node_type": "io",
+            "node_key": "ReadCsvNode",
+            "is_global": False,
+            "options": {
+                "file": input_file,
+            },
+        })
+
+        write_csv_node = Node({
+            "name": "Write CSV",
+            "node_id": "2",
+            "node_type": "io",
+            "node_key": "WriteCsvNode",
+            "is_global": False,
+            "options": {
+                "file": output_file,
+                "index": False,
+            },
+        })
+
+        for node in [read_csv_node, write_csv_node]:
+            workflow.update_or_add_node(node)
+
+        workflow.add_edge(read_csv_node, write_csv_node)
+
+        workflow_file = os.path.join(self.tmp_dir, "%s.json" % name)
+        with open(workflow_file, "w") as f:
+            json.dump({"pyworkflow": workflow.to_json()}, f)
+
+        return workflow_file
+
+    def test_execute_socket(self):
+        server = cli_server.WorkflowServer(os.path.join(self.tmp_dir, "pyworkflow.sock"), cli.execute_request)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        workflow_file = self.write_workflow("socket", "unused.csv", os.path.join(self.tmp_dir, "unused_out.csv"))
+
+        # stdin and stdout are redirected through the socket to the I/O nodes
+        result = self.runner.invoke(cli.cli, ["execute", "--socket", server.server_address, workflow_file],
+                                    input=CSV)
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.stdout.replace("\r\n", "\n"), CSV)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "unused_out.csv")))
+
+    def test_execute_jobs(self):
+        workflow_files = [
+            self.write_workflow("job-%d" % i, self.input_file, os.path.join(self.tmp_dir, "out-%d.csv" % i))
+            for i in range(3)
+        ]
+
+        result = self.runner.invoke(cli.cli, ["execute", "--jobs", "2"] + workflow_files)
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Executed 3 workflows", result.output)
+
+        for i in range(3):
+            with open(os.path.join(self.tmp_dir, "out-%d.csv" % i)) as f:
+                self.assertEqual(f.read(), CSV)
+
+    def test_execute_jobs_failure(self):
+        workflow_files = [
+            self.write_workflow("good", self.input_file, os.path.join(self.tmp_dir, "out.csv")),
+            self.write_workflow("bad", os.path.join(self.tmp_dir, "missing.csv"), os.path.join(self.tmp_dir, "out.csv")),
+        ]
+
+        result = self.runner.invoke(cli.cli, ["execute", "--jobs", "2"] + workflow_files)
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("1 succeeded, 1 failed", result.output)
+        self.assertIn("FAILED %s" % workflow_files[1], result.output)
+
+    def test_profile(self):
+        workflow_file = self.write_workflow("profile", self.input_file, os.path.join(self.tmp_dir, "out.csv"))
+
+        result = self.runner.invoke(cli.cli, ["profile", workflow_file, "--json", "-"])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        report = json.loads(result.stdout)
+        self.assertListEqual([node["node_id"] for node in report["nodes"]], ["1", "2"])
+        self.assertEqual(report["nodes"][0]["rows_out"], 3)
+        self.assertEqual(report["nodes"][1]["rows_in"], 3)
+        self.assertIsNone(report["nodes"][1]["error"])
+
+    def test_profile_failure(self):
+        workflow_file = self.write_workflow("profile", os.path.join(self.tmp_dir, "missing.csv"),
+                                            os.path.join(self.tmp_dir, "out.csv"))
+
+        result = self.runner.invoke(cli.cli, ["profile", workflow_file])
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("Node 1:", result.output)
+        self.assertIn("Skipped because node 1 failed.", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
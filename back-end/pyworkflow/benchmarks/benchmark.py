@@ -0,0 +1,443 @@
+"""Benchmarks for the PyWorkflow execution engine.
+
+Runs generated workflows and records, for each case, the time to execute
+the workflow, the peak resident memory of the process, and the bytes of
+intermediate output the Nodes produced (as recorded in their metrics).
+Each run of a case happens in a new process, so memory measurements and
+caches do not carry over from one case to the next.
+
+Cases are named '<group>/<name>[-<size>]':
+
+- 'node/<NodeKey>-<rows>': one Node type on a generated dataset, e.g.
+  'node/JoinNode-1m'. Also reports the time of the Node itself.
+- 'shape/<shape>-<nodes>': many cheap Nodes, arranged as a fan-out, a deep
+  chain, a chain of diamond joins, or a random graph mixing all three.
+- 'import/pyworkflow': time to import the package.
+
+Usage, from the 'pyworkflow' directory:
+
+    python benchmarks/benchmark.py --sizes 10k,1m --output results.json
+    python benchmarks/benchmark.py --baseline results.json
+
+With `--baseline`, results are compared to an earlier run, and the command
+exits with status 1 if any case got slower or used more memory by more than
+`--threshold`.
+"""
+import click
+import fnmatch
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+SIZES = {'10k': 10 ** 4, '1m': 10 ** 6, '10m': 10 ** 7}
+SHAPES = {'fan_out': [100, 1000], 'chain': [100, 1000], 'diamond': [100, 1000], 'graph': [1000, 10000]}
+NODE_KEYS = ['ReadCsvNode', 'FilterNode', 'JoinNode', 'PivotNode', 'WriteCsvNode', 'GraphNode']
+
+# Columns of the generated data. 'key' joins to the generated keys file.
+GROUPS = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
+KEYS = 1000
+SEED = 0
+
+COMPARED = ['seconds', 'peak_rss_bytes']
+
+
+@click.command()
+@click.option('--sizes', default=','.join(SIZES), show_default=True,
+              help='Dataset sizes for the node cases, from %s.' % ', '.join(SIZES))
+@click.option('--shape-rows', default=1000, show_default=True, help='Rows of data flowing through shape cases.')
+@click.option('--cases', 'patterns', multiple=True, help='Only run cases matching this pattern, e.g. "node/Join*".')
+@click.option('--repeat', default=3, show_default=True, help='Runs of each case; the fastest is reported.')
+@click.option('--workers', type=int, help='Nodes executed at once (default: Workflow.execute_all default).')
+@click.option('--chunksize', type=int, help='Stream chains of Nodes in chunks of this many rows.')
+@click.option('--fuse', is_flag=True, help='Fuse chains of manipulation Nodes.')
+@click.option('--data-dir', default=os.path.join(tempfile.gettempdir(), 'pyworkflow-benchmarks'), show_default=True,
+              help='Where generated datasets are kept between runs.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Save the results as JSON.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Compare with saved results.')
+@click.option('--threshold', default=0.1, show_default=True,
+              help='Relative increase over the baseline reported as a regression.')
+def main(sizes, shape_rows, patterns, repeat, workers, chunksize, fuse, data_dir, output, baseline, threshold):
+    """Benchmark workflow execution across Node types, graph shapes and data sizes."""
+    try:
+        rows = [SIZES[size.strip().lower()] for size in sizes.split(',') if size.strip()]
+    except KeyError as e:
+        raise click.BadParameter('unknown size %s' % e, param_hint='--sizes')
+
+    engine = {'max_workers': workers, 'chunksize': chunksize, 'fuse': fuse}
+    cases = [case for case in list_cases(rows, shape_rows)
+             if not patterns or any(fnmatch.fnmatch(case['name'], pattern) for pattern in patterns)]
+
+    if not cases:
+        raise click.UsageError('No cases match %s' % ', '.join(patterns))
+
+    os.makedirs(data_dir, exist_ok=True)
+    results = {'environment': environment(engine), 'cases': dict()}
+
+    for case in cases:
+        click.echo('%-28s' % case['name'], nl=False)
+
+        for path, size in case['data'].items():
+            generate_data(os.path.join(data_dir, path), size)
+
+        runs = [run_in_process(case, data_dir, engine) for _ in range(repeat)]
+        result = min(runs, key=lambda run: run['seconds'])
+        result['peak_rss_bytes'] = max(run['peak_rss_bytes'] for run in runs)
+        results['cases'][case['name']] = result
+
+        click.echo(format_result(result))
+
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is not None:
+        with open(baseline) as f:
+            regressions = compare(json.load(f), results, threshold)
+
+        if regressions:
+            sys.exit(1)
+
+
+##################
+# CASES
+##################
+def list_cases(sizes, shape_rows):
+    """Describe every case, with the datasets it needs and how to build its workflow.
+
+    Returns:
+        list of dicts with the case's 'name', 'data' (file name -> rows),
+        'build' (name of the function adding its Nodes) and 'args'
+    """
+    cases = [{'name': 'import/pyworkflow', 'data': {}, 'build': None, 'args': []}]
+
+    for node_key in NODE_KEYS:
+        for size in sizes:
+            label = next(label for label, rows in SIZES.items() if rows == size)
+            cases.append({
+                'name': 'node/%s-%s' % (node_key, label),
+                'data': {data_file(size): size, 'keys.csv': KEYS},
+                'build': 'build_node',
+                'args': [node_key, data_file(size)],
+            })
+
+    for shape, node_counts in SHAPES.items():
+        for count in node_counts:
+            cases.append({
+                'name': 'shape/%s-%d' % (shape, count),
+                'data': {data_file(shape_rows): shape_rows},
+                'build': 'build_' + shape,
+                'args': [count, data_file(shape_rows)],
+            })
+
+    return cases
+
+
+def data_file(rows):
+    return 'rows-%d.csv' % rows
+
+
+class WorkflowBuilder:
+    """Adds Nodes to a Workflow with generated ids."""
+    def __init__(self, workflow, data_dir):
+        self.workflow = workflow
+        self.data_dir = data_dir
+        self.count = 0
+
+    def add(self, node_type, node_key, options, predecessors=(), node_id=None):
+        from pyworkflow import node_factory
+
+        if node_id is None:
+            node_id = 'n%d' % self.count
+            self.count += 1
+
+        node = node_factory({
+            'name': node_key,
+            'node_id': node_id,
+            'node_type': node_type,
+            'node_key': node_key,
+            'is_global': False,
+            'options': options,
+        })
+        self.workflow.update_or_add_node(node)
+
+        for predecessor_id in predecessors:
+            self.workflow.add_edge(self.workflow.get_node(predecessor_id), node)
+
+        return node_id
+
+    def read(self, file_name, node_id=None):
+        return self.add('io', 'ReadCsvNode', {'file': os.path.join(self.data_dir, file_name)}, node_id=node_id)
+
+    def filter(self, predecessor_id, items='id,key,group,value,count', node_id=None):
+        return self.add('manipulation', 'FilterNode', {'items': items, 'axis': 'columns'}, [predecessor_id], node_id)
+
+    def diamond(self, predecessor_id):
+        """Split the columns of a Node's output and join them back together."""
+        left = self.filter(predecessor_id, 'id,key,group')
+        right = self.filter(predecessor_id, 'id,value,count')
+        return self.add('manipulation', 'JoinNode', {'on': 'id'}, [left, right])
+
+
+def build_node(builder, node_key, file_name):
+    """A single Node of the given type, and the Nodes it needs for input."""
+    if node_key == 'ReadCsvNode':
+        builder.read(file_name, 'target')
+        return
+
+    source = builder.read(file_name)
+
+    if node_key == 'FilterNode':
+        builder.filter(source, 'id,value', 'target')
+    elif node_key == 'JoinNode':
+        keys = builder.read('keys.csv')
+        builder.add('manipulation', 'JoinNode', {'on': 'key'}, [source, keys], 'target')
+    elif node_key == 'PivotNode':
+        builder.add('manipulation', 'PivotNode', {'index': 'group', 'values': 'value'}, [source], 'target')
+    elif node_key == 'WriteCsvNode':
+        output = os.path.join(builder.workflow.root_dir, 'output.csv')
+        builder.add('io', 'WriteCsvNode', {'file': output, 'index': False}, [source], 'target')
+    elif node_key == 'GraphNode':
+        # Measure the Node on all rows, rather than altair's refusal of large data
+        import altair as alt
+        alt.data_transformers.disable_max_rows()
+
+        options = {'graph_type': 'point', 'x_axis': 'id', 'y_axis': 'value'}
+        builder.add('visualization', 'GraphNode', options, [source], 'target')
+
+
+def build_fan_out(builder, count, file_name):
+    """One source read by many Nodes."""
+    source = builder.read(file_name)
+
+    for _ in range(count - 1):
+        builder.filter(source)
+
+
+def build_chain(builder, count, file_name):
+    """Each Node reads the output of the one before."""
+    node_id = builder.read(file_name)
+
+    for _ in range(count - 1):
+        node_id = builder.filter(node_id)
+
+
+def build_diamond(builder, count, file_name):
+    """A chain of diamonds: each splits its input in two and joins it back."""
+    node_id = builder.read(file_name)
+
+    while builder.count + 3 <= count:
+        node_id = builder.diamond(node_id)
+
+
+def build_graph(builder, count, file_name):
+    """A random graph of chains, fan-outs and diamonds with about `count` Nodes."""
+    rng = random.Random(SEED)
+    frontier = [builder.read(file_name)]
+
+    while builder.count < count:
+        # Nodes stay in the frontier, so later Nodes may branch from them
+        predecessor_id = rng.choice(frontier)
+
+        if rng.random() < 0.2:
+            frontier.append(builder.diamond(predecessor_id))
+        else:
+            frontier.append(builder.filter(predecessor_id))
+
+
+##################
+# RUNNING
+##################
+def run_in_process(case, data_dir, engine):
+    """Run a case in a new process, so it starts with nothing in memory."""
+    if case['build'] is None:
+        return measure_import()
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(run_case, case, data_dir, engine).result()
+
+
+def run_case(case, data_dir, engine):
+    import networkx as nx
+    from pyworkflow import Workflow
+
+    root_dir = tempfile.mkdtemp(prefix='pyworkflow-benchmark-')
+
+    try:
+        workflow = Workflow('benchmark', root_dir=root_dir, graph=nx.DiGraph())
+        builder = WorkflowBuilder(workflow, data_dir)
+        globals()[case['build']](builder, *case['args'])
+
+        # Nothing is loaded from the cache of an earlier run
+        for node_id in workflow.graph.nodes:
+            workflow.graph.nodes[node_id]['use_cache'] = False
+
+        start = time.perf_counter()
+        errors = workflow.execute_all(**engine)
+        workflow.flush_node_data()
+        seconds = time.perf_counter() - start
+
+        metrics = [workflow.node_metrics(node_id) or {} for node_id in workflow.graph.nodes]
+        target = workflow.node_metrics('target') if 'target' in workflow.graph.nodes else None
+
+        return {
+            'seconds': seconds,
+            'node_seconds': target['seconds'] if target else None,
+            'peak_rss_bytes': peak_rss(),
+            'intermediate_bytes': sum(m.get('counters', {}).get('bytes_out', 0) for m in metrics),
+            'nodes': len(metrics),
+            'errors': {node_id: str(e) for node_id, e in errors.items()},
+        }
+    finally:
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+
+def measure_import():
+    code = ('import time; start = time.perf_counter(); import pyworkflow; '
+            'print(time.perf_counter() - start)')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+
+    return {'seconds': float(output), 'node_seconds': None, 'peak_rss_bytes': 0,
+            'intermediate_bytes': 0, 'nodes': 0, 'errors': {}}
+
+
+def peak_rss():
+    """Peak resident memory of this process, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def generate_data(path, rows, chunk=10 ** 6):
+    """Write a CSV with `rows` generated rows, unless it already exists.
+
+    Columns: 'id' (unique), 'key' (joins to 'keys.csv'), 'group' (a few
+    strings), 'value' (float) and 'count' (int).
+    """
+    if os.path.exists(path):
+        return
+
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(SEED)
+
+    with open(path + '.tmp', 'w') as f:
+        if os.path.basename(path) == 'keys.csv':
+            pd.DataFrame({'key': range(rows), 'label': ['key %d' % i for i in range(rows)]}).to_csv(f, index=False)
+        else:
+            for start in range(0, rows, chunk):
+                ids = np.arange(start, min(start + chunk, rows))
+                pd.DataFrame({
+                    'id': ids,
+                    'key': ids % KEYS,
+                    'group': np.array(GROUPS)[rng.integers(0, len(GROUPS), len(ids))],
+                    'value': rng.random(len(ids)).round(6),
+                    'count': rng.integers(0, 1000, len(ids)),
+                }).to_csv(f, header=start == 0, index=False)
+
+    # Only complete files are reused
+    os.replace(path + '.tmp', path)
+
+
+def environment(engine):
+    import pandas as pd
+
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+        'engine': engine,
+    }
+
+
+##################
+# REPORTING
+##################
+def size(n):
+    for unit in ['B', 'KiB', 'MiB']:
+        if abs(n) < 1024:
+            return '%.0f %s' % (n, unit) if unit == 'B' else '%.1f %s' % (n, unit)
+        n /= 1024
+
+    return '%.1f GiB' % n
+
+
+def format_result(result):
+    line = '%9.3f s' % result['seconds']
+
+    if result['node_seconds'] is not None:
+        line += '  (node %.3f s)' % result['node_seconds']
+
+    line += '  %10s peak RSS  %10s intermediate' % (size(result['peak_rss_bytes']), size(result['intermediate_bytes']))
+
+    if result['errors']:
+        line += '  %d failed: %s' % (len(result['errors']), next(iter(result['errors'].values())))
+
+    return line
+
+
+def compare(baseline, results, threshold):
+    """Print how each case changed since the baseline.
+
+    Returns:
+        list of (case name, measurement) that regressed by more than `threshold`
+    """
+    regressions = list()
+
+    if baseline.get('environment', {}).get('engine') != results['environment']['engine']:
+        click.echo('\nWarning: the baseline was run with different engine options.', err=True)
+
+    click.echo('\n%-28s %12s %12s %12s %12s' % ('Case', 'Time', 'Change', 'Peak RSS', 'Change'))
+
+    for name, result in results['cases'].items():
+        previous = baseline['cases'].get(name)
+
+        if previous is None:
+            click.echo('%-28s (not in baseline)' % name)
+            continue
+
+        cells = list()
+        for measurement in COMPARED:
+            old, new = previous[measurement], result[measurement]
+            change = (new - old) / old if old else 0.0
+            regressed = change > threshold
+
+            if regressed:
+                regressions.append((name, measurement))
+
+            value = '%.3f s' % new if measurement == 'seconds' else size(new)
+            cells += [value, '%+.1f%%%s' % (change * 100, ' !' if regressed else '')]
+
+        click.echo('%-28s %12s %12s %12s %12s' % (name, *cells))
+
+    if regressions:
+        click.echo('\n%d regression(s) over %.0f%%: %s' % (
+            len(regressions), threshold * 100, ', '.join('%s %s' % r for r in regressions)), err=True)
+    else:
+        click.echo('\nNo regressions over %.0f%%.' % (threshold * 100))
+
+    return regressions
+
+
+if __name__ == '__main__':
+    main()
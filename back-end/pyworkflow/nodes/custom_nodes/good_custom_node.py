@@ -0,0 +1,8 @@
+from pyworkflow.node import Node, NodeException
+from pyworkflow.parameters import *
+class MyGoodCustomNode(Node):
+	name="Custom Node"
+	num_in=1
+	num_out=1
+	def execute(self, predecessor_data, flow_vars):
+		print("Hello world")
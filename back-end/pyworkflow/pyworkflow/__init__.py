@@ -1,3 +1,5 @@
 from .workflow import Workflow, WorkflowException
 from .node import *
 from .node_factory import node_factory
+from .registry import NodeRegistry, node_registry
+from .metrics import ExecutionHook, NodeMetrics
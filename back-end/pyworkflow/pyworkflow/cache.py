@@ -0,0 +1,218 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
+from collections import OrderedDict
+
+from .parameters import FileParameter
+from .store import DiskResultStore
+
+
+class ExecutionCache:
+    """Memoizes Node output on disk, keyed by a hash of everything it depends on.
+
+    A key combines the Node's class, its options after flow variable
+    substitution, and the hashes of its input data. Files referenced by
+    FileParameters contribute their size and modification time, so editing
+    an input file invalidates its entries.
+
+    The cache is capped at `max_bytes`; the least recently used entries are
+    removed first once it grows beyond that.
+
+    Attributes:
+        cache_dir: Directory the cached output is written to.
+        max_bytes: Size cap for all cached output.
+        hits: Number of lookups that returned cached output.
+        misses: Number of lookups that did not.
+    """
+    DEFAULT_MAX_BYTES = 1024 ** 3
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._store = DiskResultStore(cache_dir)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retrieve cached output.
+
+        Returns:
+            The cached output, or None if there is no entry for `key`.
+        """
+        try:
+            data = self._store.read(key)
+
+            # Mark entry as recently used
+            os.utime(self._store.path(key))
+        except (OSError, ValueError):
+            data = None
+
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return data
+
+    def put(self, key, data):
+        """Add output to the cache, then evict entries over the size cap.
+
+        Caching is only an optimization: if the output cannot be written
+        (e.g., the disk is full, or a column cannot be serialized), it is
+        not cached and the error is ignored.
+        """
+        if data is None:
+            return
+
+        # Write under a temporary name so readers never see partial entries
+        tmp_name = '%s.%d-%d.tmp' % (key, os.getpid(), threading.get_ident())
+
+        try:
+            self._store.write(tmp_name, data)
+            os.replace(self._store.path(tmp_name), self._store.path(key))
+        except Exception:
+            # OSError, or any error the serializer raises (e.g., from Arrow)
+            try:
+                os.remove(self._store.path(tmp_name))
+            except OSError:
+                pass
+
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until under `max_bytes`."""
+        with self._lock:
+            entries = list()
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+
+                total -= size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    @staticmethod
+    def make_key(node, execution_options, input_hashes):
+        """Hash a Node execution.
+
+        Args:
+            node: The Node to execute.
+            execution_options: Options returned by `get_execution_options()`.
+            input_hashes: Hashes of each input to the Node, in order.
+
+        Returns:
+            Hex digest identifying the execution, or None if it cannot be
+            cached (e.g., an input has no known hash, or an option is a stream).
+        """
+        if any(input_hash is None for input_hash in input_hashes):
+            return None
+
+        options = dict()
+        for key, option in execution_options.items():
+            value = option.get_value()
+
+            if isinstance(value, io.IOBase):
+                return None
+
+            if isinstance(option, FileParameter) and isinstance(value, str):
+                try:
+                    stat = os.stat(value)
+                    value = [value, stat.st_size, stat.st_mtime_ns]
+                except OSError:
+                    return None
+
+            options[key] = value
+
+        try:
+            key_data = json.dumps({
+                'node': '%s.%s' % (type(node).__module__, type(node).__qualname__),
+                'options': options,
+                'inputs': list(input_hashes),
+            }, sort_keys=True)
+        except TypeError:
+            return None
+
+        return hashlib.sha256(key_data.encode()).hexdigest()
+
+
+class SchemaCache:
+    """Column types inferred when reading files, so later reads can skip inference.
+
+    Keys identify a file's version and the options it was read with; see
+    `ReadCsvNode.schema_key()`. Only complete reads should be recorded, as
+    a chunk's types may not fit the rest of the file. Reads of some of the
+    columns add to the types known.
+
+    Attributes:
+        max_entries: Number of schemas kept; the least recently used are
+            removed first.
+    """
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+
+        # key -> {column: dtype name}
+        self._schemas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The column types recorded for `key`, or None."""
+        if key is None:
+            return None
+
+        with self._lock:
+            schema = self._schemas.get(key)
+
+            if schema is None:
+                return None
+
+            self._schemas.move_to_end(key)
+            return dict(schema)
+
+    def update(self, key, schema):
+        """Record column types for `key`; nothing is recorded if it is None."""
+        if key is None:
+            return
+
+        with self._lock:
+            self._schemas.setdefault(key, dict()).update(schema)
+            self._schemas.move_to_end(key)
+
+            while len(self._schemas) > self.max_entries:
+                self._schemas.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+
+
+csv_schemas = SchemaCache()
@@ -0,0 +1,135 @@
+import time
+
+from contextlib import contextmanager
+
+from .store import MemoryResultStore, is_dataframe
+
+
+class ExecutionHook:
+    """Receives events while a Workflow executes Nodes.
+
+    Register a hook with `Workflow.add_hook()` and override the methods
+    needed. Hooks are called from the thread executing the Node, so
+    several may run at once.
+    """
+    def before_node(self, workflow, node):
+        """Called before a Node starts executing."""
+        pass
+
+    def after_node(self, workflow, node, metrics, error):
+        """Called after a Node executed.
+
+        Args:
+            workflow: The executing Workflow.
+            node: The executed Node.
+            metrics: NodeMetrics of the execution.
+            error: The exception raised executing the Node, or None.
+        """
+        pass
+
+
+class NodeMetrics:
+    """Measurements from one execution of a Node.
+
+    Timers record seconds spent in each step of the execution:
+    'load_input' (reading predecessor output), 'execute' (the Node's own
+    work) and 'store' (saving its output). Nodes in a fused or streamed
+    chain share the loading and storing of the chain, which is recorded
+    for the first and last Node.
+
+    Counters record the rows, columns and in-memory bytes of the Node's
+    input and output, summed over all inputs and chunks, and whether the
+    output was loaded from the ExecutionCache ('cache_hits').
+
+    Attributes:
+        node_id: The executed Node.
+        task: The Nodes executed together with this one.
+    """
+    COUNTERS = ['rows_in', 'columns_in', 'bytes_in', 'rows_out', 'columns_out', 'bytes_out', 'cache_hits']
+
+    def __init__(self, node_id, task=None):
+        self.node_id = node_id
+        self.task = task or [node_id]
+        self.started_at = time.time()
+        self.seconds = None
+        self.timers = dict()
+        self.counters = {name: 0 for name in NodeMetrics.COUNTERS}
+        self.error = None
+
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def timer(self, name):
+        """Add the time spent in a `with` block to a timer."""
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.timers[name] = self.timers.get(name, 0) + seconds
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_data(self, direction, data):
+        """Count the rows, columns and bytes of input or output data.
+
+        Args:
+            direction: 'in' or 'out'
+            data: A DataFrame, or other Node output.
+        """
+        if is_dataframe(data):
+            self.count('rows_' + direction, data.shape[0])
+            self.count('columns_' + direction, data.shape[1])
+
+        self.count('bytes_' + direction, MemoryResultStore.sizeof(data))
+
+    def count_input(self, metrics):
+        """Count the output of the previous Node in a chain as this Node's input."""
+        for name in ['rows', 'columns', 'bytes']:
+            self.counters[name + '_in'] = metrics.counters[name + '_out']
+
+    def stop(self, error=None):
+        self.seconds = time.perf_counter() - self._start
+
+        if error is not None:
+            self.error = str(error)
+
+    def to_json(self):
+        return {
+            'node_id': self.node_id,
+            'task': self.task,
+            'started_at': self.started_at,
+            'seconds': self.seconds,
+            'timers': self.timers,
+            'counters': self.counters,
+            'error': self.error,
+        }
+
+
+def measure_stream(chunks, metrics):
+    """Count the chunks a streamed Node produces, and the time spent producing them.
+
+    The time includes producing the chunks of preceding Nodes in the chain;
+    see `Workflow.execute_stream()`.
+    """
+    iterator = iter(chunks)
+
+    while True:
+        with metrics.timer('execute'):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+
+        metrics.count('chunks')
+        metrics.count_data('out', chunk)
+
+        # Every chunk has the same columns
+        if is_dataframe(chunk):
+            metrics.counters['columns_out'] = chunk.shape[1]
+
+        yield chunk
@@ -1,12 +1,26 @@
 from .parameters import *
+import copy
+import inspect
 import io
 
 class Node:
     """Node object
 
+    Attributes:
+        cacheable: Whether the Node's output may be loaded from the
+            ExecutionCache. False for Nodes whose execution has side
+            effects or reads outside state. If unset (None), packaged Nodes
+            are cached and custom Nodes are not; see `is_cacheable()`.
+        streamable: True for Nodes that implement `execute_stream()`, so
+            they can process their input one chunk of rows at a time.
+        accepts_pushdown: True for Nodes that read data and can skip rows
+            or columns described by the next Node's `pushdown()`.
     """
     options = Options()
     option_types = OptionTypes()
+    cacheable = None
+    streamable = False
+    accepts_pushdown = False
 
     def __init__(self, node_info):
         self.name = node_info.get('name')
@@ -16,6 +30,7 @@ class Node:
         self.data = node_info.get('data')
         self.filename = node_info.get('filename')
         self.is_global = node_info.get('is_global') is True
+        self.use_cache = node_info.get('use_cache') is not False
 
         self.option_values = dict()
         if node_info.get("options"):
@@ -28,6 +43,63 @@ class Node:
     def execute(self, predecessor_data, flow_vars):
         raise NotImplementedError()
 
+    @classmethod
+    def is_cacheable(cls):
+        """Whether output of this kind of Node may be loaded from the ExecutionCache.
+
+        Custom and plugin Nodes may read APIs, databases, or the clock, so
+        they are only cached if they set `cacheable = True`.
+        """
+        if cls.cacheable is None:
+            module = cls.__module__
+            return module.startswith('pyworkflow.nodes.') and not module.startswith('pyworkflow.nodes.custom_nodes.')
+
+        return cls.cacheable
+
+    def copy(self):
+        """Copy the Node, so changes to the copy's options aren't shared."""
+        node = copy.copy(self)
+        node.option_values = dict(self.option_values)
+        node.option_replace = dict(self.option_replace)
+
+        # Reuse the copied Node's options until its option_values change
+        options = inspect.getattr_static(self, 'options')
+        if isinstance(options, Options):
+            options.share(self, node)
+
+        return node
+
+    def execute_stream(self, predecessor_chunks, flow_vars, chunksize):
+        """Execute the Node on a stream of DataFrame chunks.
+
+        Args:
+            predecessor_chunks: list with an iterator of DataFrame chunks for
+                each input; empty for Nodes with no inputs.
+            flow_vars: dict of options to use for execution
+            chunksize: Number of rows per chunk
+
+        Returns:
+            iterator of output DataFrame chunks
+        """
+        raise NotImplementedError()
+
+    def pushdown(self, flow_vars):
+        """Describe which part of its input this Node uses.
+
+        A preceding Node that accepts pushdown receives the returned values
+        as extra execution options, and only reads the matching data.
+
+        Args:
+            flow_vars: dict of options to use for execution
+
+        Returns:
+            dict that may contain 'column_filter' and/or 'row_filter', each
+            a dict of `DataFrame.filter()` arguments ('items', 'like' or
+            'regex') selecting the only columns or rows used. Empty if the
+            Node may use all of its input.
+        """
+        return dict()
+
     def get_execution_options(self, workflow, flow_nodes):
         """Replace Node options with flow variables.
 
@@ -50,13 +122,16 @@ class Node:
 
         for key, option in self.options.items():
 
+            # Options are shared by every access; don't change the original
+            option = copy.copy(option)
+
             if key in flow_nodes:
                 replacement_value = flow_nodes[key].get_replacement_value()
                 option.set_value(replacement_value)
             else:
                 replacement_value = option.get_value()
 
-            if key == 'file' and type(replacement_value) == io.TextIOWrapper:
+            if key == 'file' and isinstance(replacement_value, io.TextIOBase):
                 # For files specified via stdin/stdout, store directly
                 option.set_value(replacement_value)
             elif key == 'file':
@@ -121,6 +196,7 @@ class FlowNode(Node):
     to other Nodes as a way to dynamically change other parameter values.
     """
     display_name = "Flow Control"
+    cacheable = False
 
     def execute(self, predecessor_data, flow_vars):
         return
@@ -1,4 +1,40 @@
-from .flow_control import *
-from .io import *
-from .manipulation import *
-from .visualization import *
+import importlib
+
+
+# Built-in Nodes: node_type -> {node_key: module}. Modules are imported
+# when a Node class is first accessed, so only the packages used by the
+# Nodes in a Workflow (e.g. altair for graphs) are loaded.
+NODES = {
+    'flow_control': {
+        'StringNode': 'string_input',
+        'IntegerNode': 'integer_input',
+    },
+    'io': {
+        'ReadCsvNode': 'read_csv',
+        'WriteCsvNode': 'write_csv',
+        'TableCreatorNode': 'table_creator',
+    },
+    'manipulation': {
+        'FilterNode': 'filter',
+        'JoinNode': 'join',
+        'PivotNode': 'pivot',
+    },
+    'visualization': {
+        'GraphNode': 'graph',
+    },
+}
+
+__all__ = [node_key for modules in NODES.values() for node_key in modules]
+
+
+def node_class(node_type, node_key):
+    module = importlib.import_module('%s.%s.%s' % (__name__, node_type, NODES[node_type][node_key]))
+    return getattr(module, node_key)
+
+
+def __getattr__(name):
+    for node_type, modules in NODES.items():
+        if name in modules:
+            return node_class(node_type, name)
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
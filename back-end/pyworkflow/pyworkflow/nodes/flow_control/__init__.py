@@ -1,2 +1,11 @@
-from .string_input import StringNode
-from .integer_input import IntegerNode
+from .. import NODES, node_class
+
+
+__all__ = list(NODES['flow_control'])
+
+
+def __getattr__(name):
+    if name in NODES['flow_control']:
+        return node_class('flow_control', name)
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -1,3 +1,11 @@
-from .read_csv import ReadCsvNode
-from .write_csv import WriteCsvNode
-from .table_creator import TableCreatorNode
+from .. import NODES, node_class
+
+
+__all__ = list(NODES['io'])
+
+
+def __getattr__(name):
+    if name in NODES['io']:
+        return node_class('io', name)
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -1,18 +1,36 @@
+from pyworkflow.cache import csv_schemas
 from pyworkflow.node import IONode, NodeException
 from pyworkflow.parameters import *
 
+import importlib.util
+import json
+import os
 import pandas as pd
+import re
+
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+ARROW_STRING = "string[pyarrow]"
 
 
 class ReadCsvNode(IONode):
     """Reads a CSV file into a pandas DataFrame.
 
+    With the 'pyarrow' engine, the file is parsed by several threads at
+    once. Column types inferred from a file are cached until the file
+    changes, so later reads of the file skip type inference.
+
     Raises:
          NodeException: any error reading CSV file, converting to DataFrame.
     """
     name = "Read CSV"
     num_in = 0
     num_out = 1
+    streamable = True
+    accepts_pushdown = True
+
+    # Rows per chunk when reading with a pushed-down row filter
+    PUSHDOWN_CHUNKSIZE = 100000
 
     OPTIONS = {
         "file": FileParameter(
@@ -31,15 +49,208 @@ class ReadCsvNode(IONode):
             default="infer",
             docstring="Row number containing column names (0-indexed)"
         ),
+        "engine": SelectParameter(
+            "Parser",
+            options=["c", "pyarrow"],
+            default="c",
+            docstring="CSV parser; 'pyarrow' uses several threads, but not when streaming"
+        ),
+        "dtype": TextParameter(
+            "Column Types",
+            default="",
+            docstring='JSON object of column names and types, e.g. {"id": "int64", "name": "string"}'
+        ),
+        "parse_dates": StringParameter(
+            "Date Columns",
+            default="",
+            docstring="Comma-separated names of columns to parse as dates"
+        ),
+        "arrow_strings": BooleanParameter(
+            "Arrow Strings",
+            default=False,
+            docstring="Store text columns as Arrow-backed strings"
+        ),
     }
 
     def execute(self, predecessor_data, flow_vars):
+        chunks = None
+        if "row_filter" in flow_vars:
+            # Only keep the matching rows of each chunk as it is read
+            chunks = list(self.execute_stream(predecessor_data, flow_vars, ReadCsvNode.PUSHDOWN_CHUNKSIZE))
+
+        try:
+            if chunks:
+                return pd.concat(chunks)
+
+            engine = flow_vars["engine"].get_value()
+            df = pd.read_csv(**self.get_read_options(flow_vars, engine))
+
+            if flow_vars["arrow_strings"].get_value():
+                df = ReadCsvNode.to_arrow_strings(df)
+
+            csv_schemas.update(ReadCsvNode.schema_key(flow_vars, engine), ReadCsvNode.schema(df))
+            return df
+        except Exception as e:
+            raise NodeException('read csv', str(e))
+
+    def execute_stream(self, predecessor_chunks, flow_vars, chunksize):
         try:
-            df = pd.read_csv(
-                flow_vars["file"].get_value(),
-                sep=flow_vars["sep"].get_value(),
-                header=flow_vars["header"].get_value()
-            )
-            return df.to_json()
+            # The pyarrow engine cannot read in chunks
+            reader = pd.read_csv(**self.get_read_options(flow_vars), chunksize=chunksize)
         except Exception as e:
             raise NodeException('read csv', str(e))
+
+        row_filter = flow_vars.get("row_filter")
+        arrow_strings = flow_vars["arrow_strings"].get_value()
+
+        with reader:
+            while True:
+                try:
+                    chunk = next(reader)
+
+                    if row_filter is not None:
+                        chunk = chunk.filter(axis='index', **row_filter.get_value())
+
+                    if arrow_strings:
+                        chunk = ReadCsvNode.to_arrow_strings(chunk)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    raise NodeException('read csv', str(e))
+
+                yield chunk
+
+    @staticmethod
+    def get_read_options(flow_vars, engine="c"):
+        """Build `pd.read_csv()` arguments, including any pushed-down columns.
+
+        Column types given in the 'dtype' option are used as they are; the
+        types of other columns are taken from the schema cache, if the file
+        was read before.
+
+        Raises:
+            ValueError: invalid 'dtype' option, or pyarrow is not installed
+        """
+        read_options = {
+            "filepath_or_buffer": flow_vars["file"].get_value(),
+            "sep": flow_vars["sep"].get_value(),
+            "header": flow_vars["header"].get_value(),
+        }
+
+        parse_dates = [column.strip() for column in flow_vars["parse_dates"].get_value().split(",") if column.strip()]
+        if parse_dates:
+            read_options["parse_dates"] = parse_dates
+
+        dtype = ReadCsvNode.parse_dtype(flow_vars["dtype"].get_value())
+        cached = csv_schemas.get(ReadCsvNode.schema_key(flow_vars, engine)) or dict()
+
+        # Dates are parsed by `parse_dates`, which cannot be combined with a dtype
+        dtype = {column: t for column, t in dict(cached, **dtype).items() if column not in parse_dates}
+
+        if engine == "pyarrow" and parse_dates:
+            # Converted by pyarrow as the file is read; `parse_dates` would
+            # convert them afterwards, a value at a time
+            dtype.update({column: "datetime64[ns]" for column in read_options.pop("parse_dates")})
+
+        if dtype:
+            read_options["dtype"] = dtype
+
+        if "column_filter" in flow_vars:
+            read_options["usecols"] = ReadCsvNode.column_selector(flow_vars["column_filter"].get_value())
+
+        if engine == "pyarrow":
+            if not HAS_PYARROW:
+                raise ValueError("The pyarrow engine requires pyarrow to be installed")
+
+            read_options["engine"] = "pyarrow"
+
+            if "usecols" in read_options:
+                # The pyarrow engine needs the column names, not a callable
+                columns = pd.read_csv(read_options["filepath_or_buffer"], sep=read_options["sep"],
+                                      header=read_options["header"], nrows=0).columns
+                read_options["usecols"] = [column for column in columns if read_options["usecols"](column)]
+
+        return read_options
+
+    @staticmethod
+    def parse_dtype(value):
+        """Parse the 'dtype' option, a JSON object of column names and types."""
+        if not value or not value.strip():
+            return dict()
+
+        dtype = json.loads(value)
+        if not isinstance(dtype, dict):
+            raise ValueError("Column Types must be a JSON object of column names and types")
+
+        return dtype
+
+    @staticmethod
+    def to_arrow_strings(df):
+        """Convert text columns to Arrow-backed strings."""
+        columns = [
+            column for column, t in df.dtypes.items()
+            if t != ARROW_STRING and pd.api.types.is_string_dtype(df[column])
+        ]
+
+        if not columns:
+            return df
+
+        return df.astype({column: ARROW_STRING for column in columns})
+
+    @staticmethod
+    def schema(df):
+        """Names of the column types of a DataFrame, to pass as `dtype`.
+
+        Dates are left to `parse_dates`, so are not included.
+        """
+        return {
+            column: ARROW_STRING if t == ARROW_STRING else str(t)
+            for column, t in df.dtypes.items()
+            if not pd.api.types.is_datetime64_any_dtype(t)
+        }
+
+    @staticmethod
+    def schema_key(flow_vars, engine="c"):
+        """Key for the cached schema of a read, or None if it can't be cached.
+
+        The key includes the parser and every option that changes the types
+        inferred, and the file's modification time and size, so a changed
+        file is inferred again.
+        """
+        file = flow_vars["file"].get_value()
+
+        if not isinstance(file, str):
+            # e.g. stdin
+            return None
+
+        try:
+            stat = os.stat(file)
+        except OSError:
+            return None
+
+        return (
+            os.path.realpath(file), stat.st_mtime_ns, stat.st_size, engine,
+            flow_vars["sep"].get_value(),
+            flow_vars["header"].get_value(),
+            flow_vars["dtype"].get_value(),
+            flow_vars["parse_dates"].get_value(),
+            flow_vars["arrow_strings"].get_value(),
+        )
+
+    @staticmethod
+    def column_selector(column_filter):
+        """Convert `DataFrame.filter()` arguments to a `usecols` callable.
+
+        Unlike a list, a callable does not fail on missing columns, the same
+        as `DataFrame.filter()`.
+        """
+        if column_filter.get("items") is not None:
+            items = set(column_filter["items"])
+            return lambda column: column in items
+        elif column_filter.get("like") is not None:
+            like = column_filter["like"]
+            return lambda column: like in str(column)
+
+        regex = re.compile(column_filter["regex"])
+        return lambda column: regex.search(str(column)) is not None
+
@@ -43,6 +43,6 @@ class TableCreatorNode(IONode):
                 sep=flow_vars["sep"].get_value(),
                 header=flow_vars["header"].get_value()
             )
-            return df.to_json()
+            return df
         except Exception as e:
             raise NodeException('read csv', str(e))
@@ -14,6 +14,8 @@ class WriteCsvNode(IONode):
     num_in = 1
     num_out = 0
     download_result = True
+    cacheable = False
+    streamable = True
 
     OPTIONS = {
         "file": StringParameter(
@@ -43,6 +45,29 @@ class WriteCsvNode(IONode):
                 sep=flow_vars["sep"].get_value(),
                 index=flow_vars["index"].get_value()
             )
-            return df.to_json()
+            return df
         except Exception as e:
             raise NodeException('write csv', str(e))
+
+    def execute_stream(self, predecessor_chunks, flow_vars, chunksize):
+        first_chunk = True
+
+        for df in predecessor_chunks[0]:
+            try:
+                # Write the header with the first chunk, then append
+                df.to_csv(
+                    flow_vars["file"].get_value(),
+                    sep=flow_vars["sep"].get_value(),
+                    index=flow_vars["index"].get_value(),
+                    mode='w' if first_chunk else 'a',
+                    header=first_chunk
+                )
+            except Exception as e:
+                raise NodeException('write csv', str(e))
+
+            first_chunk = False
+            yield df
+
+        if first_chunk:
+            # No input rows; still replace any previous output
+            yield self.execute([pd.DataFrame()], flow_vars)
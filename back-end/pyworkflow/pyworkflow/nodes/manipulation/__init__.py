@@ -1,3 +1,11 @@
-from .filter import FilterNode
-from .join import JoinNode
-from .pivot import PivotNode
+from .. import NODES, node_class
+
+
+__all__ = list(NODES['manipulation'])
+
+
+def __getattr__(name):
+    if name in NODES['manipulation']:
+        return node_class('manipulation', name)
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
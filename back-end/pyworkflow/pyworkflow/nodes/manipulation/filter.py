@@ -16,11 +16,12 @@ class FilterNode(ManipulationNode):
     name = "Filter"
     num_in = 1
     num_out = 1
+    streamable = True
 
     OPTIONS = {
         'items': StringParameter(
             'Items',
-            docstring='Keep labels from axis which are in items'
+            docstring='Keep labels from axis which are in items (comma-separated)'
         ),
         'like': StringParameter(
             'Like',
@@ -41,11 +42,56 @@ class FilterNode(ManipulationNode):
             input_df = pd.DataFrame.from_dict(predecessor_data[0])
             output_df = pd.DataFrame.filter(
                 input_df,
-                items=flow_vars['items'].get_value(),
+                items=self.get_items(flow_vars),
                 like=flow_vars['like'].get_value(),
                 regex=flow_vars['regex'].get_value(),
                 axis=flow_vars['axis'].get_value(),
             )
-            return output_df.to_json()
+            return output_df
         except Exception as e:
             raise NodeException('filter', str(e))
+
+    def execute_stream(self, predecessor_chunks, flow_vars, chunksize):
+        for input_df in predecessor_chunks[0]:
+            try:
+                output_df = pd.DataFrame.filter(
+                    input_df,
+                    items=self.get_items(flow_vars),
+                    like=flow_vars['like'].get_value(),
+                    regex=flow_vars['regex'].get_value(),
+                    axis=flow_vars['axis'].get_value(),
+                )
+            except Exception as e:
+                raise NodeException('filter', str(e))
+
+            yield output_df
+
+    def pushdown(self, flow_vars):
+        label_filter = {
+            'items': self.get_items(flow_vars),
+            'like': flow_vars['like'].get_value(),
+            'regex': flow_vars['regex'].get_value(),
+        }
+        label_filter = {k: v for k, v in label_filter.items() if v is not None}
+
+        if len(label_filter) != 1:
+            # pandas only accepts one of items, like, or regex
+            return dict()
+
+        axis = flow_vars['axis'].get_value()
+        if axis in [None, 'columns', 1]:
+            return {'column_filter': label_filter}
+        elif axis in ['index', 'rows', 0]:
+            return {'row_filter': label_filter}
+
+        return dict()
+
+    @staticmethod
+    def get_items(flow_vars):
+        """Labels to keep, from a list or a comma-separated string."""
+        items = flow_vars['items'].get_value()
+
+        if isinstance(items, str):
+            items = [item.strip() for item in items.split(',')]
+
+        return items
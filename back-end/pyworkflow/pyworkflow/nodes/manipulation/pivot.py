@@ -76,6 +76,6 @@ class PivotNode(ManipulationNode):
                 margins_name=flow_vars['margins_name'].get_value(),
                 observed=flow_vars['observed'].get_value(),
             )
-            return output_df.to_json()
+            return output_df
         except Exception as e:
             raise NodeException('pivot', str(e))
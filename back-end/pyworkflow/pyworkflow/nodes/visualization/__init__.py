@@ -1 +1,11 @@
-from .graph import GraphNode
+from .. import NODES, node_class
+
+
+__all__ = list(NODES['visualization'])
+
+
+def __getattr__(name):
+    if name in NODES['visualization']:
+        return node_class('visualization', name)
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -1,4 +1,6 @@
+import copy
 import os
+import weakref
 
 
 class Options:
@@ -7,17 +9,54 @@ class Options:
 
     Clones the values in the class variable `OPTIONS` and sets their values
     with the values in in the instance variable `option_values`.
+
+    The Parameters are built once per instance, and rebuilt only when
+    `option_values` changes. They are shared between accesses, so copy a
+    Parameter before changing its value.
     """
 
+    def __init__(self):
+        # instance -> (copy of option_values, Parameters built from them)
+        self._built = weakref.WeakKeyDictionary()
+
     def __get__(self, obj, objtype):
         # return class variable OPTIONS if invoked from class
         if obj is None:
             return getattr(objtype, "OPTIONS", dict())
-        # otherwise clone class's options and set values from instance
+
+        option_values = getattr(obj, "option_values", dict())
+        built = self._built.get(obj)
+
+        if built is None or built[0] != option_values:
+            built = (self.snapshot(option_values), self.build(obj, option_values))
+            self._built[obj] = built
+
+        return dict(built[1])
+
+    def share(self, obj, other):
+        """Let `other`, a copy of `obj`, reuse the Parameters built for `obj`."""
+        self.__get__(obj, type(obj))
+        self._built[other] = self._built[obj]
+
+    @staticmethod
+    def snapshot(option_values):
+        # Values that cannot be copied, e.g. the CLI's stdin/stdout streams,
+        # are kept as they are and compare by identity
+        values = dict()
+        for k, v in option_values.items():
+            try:
+                values[k] = copy.deepcopy(v)
+            except (TypeError, copy.Error):
+                values[k] = v
+        return values
+
+    @staticmethod
+    def build(obj, option_values):
+        # clone class's options and set values from instance
         options = dict()
         for k, v in obj.OPTIONS.items():
             options[k] = v.clone()
-        for k, v in getattr(obj, "option_values", dict()).items():
+        for k, v in option_values.items():
             if k in options:
                 options[k].set_value(v)
         return options
@@ -135,6 +174,9 @@ class SelectParameter(Parameter):
         super().__init__(label, default, docstring)
         self.options = options or []
 
+    def clone(self):
+        return self.__class__(self.label, self.options, self.default, self.docstring)
+
     def to_json(self):
         out = super().to_json()
         out["options"] = self.options
@@ -142,7 +184,7 @@ class SelectParameter(Parameter):
 
     def validate(self):
         value = self.get_value()
-        if not isinstance(value, str):
+        if not isinstance(value, str) or (self.options and value not in self.options):
             raise ParameterValidationError(self)
 
 
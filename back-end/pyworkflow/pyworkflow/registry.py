@@ -0,0 +1,221 @@
+import hashlib
+import importlib
+import os
+import sys
+import threading
+
+from .nodes import NODES
+
+
+NODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nodes')
+ENTRY_POINT_GROUP = 'pyworkflow.nodes'
+
+
+class NodeRegistry:
+    """Finds the Node classes available to Workflows.
+
+    Node classes are registered under their `(node_type, node_key)` as a
+    'module:ClassName' string, and their module is only imported when a
+    Node of that kind is first created. The built-in Nodes are registered
+    when the registry is created; other packages can add Nodes through the
+    'pyworkflow.nodes' entry point group, with names like
+    'node_type.NodeKey', which are read the first time they are needed.
+
+    Custom Nodes are looked up by their file in 'custom_nodes' instead.
+    Listing the installed Nodes imports every Node file and, for files with
+    uninstalled packages, searches the file for missing imports, which is
+    slow. The registry does this once per file and keeps the result until
+    the file changes.
+
+    A file is checked by its modification time and size; if these differ,
+    the contents are hashed, so a file that was only touched is not parsed
+    again. A changed file's module is imported again, so Nodes created
+    afterwards use the new code.
+    """
+    def __init__(self):
+        # (node_type, node_key) -> Node class, or 'module:ClassName'
+        self._classes = dict()
+        self._plugins = list()
+        self._entry_points_loaded = False
+
+        # real path -> [(mtime, size), sha256 of contents, Node info]
+        self._files = dict()
+        self._lock = threading.RLock()
+
+        for node_type, modules in NODES.items():
+            for node_key, module in modules.items():
+                self.register(node_type, node_key, 'pyworkflow.nodes.%s.%s:%s' % (node_type, module, node_key))
+
+    def register(self, node_type, node_key, node_class):
+        """Make a Node class available to Workflows.
+
+        Args:
+            node_type: The type of Node, e.g. 'manipulation'.
+            node_key: Name of the Node class.
+            node_class: The Node class, or a 'module:ClassName' string to
+                import it from when it is first used.
+        """
+        with self._lock:
+            self._classes[(node_type, node_key)] = node_class
+
+    def node_class(self, node_type, node_key, filename=None):
+        """Find the Node class for a kind of Node.
+
+        Args:
+            node_type: The type of Node, e.g. 'manipulation'.
+            node_key: Name of the Node class.
+            filename: Module of a custom Node, without '.py'.
+
+        Returns:
+            The Node class, or None if there is no such Node or its module
+            cannot be imported
+        """
+        with self._lock:
+            if node_type != 'custom_nodes' and (node_type, node_key) not in self._classes:
+                self.load_entry_points()
+
+            node_class = self._classes.get((node_type, node_key))
+
+            if node_class is None:
+                if filename is None:
+                    return None
+
+                return self.file_node_class('custom_nodes', filename, node_key)
+
+            if isinstance(node_class, str):
+                module_name, _, class_name = node_class.partition(':')
+
+                try:
+                    node_class = getattr(importlib.import_module(module_name), class_name)
+                except (ImportError, AttributeError):
+                    return None
+
+                self._classes[(node_type, node_key)] = node_class
+
+            return node_class
+
+    def load_entry_points(self):
+        """Register the Nodes that installed packages provide, once."""
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+
+            self._entry_points_loaded = True
+
+            from importlib import metadata
+            entry_points = metadata.entry_points()
+
+            if hasattr(entry_points, 'select'):
+                entry_points = entry_points.select(group=ENTRY_POINT_GROUP)
+            else:
+                entry_points = entry_points.get(ENTRY_POINT_GROUP, [])
+
+            for entry_point in entry_points:
+                node_type, _, node_key = entry_point.name.rpartition('.')
+
+                if not node_type:
+                    continue
+
+                # Built-in Nodes cannot be replaced
+                if (node_type, node_key) not in self._classes:
+                    self.register(node_type, node_key, entry_point.value)
+                    self._plugins.append((node_type, node_key))
+
+    def plugin_nodes(self):
+        """The `(node_type, node_key)` of Nodes registered by entry points."""
+        self.load_entry_points()
+
+        with self._lock:
+            return list(self._plugins)
+
+    def node_info(self, node_type, node, file_path):
+        """Information about the Node class defined in a file.
+
+        Args:
+            node_type: The type of Node, defined by sub-directory name.
+            node: Name of the Node's module, i.e. the filename without '.py'
+            file_path: Location of the Node file.
+
+        Returns:
+            dict-like with the Node information, as returned by
+            `WorkflowUtils.extract_node_info()`, or None if the file does
+            not define a Node
+        """
+        from .workflow import WorkflowUtils
+
+        path = os.path.realpath(file_path)
+
+        with self._lock:
+            entry = self._files.get(path)
+
+            try:
+                stamp = NodeRegistry.file_stamp(path)
+            except OSError:
+                # Fall back on the import system to report the error
+                return WorkflowUtils.extract_node_info(node_type, node, file_path)
+
+            if entry is not None and entry[0] == stamp:
+                return entry[2]
+
+            digest = NodeRegistry.file_digest(path)
+
+            if entry is not None and entry[1] == digest:
+                entry[0] = stamp
+                return entry[2]
+
+            module_name = 'pyworkflow.nodes.%s.%s' % (node_type, node)
+
+            if entry is not None:
+                # The file changed since it was imported
+                sys.modules.pop(module_name, None)
+
+            if module_name not in sys.modules:
+                # New files may not be seen by the import system otherwise
+                importlib.invalidate_caches()
+
+            info = WorkflowUtils.extract_node_info(node_type, node, file_path)
+            self._files[path] = [stamp, digest, info]
+
+            return info
+
+    def file_node_class(self, node_type, node, node_key):
+        """Find a Node class by its file, importing it again if it changed.
+
+        Args:
+            node_type: The type of Node, defined by sub-directory name.
+            node: Name of the Node's module, i.e. the filename without '.py'
+            node_key: Name of the Node class.
+
+        Returns:
+            The Node class, or None if it is not defined or its module
+            cannot be imported
+        """
+        file_path = os.path.join(NODE_DIR, node_type, node + '.py')
+        info = self.node_info(node_type, node, file_path)
+
+        if info is None or 'missing_packages' in info:
+            return None
+
+        module = sys.modules.get('pyworkflow.nodes.%s.%s' % (node_type, node))
+        return getattr(module, node_key, None)
+
+    def invalidate(self, file_path):
+        """Parse a file again when it is next used, e.g. after it was uploaded."""
+        with self._lock:
+            entry = self._files.get(os.path.realpath(file_path))
+
+            if entry is not None:
+                entry[0] = entry[1] = None
+
+    @staticmethod
+    def file_stamp(file_path):
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def file_digest(file_path):
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+
+node_registry = NodeRegistry()
@@ -0,0 +1,413 @@
+import importlib.util
+import io
+import json
+import os
+import sys
+import threading
+
+from collections import OrderedDict
+
+
+# pandas and pyarrow are slow to import, so they are only imported once
+# a DataFrame is saved or loaded
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def arrow():
+    """Import pyarrow, with the modules used to save and load DataFrames."""
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    return pyarrow
+
+
+def is_dataframe(data):
+    # If pandas was never imported, `data` cannot be a DataFrame
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(data, pd.DataFrame)
+
+
+class ResultStore:
+    """ResultStore object
+
+    Interface for saving and loading the output of executed Nodes. Entries
+    are referenced by name; the name is what gets saved in a Node's `data`
+    attribute.
+    """
+
+    def put(self, name, data):
+        raise NotImplementedError()
+
+    def get(self, name):
+        raise NotImplementedError()
+
+    def flush(self):
+        """Persist any entries that have not yet been written to disk."""
+        pass
+
+    def discard(self, name):
+        """Forget any copy of an entry held in memory, e.g. after its file was
+        replaced by another process, so the next `get()` reads the file."""
+        pass
+
+    def get_page(self, name, offset=0, limit=None, columns=None, sort=None):
+        """Load some of the rows and columns of a stored DataFrame.
+
+        Args:
+            name: The entry to load.
+            offset: Number of rows to skip.
+            limit: Maximum number of rows to load; None for all remaining rows.
+            columns: Columns to load; None for all.
+            sort: list of (column, ascending) to order rows by before
+                skipping `offset` rows; None to keep the stored order.
+
+        Returns:
+            dict with the page of rows as a DataFrame ('data'), the number of
+            rows in the entry ('total_rows'), and all its columns ('columns')
+
+        Raises:
+            ValueError: the entry is not a DataFrame, or has no such column
+        """
+        return dataframe_page(self.get(name), offset, limit, columns, sort)
+
+
+class DiskResultStore(ResultStore):
+    """Writes every entry to a file in `root_dir` as soon as it is stored.
+
+    DataFrames are saved in a binary columnar `format` that keeps dtypes:
+    'feather' (Arrow IPC, memory-mapped on read) or 'parquet'. The 'json'
+    format saves DataFrames as `DataFrame.to_json(orient='split')` output,
+    which keeps duplicate index labels and is read back as a DataFrame.
+    Other output, or DataFrames that Arrow cannot convert, is always saved
+    as JSON.
+
+    The format of a file is detected when reading, so files written in any
+    format can be read back regardless of the current setting.
+    """
+    FORMATS = ['feather', 'parquet', 'json']
+    DEFAULT_FORMAT = os.environ.get('PYWORKFLOW_STORE_FORMAT', 'feather' if HAS_PYARROW else 'json')
+
+    FEATHER_MAGIC = b'ARROW1'
+    PARQUET_MAGIC = b'PAR1'
+
+    def __init__(self, root_dir, format=DEFAULT_FORMAT):
+        if format not in DiskResultStore.FORMATS:
+            raise ValueError('Unknown result store format: %s' % format)
+
+        if format != 'json' and not HAS_PYARROW:
+            raise ModuleNotFoundError("The '%s' format requires the pyarrow package" % format)
+
+        self.root_dir = root_dir
+        self.format = format
+
+    def path(self, name):
+        return os.path.join(self.root_dir, name)
+
+    def put(self, name, data):
+        self.write(name, data)
+
+    def get(self, name):
+        return self.read(name)
+
+    def get_page(self, name, offset=0, limit=None, columns=None, sort=None):
+        """Load a page of an entry, reading as little of its file as possible.
+
+        Feather files are memory-mapped, so only the pages of the file
+        holding the requested rows and columns are read. Parquet files are
+        read by row group. JSON files are read whole.
+        """
+        path = self.path(name)
+        file_format = DiskResultStore.file_format(path)
+
+        if file_format == 'feather':
+            with arrow().memory_map(path) as source:
+                table = arrow().ipc.open_file(source).read_all()
+                return arrow_page(table, offset, limit, columns, sort)
+        elif file_format == 'parquet':
+            return parquet_page(path, offset, limit, columns, sort)
+
+        return dataframe_page(self.read(name), offset, limit, columns, sort)
+
+    def write(self, name, data):
+        if is_dataframe(data) and self.format != 'json':
+            pa = arrow()
+
+            try:
+                table = pa.Table.from_pandas(data)
+            except (pa.ArrowException, TypeError, ValueError):
+                # e.g., mixed-type object columns; fall back to JSON
+                table = None
+
+            if table is not None and self.format == 'feather':
+                # Uncompressed, so reads can use the memory-mapped file directly
+                pa.feather.write_feather(table, self.path(name), compression='uncompressed')
+                return
+            elif table is not None:
+                pa.parquet.write_table(table, self.path(name))
+                return
+
+        if is_dataframe(data):
+            data = data.to_json(orient='split')
+        elif not isinstance(data, str):
+            data = json.dumps(data)
+
+        with open(self.path(name), 'w') as f:
+            f.write(data)
+
+    def read(self, name):
+        path = self.path(name)
+        file_format = DiskResultStore.file_format(path)
+
+        if file_format == 'feather':
+            pa = arrow()
+            with pa.memory_map(path) as source:
+                return pa.ipc.open_file(source).read_all().to_pandas()
+        elif file_format == 'parquet':
+            return arrow().parquet.read_table(path, memory_map=True).to_pandas()
+
+        with open(path) as f:
+            text = f.read()
+
+        data = json.loads(text)
+        if DiskResultStore.is_split(data):
+            import pandas as pd
+            return pd.read_json(io.StringIO(text), orient='split')
+
+        return data
+
+    @staticmethod
+    def is_split(data):
+        """Whether JSON data is a DataFrame saved with `orient='split'`."""
+        return isinstance(data, dict) and set(data) == {'columns', 'index', 'data'}
+
+    @staticmethod
+    def file_format(path):
+        """Detect the format of a stored file from its first bytes."""
+        with open(path, 'rb') as f:
+            magic = f.read(len(DiskResultStore.FEATHER_MAGIC))
+
+        if magic.startswith(DiskResultStore.FEATHER_MAGIC):
+            return 'feather'
+        elif magic.startswith(DiskResultStore.PARQUET_MAGIC):
+            return 'parquet'
+
+        return 'json'
+
+
+class MemoryResultStore(DiskResultStore):
+    """Keeps live entries in memory, spilling to disk when over budget.
+
+    Entries are evicted in least-recently-used order once the total size of
+    all in-memory entries exceeds `max_bytes`. Evicted entries are written
+    to disk, if not already, and are read back from disk on the next `get()`.
+
+    Attributes:
+        max_bytes: Memory budget for all in-memory entries.
+    """
+    DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+    def __init__(self, root_dir, max_bytes=DEFAULT_MAX_BYTES, format=DiskResultStore.DEFAULT_FORMAT):
+        super().__init__(root_dir, format)
+        self.max_bytes = max_bytes
+
+        # name -> (data, size in bytes, True if not yet written to disk)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+    @property
+    def size(self):
+        return self._size
+
+    def put(self, name, data):
+        size = MemoryResultStore.sizeof(data)
+
+        with self._lock:
+            self._discard(name)
+
+            if size > self.max_bytes:
+                # Too large to ever fit in memory; write straight to disk
+                self.write(name, data)
+                return
+
+            self._entries[name] = (data, size, True)
+            self._size += size
+            self._evict()
+
+    def get(self, name):
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                return self._entries[name][0]
+
+        return self.read(name)
+
+    def get_page(self, name, offset=0, limit=None, columns=None, sort=None):
+        with self._lock:
+            entry = self._entries.get(name)
+
+        if entry is not None:
+            return dataframe_page(entry[0], offset, limit, columns, sort)
+
+        return super().get_page(name, offset, limit, columns, sort)
+
+    def flush(self):
+        with self._lock:
+            for name, (data, size, dirty) in list(self._entries.items()):
+                if dirty:
+                    self.write(name, data)
+                    self._entries[name] = (data, size, False)
+
+    def discard(self, name):
+        with self._lock:
+            self._discard(name)
+
+    def _discard(self, name):
+        entry = self._entries.pop(name, None)
+
+        if entry is not None:
+            self._size -= entry[1]
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            name, (data, size, dirty) = self._entries.popitem(last=False)
+            self._size -= size
+
+            if dirty:
+                self.write(name, data)
+
+    @staticmethod
+    def sizeof(data):
+        """Approximate in-memory size of an entry, in bytes."""
+        if is_dataframe(data):
+            return int(data.memory_usage(index=True, deep=True).sum())
+
+        return sys.getsizeof(data)
+
+
+def page_columns(all_columns, columns, sort):
+    """Check that requested columns exist, and default to all of them."""
+    for column in (columns or []) + [column for column, ascending in sort or []]:
+        if column not in all_columns:
+            raise ValueError('Column %s is not in the data' % column)
+
+    return all_columns if columns is None else columns
+
+
+def dataframe_page(data, offset=0, limit=None, columns=None, sort=None):
+    """Select a page of rows and columns from a DataFrame in memory.
+
+    `data` may also be a DataFrame saved as JSON by an earlier version, i.e.
+    the dict-like output of `DataFrame.to_json()`. See
+    `ResultStore.get_page()`.
+    """
+    import pandas as pd
+
+    if isinstance(data, dict) and all(isinstance(values, dict) for values in data.values()):
+        data = pd.DataFrame(data)
+
+    if not is_dataframe(data):
+        raise ValueError('The data is not a table')
+
+    all_columns = [str(column) for column in data.columns]
+    columns = page_columns(all_columns, columns, sort)
+    labels = dict(zip(all_columns, data.columns))
+    stop = None if limit is None else offset + limit
+
+    if sort:
+        # Sort only the sort columns, to find the positions of the page's rows
+        keys = data[[labels[column] for column, ascending in sort]].reset_index(drop=True)
+        keys = keys.sort_values(list(keys.columns), ascending=[ascending for column, ascending in sort],
+                                kind='mergesort')
+        page = data.iloc[keys.index[offset:stop]]
+    else:
+        page = data.iloc[offset:stop]
+
+    return {
+        'data': page[[labels[column] for column in columns]],
+        'total_rows': len(data),
+        'columns': all_columns,
+    }
+
+
+def arrow_page(table, offset=0, limit=None, columns=None, sort=None):
+    """Select a page of rows and columns from an Arrow Table saved from pandas.
+
+    Only the requested columns, and the index columns saved with them, are
+    converted to pandas. See `ResultStore.get_page()`.
+    """
+    import pyarrow.compute as pc
+
+    metadata = table.schema.pandas_metadata or dict()
+    index_columns = metadata.get('index_columns', [])
+    stored_index = [column for column in index_columns if isinstance(column, str)]
+
+    all_columns = [column for column in table.column_names if column not in stored_index]
+    columns = page_columns(all_columns, columns, sort)
+    projected = table.select(columns + stored_index)
+    length = table.num_rows - offset if limit is None else limit
+
+    if sort:
+        sort_keys = [(column, 'ascending' if ascending else 'descending') for column, ascending in sort]
+        positions = pc.sort_indices(table.select([column for column, ascending in sort]), sort_keys=sort_keys)
+        positions = positions.slice(offset, max(length, 0)).to_pylist()
+        page = projected.take(positions)
+    else:
+        page = projected.slice(offset, max(length, 0))
+        positions = range(offset, offset + page.num_rows)
+
+    data = page.to_pandas()
+
+    # A RangeIndex is only saved as metadata, so rebuild the page's labels
+    if len(index_columns) == 1 and isinstance(index_columns[0], dict) and index_columns[0]['kind'] == 'range':
+        index = index_columns[0]
+        data.index = [index['start'] + position * index['step'] for position in positions]
+        data.index.name = index['name']
+
+    return {'data': data, 'total_rows': table.num_rows, 'columns': all_columns}
+
+
+def parquet_page(path, offset=0, limit=None, columns=None, sort=None):
+    """Select a page of rows and columns from a Parquet file.
+
+    Only the requested columns are read and, unless rows are sorted, only
+    the row groups that hold the page. See `ResultStore.get_page()`.
+    """
+    pq = arrow().parquet
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    total_rows = parquet_file.metadata.num_rows
+
+    if sort:
+        return arrow_page(parquet_file.read(), offset, limit, columns, sort)
+
+    schema = parquet_file.schema_arrow
+    index_columns = (schema.pandas_metadata or dict()).get('index_columns', [])
+    all_columns = [column for column in schema.names if column not in index_columns]
+    columns = page_columns(all_columns, columns, sort)
+
+    # Find the row groups overlapping the page
+    stop = total_rows if limit is None else min(offset + limit, total_rows)
+    groups, first_row, row = list(), offset, 0
+
+    for i in range(parquet_file.num_row_groups):
+        rows = parquet_file.metadata.row_group(i).num_rows
+
+        if row + rows > offset and row < stop:
+            first_row = min(first_row, row)
+            groups.append(i)
+
+        row += rows
+
+    table = parquet_file.read_row_groups(groups, columns=columns, use_pandas_metadata=True)
+    page = arrow_page(table, offset - first_row, max(stop - offset, 0), columns)
+
+    # Labels of a RangeIndex count from the first row group that was read
+    if len(index_columns) == 1 and isinstance(index_columns[0], dict):
+        page['data'].index = [label + first_row * index_columns[0]['step'] for label in page['data'].index]
+        page['data'].index.name = index_columns[0]['name']
+
+    page['total_rows'] = total_rows
+    page['columns'] = all_columns
+    return page
@@ -0,0 +1,118 @@
+import unittest
+import os
+import shutil
+import tempfile
+import networkx as nx
+import pandas as pd
+
+from pyworkflow import Workflow, Node, ManipulationNode, node_factory
+from pyworkflow.cache import ExecutionCache
+from pyworkflow.tests.sample_test_data import GOOD_NODES, DATA_FILES
+
+
+class ExecutionCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.cache = ExecutionCache(os.path.join(self.root_dir, "cache"))
+        self.df = pd.DataFrame({"key": ["K0", "K1"], "A": ["A0", "A1"]})
+
+        with open(os.path.join(self.root_dir, "sample1.csv"), "w") as f:
+            f.write(DATA_FILES["sample1"])
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def make_key(self, node_info, input_hashes=()):
+        node = node_factory(node_info)
+        workflow = Workflow("Cached", root_dir=self.root_dir, graph=nx.DiGraph())
+        return ExecutionCache.make_key(node, node.get_execution_options(workflow, dict()), input_hashes)
+
+    def test_key_is_stable(self):
+        self.assertEqual(self.make_key(GOOD_NODES["filter_node"], ["a"]),
+                         self.make_key(GOOD_NODES["filter_node"], ["a"]))
+
+    def test_key_changes_with_inputs_and_options(self):
+        changed_options = dict(GOOD_NODES["filter_node"], options={"items": "key"})
+        key = self.make_key(GOOD_NODES["filter_node"], ["a"])
+
+        self.assertNotEqual(key, self.make_key(GOOD_NODES["filter_node"], ["b"]))
+        self.assertNotEqual(key, self.make_key(changed_options, ["a"]))
+
+    def test_key_unknown_input(self):
+        self.assertIsNone(self.make_key(GOOD_NODES["filter_node"], [None]))
+
+    def test_key_changes_with_file(self):
+        read_csv_node = dict(GOOD_NODES["read_csv_node"], options={"file": "sample1.csv"})
+        key = self.make_key(read_csv_node)
+
+        with open(os.path.join(self.root_dir, "sample1.csv"), "a") as f:
+            f.write("6,K6,A6\n")
+
+        self.assertNotEqual(key, self.make_key(read_csv_node))
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.cache.get("abc"))
+        self.cache.put("abc", self.df)
+
+        pd.testing.assert_frame_equal(self.cache.get("abc"), self.df)
+        self.assertDictEqual(self.cache.stats(), {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+
+    def test_custom_nodes_opt_in(self):
+        self.assertTrue(node_factory(GOOD_NODES["filter_node"]).is_cacheable())
+        self.assertFalse(node_factory(GOOD_NODES["write_csv_node"]).is_cacheable())
+
+        module = {"__module__": "pyworkflow.nodes.custom_nodes.my_node"}
+        self.assertFalse(type("MyNode", (ManipulationNode,), module).is_cacheable())
+        self.assertTrue(type("MyNode", (ManipulationNode,), dict(module, cacheable=True)).is_cacheable())
+
+    def test_put_failure_ignored(self):
+        # Writing into the cache directory fails once it is replaced by a file
+        shutil.rmtree(self.cache.cache_dir)
+        open(self.cache.cache_dir, "w").close()
+
+        self.cache.put("abc", self.df)
+        self.assertIsNone(self.cache.get("abc"))
+
+    def test_evict_least_recently_used(self):
+        self.cache.put("first", self.df)
+        size = os.path.getsize(os.path.join(self.cache.cache_dir, "first"))
+        os.utime(os.path.join(self.cache.cache_dir, "first"), (0, 0))
+
+        self.cache.max_bytes = size
+        self.cache.put("second", self.df)
+
+        self.assertIsNone(self.cache.get("first"))
+        self.assertIsNotNone(self.cache.get("second"))
+
+    def test_workflow_execution_uses_cache(self):
+        workflow = Workflow("Cached", root_dir=self.root_dir, graph=nx.DiGraph(), cache=self.cache)
+        read_csv_node = Node(dict(GOOD_NODES["read_csv_node"], options={"file": "sample1.csv"}))
+        workflow.update_or_add_node(read_csv_node)
+
+        workflow.execute("1")
+        workflow.execute("1")
+
+        self.assertEqual(workflow.cache.hits, 1)
+        self.assertEqual(workflow.cache.misses, 1)
+
+    def test_workflow_execution_bypass_cache(self):
+        workflow = Workflow("Cached", root_dir=self.root_dir, graph=nx.DiGraph(), cache=self.cache)
+        read_csv_node = Node(dict(GOOD_NODES["read_csv_node"], options={"file": "sample1.csv"}, use_cache=False))
+        workflow.update_or_add_node(read_csv_node)
+
+        workflow.execute("1")
+        workflow.execute("1")
+
+        self.assertEqual(workflow.cache.hits + workflow.cache.misses, 0)
+
+    def test_workflow_without_cache(self):
+        workflow = Workflow("Uncached", root_dir=self.root_dir, graph=nx.DiGraph())
+        read_csv_node = Node(dict(GOOD_NODES["read_csv_node"], options={"file": "sample1.csv"}))
+        workflow.update_or_add_node(read_csv_node)
+
+        workflow.execute("1")
+
+        # Caching is opt-in, so no cache directory is created
+        self.assertIsNone(workflow.cache)
+        self.assertIsNone(workflow.graph.nodes["1"]["data_hash"])
+        self.assertNotIn(Workflow.CACHE_DIR_NAME, os.listdir(self.root_dir))
@@ -0,0 +1,56 @@
+import unittest
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pyworkflow
+from pyworkflow.tests.sample_test_data import GOOD_NODES, DATA_FILES
+
+
+HEAVY_MODULES = ["pandas", "altair", "pyarrow"]
+
+EXECUTE_WORKFLOW = """
+import networkx as nx
+from pyworkflow import Workflow, Node
+
+workflow = Workflow("Imports", root_dir=%r, graph=nx.DiGraph())
+for node_info in %r:
+    workflow.update_or_add_node(Node(node_info))
+workflow.add_edge(workflow.get_node("1"), workflow.get_node("2"))
+assert workflow.execute_all() == {}
+"""
+
+
+class ImportsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+        with open(os.path.join(self.root_dir, "sample1.csv"), "w") as f:
+            f.write(DATA_FILES["sample1"])
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def imported_modules(self, code):
+        """Run code in a new interpreter and list the heavy modules it imported."""
+        code += "\nimport sys, json\nprint(json.dumps([m for m in %r if m in sys.modules]))" % HEAVY_MODULES
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(pyworkflow.__file__)))
+
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=self.root_dir, env=env)
+        return json.loads(output.decode().splitlines()[-1])
+
+    def test_import_loads_no_heavy_modules(self):
+        self.assertListEqual(self.imported_modules("import pyworkflow"), [])
+
+    def test_execute_loads_only_used_modules(self):
+        nodes = [
+            dict(GOOD_NODES["read_csv_node"], options={"file": "sample1.csv"}),
+            dict(GOOD_NODES["write_csv_node"], options={"file": "out.csv"}),
+        ]
+        modules = self.imported_modules(EXECUTE_WORKFLOW % (self.root_dir, nodes))
+
+        self.assertIn("pandas", modules)
+        self.assertNotIn("altair", modules)
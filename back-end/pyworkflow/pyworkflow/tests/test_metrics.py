@@ -0,0 +1,156 @@
+import unittest
+import os
+import shutil
+import tempfile
+import networkx as nx
+
+from pyworkflow import Workflow, WorkflowException, Node, ExecutionHook
+from pyworkflow.cache import ExecutionCache
+from pyworkflow.tests.sample_test_data import GOOD_NODES, DATA_FILES
+
+
+class RecordingHook(ExecutionHook):
+    def __init__(self):
+        self.events = list()
+
+    def before_node(self, workflow, node):
+        self.events.append(("before", node.node_id))
+
+    def after_node(self, workflow, node, metrics, error):
+        self.events.append(("after", node.node_id, error is None))
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+        with open(os.path.join(self.root_dir, "sample1.csv"), "w") as f:
+            f.write(DATA_FILES["sample1"])
+
+        self.workflow = Workflow("Metrics", root_dir=self.root_dir, graph=nx.DiGraph(),
+                                 cache=ExecutionCache(os.path.join(self.root_dir, "cache")))
+
+        nodes = [
+            dict(GOOD_NODES["read_csv_node"], options={"file": "sample1.csv"}),
+            dict(GOOD_NODES["filter_node"], options={"items": ["key"], "axis": "columns"}),
+            dict(GOOD_NODES["write_csv_node"], options={"file": "out.csv", "index": False}),
+        ]
+        for node_info in nodes:
+            self.workflow.update_or_add_node(Node(node_info))
+
+        self.workflow.add_edge(self.workflow.get_node("1"), self.workflow.get_node("4"))
+        self.workflow.add_edge(self.workflow.get_node("4"), self.workflow.get_node("2"))
+
+        self.hook = RecordingHook()
+        self.workflow.add_hook(self.hook)
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def test_hooks_called(self):
+        # Adding a hook again has no effect
+        self.workflow.add_hook(self.hook)
+        self.assertDictEqual(self.workflow.execute_all(max_workers=1), {})
+
+        self.assertListEqual(self.hook.events, [
+            ("before", "1"), ("after", "1", True),
+            ("before", "4"), ("after", "4", True),
+            ("before", "2"), ("after", "2", True),
+        ])
+
+        self.workflow.remove_hook(self.hook)
+        self.workflow.execute("1")
+        self.assertEqual(len(self.hook.events), 6)
+
+    def test_node_metrics(self):
+        self.assertIsNone(self.workflow.node_metrics("4"))
+        self.workflow.execute_all()
+
+        metrics = self.workflow.node_metrics("4")
+
+        self.assertListEqual(sorted(metrics["timers"]), ["execute", "load_input", "store"])
+        self.assertEqual(metrics["counters"]["rows_in"], 6)
+        self.assertEqual(metrics["counters"]["columns_in"], 3)
+        self.assertEqual(metrics["counters"]["rows_out"], 6)
+        self.assertEqual(metrics["counters"]["columns_out"], 1)
+        self.assertGreater(metrics["counters"]["bytes_out"], 0)
+        self.assertEqual(metrics["counters"]["cache_hits"], 0)
+        self.assertIsNone(metrics["error"])
+
+        # Metrics are execution state, not part of the Node
+        self.assertNotIn("metrics", self.workflow.get_node("4").__dict__)
+
+    def test_node_metrics_cleared_when_changed(self):
+        self.workflow.execute_all()
+
+        # Saving the executed Node again keeps its metrics
+        self.workflow.update_or_add_node(self.workflow.get_node("4"))
+        self.assertIsNotNone(self.workflow.node_metrics("4"))
+
+        filter_node = self.workflow.get_node("4")
+        filter_node.option_values["items"] = ["A"]
+        self.workflow.update_or_add_node(filter_node)
+
+        self.assertIsNone(self.workflow.node_metrics("4"))
+        self.assertIsNotNone(self.workflow.node_metrics("1"))
+
+    def test_node_metrics_missing_node(self):
+        with self.assertRaises(WorkflowException):
+            self.workflow.node_metrics("foobar")
+
+    def test_cache_hit_counted(self):
+        self.workflow.execute_all()
+        self.workflow.execute("4")
+
+        metrics = self.workflow.node_metrics("4")
+
+        self.assertEqual(metrics["counters"]["cache_hits"], 1)
+        self.assertNotIn("execute", metrics["timers"])
+
+    def test_error_recorded(self):
+        filter_node = self.workflow.get_node("4")
+        filter_node.option_values["axis"] = "foobar"
+        self.workflow.update_or_add_node(filter_node)
+
+        self.workflow.execute_all(max_workers=1)
+
+        self.assertIsNotNone(self.workflow.node_metrics("4")["error"])
+        self.assertIn(("after", "4", False), self.hook.events)
+
+    def test_fused_metrics(self):
+        filter_node = Node(dict(GOOD_NODES["filter_node"], node_id="8", options={"items": ["key"], "axis": "columns"}))
+        self.workflow.update_or_add_node(filter_node)
+        self.workflow.remove_edge(self.workflow.get_node("4"), self.workflow.get_node("2"))
+        self.workflow.add_edge(self.workflow.get_node("4"), filter_node)
+        self.workflow.add_edge(filter_node, self.workflow.get_node("2"))
+
+        self.assertDictEqual(self.workflow.execute_all(fuse=True), {})
+
+        first, second = self.workflow.node_metrics("4"), self.workflow.node_metrics("8")
+
+        self.assertListEqual(first["task"], ["1", "4", "8"])
+        self.assertIn("load_input", self.workflow.node_metrics("1")["timers"])
+        self.assertIn("store", second["timers"])
+        self.assertEqual(second["counters"]["columns_in"], first["counters"]["columns_out"])
+
+        # The whole chain is loaded from the cache
+        self.workflow.execute_all(fuse=True)
+        self.assertEqual(self.workflow.node_metrics("4")["counters"]["cache_hits"], 1)
+
+    def test_streamed_metrics(self):
+        self.assertDictEqual(self.workflow.execute_all(chunksize=2), {})
+
+        read, write = self.workflow.node_metrics("1"), self.workflow.node_metrics("2")
+
+        self.assertListEqual(read["task"], ["1", "4", "2"])
+        self.assertEqual(read["counters"]["rows_out"], 6)
+        self.assertEqual(read["counters"]["chunks"], 3)
+        self.assertEqual(write["counters"]["rows_in"], 6)
+        self.assertEqual(write["counters"]["columns_in"], 1)
+        self.assertGreaterEqual(write["timers"]["execute"], 0)
+
+    def test_export_results_includes_metrics(self):
+        self.workflow.execute_all()
+        results = self.workflow.export_results(["4"])
+
+        self.assertEqual(results[0]["metrics"], self.workflow.node_metrics("4"))
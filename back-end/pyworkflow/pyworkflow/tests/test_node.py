@@ -1,4 +1,5 @@
 import unittest
+import io
 from pyworkflow import *
 from pyworkflow.nodes import *
 from pyworkflow.tests.sample_test_data import GOOD_NODES, BAD_NODES, DATA_FILES
@@ -45,6 +46,32 @@ class NodeTestCase(unittest.TestCase):
         node_to_add = node_factory(GOOD_NODES["string_input"])
         self.assertEqual(node_to_add.get_replacement_value(), "key")
 
+    def test_options_rebuilt_on_change(self):
+        node_to_add = node_factory(GOOD_NODES["filter_node"])
+        options = node_to_add.options
+
+        self.assertIs(node_to_add.options["items"], options["items"])
+
+        node_to_add.option_values["items"] = "key"
+        self.assertEqual(node_to_add.options["items"].get_value(), "key")
+
+    def test_options_stream_value(self):
+        node_to_add = node_factory(GOOD_NODES["read_csv_node"])
+        stream = io.TextIOWrapper(io.BytesIO())
+
+        node_to_add.option_values["file"] = stream
+        self.assertIs(node_to_add.options["file"].get_value(), stream)
+        self.assertIs(node_to_add.copy().options["file"].get_value(), stream)
+
+    def test_node_copy(self):
+        node_to_add = node_factory(GOOD_NODES["filter_node"])
+        copied_node = node_to_add.copy()
+
+        self.assertIs(copied_node.options["items"], node_to_add.options["items"])
+
+        copied_node.option_values["items"] = "key"
+        self.assertIsNone(node_to_add.options["items"].get_value())
+
     def test_node_to_string(self):
         node_to_add = node_factory(GOOD_NODES["string_input"])
         self.assertEqual(str(node_to_add), "String Input")
@@ -53,3 +53,13 @@ class ParameterTestCase(unittest.TestCase):
         except ParameterValidationError as e:
             self.assertEqual(str(e), "Invalid value '42' (type 'int') for StringParameter")
 
+
+    def test_clone_select_param(self):
+        param = SelectParameter("Engine", options=["c", "pyarrow"], default="c", docstring="Parser")
+        clone = param.clone()
+
+        self.assertDictEqual(clone.to_json(), param.to_json())
+
+        clone.set_value("python")
+        with self.assertRaises(ParameterValidationError):
+            clone.validate()
@@ -1,7 +1,11 @@
 import unittest
+import os
+import threading
+from unittest import mock
 from pyworkflow import Workflow, WorkflowException, Node, NodeException, node_factory
 from pyworkflow.nodes import *
 import networkx as nx
+import pandas as pd
 
 from pyworkflow.tests.sample_test_data import GOOD_NODES, BAD_NODES, DATA_FILES
 
@@ -100,6 +104,223 @@ class PyWorkflowTestCase(unittest.TestCase):
             executed_node = self.pyworkflow.execute(node)
             self.pyworkflow.update_or_add_node(executed_node)
 
+    def test_xexecute_all_workflow(self):
+        errors = self.pyworkflow.execute_all(max_workers=2)
+
+        self.assertDictEqual(errors, {})
+        self.assertEqual(self.pyworkflow.get_node("4").data, "My Workflow-4")
+
+    def test_execute_all_skips_failed_descendants(self):
+        workflow = Workflow("Failing Workflow", root_dir="/tmp", graph=nx.DiGraph())
+
+        for node in [self.read_csv_node_1, self.join_node, self.write_csv_node]:
+            workflow.update_or_add_node(node)
+
+        workflow.add_edge(self.read_csv_node_1, self.join_node)
+        workflow.add_edge(self.join_node, self.write_csv_node)
+
+        errors = workflow.execute_all()
+
+        self.assertEqual(list(errors.keys()), ["3", "4"])
+        self.assertIsInstance(errors["3"], NodeException)
+        self.assertIsInstance(errors["4"], WorkflowException)
+        self.assertEqual(workflow.get_node("1").data, "Failing Workflow-1")
+
+    def test_execute_all_node_bug(self):
+        workflow = Workflow("Failing Workflow", root_dir="/tmp", graph=nx.DiGraph())
+
+        for node in [self.read_csv_node_1, self.write_csv_node]:
+            workflow.update_or_add_node(node)
+
+        workflow.add_edge(self.read_csv_node_1, self.write_csv_node)
+
+        # Not a NodeException, e.g. a bug in the Node
+        with mock.patch.object(ReadCsvNode, "execute", side_effect=RuntimeError("boom")):
+            errors = workflow.execute_all()
+
+        self.assertListEqual(list(errors.keys()), ["1", "4"])
+        self.assertEqual(str(errors["1"]), "execute: boom")
+        self.assertIsInstance(errors["1"].__cause__, RuntimeError)
+        self.assertEqual(workflow.node_metrics("1")["error"], "execute: boom")
+        self.assertIn("skipped", errors["4"].reason)
+
+    def test_execute_all_unexpected_error(self):
+        workflow = self.build_workflow("Failing Workflow")
+
+        # Raised by the Workflow itself, outside any Node
+        with mock.patch.object(workflow, "execute", side_effect=KeyError("foobar")):
+            errors = workflow.execute_all(max_workers=1)
+
+        self.assertIsInstance(errors["7"], WorkflowException)
+        self.assertEqual(errors["7"].node_id, "7")
+        self.assertIn("skipped", errors["4"].reason)
+
+    def test_execute_store_error(self):
+        workflow = Workflow("Failing Workflow", root_dir="/tmp", graph=nx.DiGraph())
+        workflow.update_or_add_node(self.read_csv_node_1)
+
+        with mock.patch.object(workflow.store, "put", side_effect=OSError("No space left on device")):
+            with self.assertRaises(WorkflowException) as context:
+                workflow.execute("1")
+
+        self.assertEqual(context.exception.reason,
+                         "There was a problem saving node output: No space left on device")
+
+    def build_workflow(self, name):
+        workflow = Workflow(name, root_dir="/tmp", graph=nx.DiGraph(), flow_vars=nx.Graph())
+
+        for node in self.nodes:
+            workflow.update_or_add_node(node)
+
+        for edge in self.edges:
+            workflow.add_edge(workflow.get_node(edge[0]), workflow.get_node(edge[1]))
+
+        return workflow
+
+    def test_stale_nodes(self):
+        workflow = self.build_workflow("Stale Workflow")
+        self.assertEqual(len(workflow.stale_nodes()), 5)
+
+        self.assertDictEqual(workflow.execute_all(), {})
+        self.assertEqual(workflow.stale_nodes(), [])
+
+    def test_edit_node_marks_descendants_stale(self):
+        workflow = self.build_workflow("Stale Workflow")
+        workflow.execute_all()
+
+        join_node = workflow.get_node("3")
+        join_node.option_values["on"] = "other"
+        workflow.update_or_add_node(join_node)
+
+        self.assertEqual(workflow.stale_nodes(), ["3", "4"])
+
+        # Restore the option, then only re-run the stale subgraph
+        join_node.option_values["on"] = "to_replace"
+        workflow.update_or_add_node(join_node)
+
+        self.assertDictEqual(workflow.execute_stale(), {})
+        self.assertEqual(workflow.stale_nodes(), [])
+
+    def test_edge_change_marks_stale(self):
+        workflow = self.build_workflow("Stale Workflow")
+        workflow.execute_all()
+
+        workflow.remove_edge(workflow.get_node("3"), workflow.get_node("4"))
+
+        self.assertEqual(workflow.stale_nodes(), ["4"])
+
+    def test_global_flow_var_marks_consumers_stale(self):
+        workflow = self.build_workflow("Stale Workflow")
+        workflow.execute_all()
+
+        flow_var = workflow.get_flow_var("1")
+        flow_var.option_values["default_value"] = ";"
+        workflow.update_or_add_node(flow_var)
+
+        self.assertEqual(workflow.stale_nodes(), ["2", "3", "4"])
+
+    def test_ancestors_to_execute(self):
+        workflow = self.build_workflow("Target Workflow")
+
+        self.assertEqual(workflow.ancestors_to_execute("1"), ["1"])
+        self.assertEqual(set(workflow.ancestors_to_execute("4")), {"1", "2", "3", "4", "7"})
+
+    def test_execute_to_skips_valid_ancestors(self):
+        workflow = self.build_workflow("Target Workflow")
+
+        self.assertDictEqual(workflow.execute_to("3"), {})
+        self.assertEqual(workflow.stale_nodes(), ["4"])
+        self.assertEqual(workflow.ancestors_to_execute("4"), ["4"])
+
+    def test_execute_to_missing_node(self):
+        workflow = self.build_workflow("Target Workflow")
+
+        with self.assertRaises(WorkflowException):
+            workflow.execute_to("100")
+
+    def test_execute_nodes_reports_tasks(self):
+        workflow = self.build_workflow("Job Workflow")
+        finished = list()
+
+        errors = workflow.execute_nodes(
+            workflow.execution_order(),
+            on_task_done=lambda task, seconds, e: finished.extend(task)
+        )
+
+        self.assertDictEqual(errors, {})
+        self.assertCountEqual(finished, workflow.execution_order())
+
+    def test_execute_nodes_cancel(self):
+        workflow = self.build_workflow("Job Workflow")
+        cancel = threading.Event()
+        cancel.set()
+
+        errors = workflow.execute_nodes(workflow.execution_order(), cancel=cancel)
+
+        self.assertCountEqual(errors, workflow.execution_order())
+        self.assertEqual(len(workflow.stale_nodes()), 5)
+
+    def test_import_results(self):
+        workflow = self.build_workflow("Job Workflow")
+        background = Workflow.from_json(workflow.to_json())
+        background.execute_all()
+
+        results = background.export_results(background.execution_order())
+        self.assertEqual(len(workflow.import_results(results)), 5)
+        self.assertEqual(workflow.stale_nodes(), [])
+
+    def test_import_results_after_edit(self):
+        workflow = self.build_workflow("Job Workflow")
+        background = Workflow.from_json(workflow.to_json())
+        background.execute_all()
+
+        # Re-configure the join; it and its descendant keep no results
+        join_node = workflow.get_node("3")
+        join_node.option_values["on"] = "other"
+        workflow.update_or_add_node(join_node)
+
+        workflow.import_results(background.export_results(background.execution_order()))
+        self.assertEqual(workflow.stale_nodes(), ["3", "4"])
+
+    def test_import_results_replaces_memory(self):
+        workflow = self.build_workflow("Job Workflow")
+        workflow.execute_all()
+        old_data = workflow.retrieve_node_data(workflow.get_node("1"))
+
+        # Edit, then execute in the background as a job would
+        read_csv_node = workflow.get_node("1")
+        read_csv_node.option_values["file"] = "/tmp/sample2.csv"
+        workflow.update_or_add_node(read_csv_node)
+
+        background = Workflow.from_json(workflow.to_json())
+        background.execute_all()
+        workflow.import_results(background.export_results(["1"]))
+
+        data = workflow.retrieve_node_data(workflow.get_node("1"))
+        self.assertFalse(data.equals(old_data))
+        pd.testing.assert_frame_equal(data, pd.read_csv("/tmp/sample2.csv"))
+
+    def test_version_changes_on_edit(self):
+        workflow = self.build_workflow("Versioned Workflow")
+        version = workflow.version
+
+        workflow.execution_order()
+        self.assertEqual(workflow.version, version)
+
+        workflow.remove_edge(workflow.get_node("3"), workflow.get_node("4"))
+        self.assertGreater(workflow.version, version)
+
+    def test_get_node_cached(self):
+        workflow = self.build_workflow("Cached Nodes")
+        read_csv_node = workflow.get_node("1")
+
+        # Changes are not seen until the Node is saved
+        read_csv_node.option_values["file"] = "other.csv"
+        self.assertEqual(workflow.get_node("1").option_values["file"], "/tmp/sample1.csv")
+
+        workflow.update_or_add_node(read_csv_node)
+        self.assertEqual(workflow.get_node("1").option_values["file"], "other.csv")
+
     # def test_execute_workflow_load_data(self):
     #     print(self.pyworkflow.graph.nodes)
     #     data = self.pyworkflow.load_input_data("3")
@@ -114,3 +335,66 @@ class PyWorkflowTestCase(unittest.TestCase):
             saved_filed = self.pyworkflow.upload_file(f, to_open)
 
             self.assertEqual(to_open, saved_filed)
+
+        with open(to_open) as f:
+            self.assertEqual(f.read(), DATA_FILES["sample1"])
+
+    def test_upload_file_chunks(self):
+        class FailingUpload:
+            def chunks(self):
+                yield b"key,A\n"
+                raise OSError("Connection reset")
+
+            def close(self):
+                pass
+
+        to_open = '/tmp/sample_upload.csv'
+        with open(to_open, 'w') as f:
+            f.write(DATA_FILES["sample1"])
+
+        with self.assertRaises(WorkflowException):
+            self.pyworkflow.upload_file(FailingUpload(), to_open)
+
+        # The previous file is kept, and no partial file left behind
+        with open(to_open) as f:
+            self.assertEqual(f.read(), DATA_FILES["sample1"])
+
+        self.assertListEqual([name for name in os.listdir('/tmp') if name.startswith('sample_upload.csv.')], [])
+
+    def test_upload_file_concurrent(self):
+        # Both uploads are part-way through writing at the same time
+        barrier = threading.Barrier(2)
+
+        class SlowUpload:
+            def __init__(self, data):
+                self.data = data
+
+            def chunks(self):
+                yield self.data[:4]
+                barrier.wait(timeout=5)
+                yield self.data[4:]
+
+            def close(self):
+                pass
+
+        to_open = '/tmp/sample_upload.csv'
+        uploads = [SlowUpload(DATA_FILES[name].encode()) for name in ["sample1", "sample2"]]
+        errors = list()
+
+        def upload(uploaded_file):
+            try:
+                self.pyworkflow.upload_file(uploaded_file, to_open)
+            except WorkflowException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=upload, args=(uploaded_file,)) for uploaded_file in uploads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(errors, [])
+
+        # One upload wins, whole
+        with open(to_open) as f:
+            self.assertIn(f.read(), [DATA_FILES["sample1"], DATA_FILES["sample2"]])
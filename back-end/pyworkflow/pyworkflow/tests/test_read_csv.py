@@ -0,0 +1,82 @@
+import unittest
+import os
+import shutil
+import tempfile
+import networkx as nx
+import pandas as pd
+
+from pyworkflow import Workflow, NodeException, Parameter, node_factory
+from pyworkflow.cache import csv_schemas
+from pyworkflow.nodes import ReadCsvNode
+from pyworkflow.tests.sample_test_data import GOOD_NODES
+
+
+DATA = "key,A,when\nK0,1,2020-01-01\nK1,2,2020-01-02\nK2,,2020-01-03\n"
+
+
+class ReadCsvTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+        with open(os.path.join(self.root_dir, "dates.csv"), "w") as f:
+            f.write(DATA)
+
+        self.workflow = Workflow("Read CSV", root_dir=self.root_dir, graph=nx.DiGraph())
+        csv_schemas.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def read(self, **options):
+        node = node_factory(dict(GOOD_NODES["read_csv_node"], options=dict(file="dates.csv", **options)))
+
+        execution_options = node.get_execution_options(self.workflow, dict())
+        return node.execute([], execution_options), execution_options
+
+    def test_pyarrow_engine(self):
+        expected, _ = self.read()
+        df, _ = self.read(engine="pyarrow")
+
+        # pyarrow reads dates as dates, not strings
+        pd.testing.assert_frame_equal(df[["key", "A"]], expected[["key", "A"]])
+        self.assertEqual(str(df["when"][0]), expected["when"][0])
+
+    def test_dtype_and_parse_dates(self):
+        for engine in ["c", "pyarrow"]:
+            df, _ = self.read(engine=engine, dtype='{"A": "float32"}', parse_dates="when")
+
+            self.assertEqual(df["A"].dtype, "float32")
+            self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["when"]))
+
+        with self.assertRaises(NodeException):
+            self.read(dtype='["A"]')
+
+    def test_arrow_strings(self):
+        for engine in ["c", "pyarrow"]:
+            df, _ = self.read(engine=engine, arrow_strings=True)
+
+            self.assertEqual(df["key"].dtype, "string[pyarrow]")
+            self.assertEqual(df["A"].dtype, "float64")
+
+    def test_schema_cached(self):
+        df, options = self.read(parse_dates="when")
+        key = ReadCsvNode.schema_key(options)
+
+        self.assertDictEqual(csv_schemas.get(key), {"key": str(df["key"].dtype), "A": "float64"})
+        self.assertDictEqual(ReadCsvNode.get_read_options(options)["dtype"], csv_schemas.get(key))
+
+        # A changed file is inferred again
+        with open(os.path.join(self.root_dir, "dates.csv"), "a") as f:
+            f.write("K3,4,2020-01-04\n")
+
+        self.assertIsNone(csv_schemas.get(ReadCsvNode.schema_key(options)))
+
+    def test_pyarrow_column_pushdown(self):
+        _, options = self.read()
+        options["column_filter"] = Parameter("column_filter", default={"regex": "^(key|A)$"})
+
+        read_options = ReadCsvNode.get_read_options(options, engine="pyarrow")
+        self.assertListEqual(read_options["usecols"], ["key", "A"])
+
+        df = pd.read_csv(**read_options)
+        self.assertListEqual(list(df.columns), ["key", "A"])
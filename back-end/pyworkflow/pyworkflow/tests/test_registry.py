@@ -0,0 +1,138 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+from pyworkflow import Node, NodeRegistry, node_factory
+from pyworkflow.nodes import ReadCsvNode
+from pyworkflow.registry import NODE_DIR
+
+
+ENTRY_POINTS = """[pyworkflow.nodes]
+plugin.PluginNode = pyworkflow.tests.test_registry:PluginNode
+"""
+
+
+class PluginNode(Node):
+    name = "Plugin Node"
+    num_in = 1
+    num_out = 1
+
+
+NODE_FILE = """from pyworkflow.node import Node
+
+
+class RegistryTestNode(Node):
+    name = "%s"
+    num_in = 1
+    num_out = 1
+"""
+
+
+class NodeRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = NodeRegistry()
+        self.file_path = os.path.join(NODE_DIR, "custom_nodes", "registry_test_node.py")
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        self.write_node_file(NODE_FILE % "Registry Node")
+
+    def tearDown(self):
+        os.remove(self.file_path)
+        sys.modules.pop("pyworkflow.nodes.custom_nodes.registry_test_node", None)
+
+    def write_node_file(self, contents):
+        with open(self.file_path, "w") as f:
+            f.write(contents)
+
+    def node_info(self):
+        return self.registry.node_info("custom_nodes", "registry_test_node", self.file_path)
+
+    def test_node_info_cached(self):
+        info = self.node_info()
+
+        self.assertEqual(info["name"], "Registry Node")
+        self.assertIs(self.node_info(), info)
+
+        # Only touching the file does not parse it again
+        os.utime(self.file_path)
+        self.assertIs(self.node_info(), info)
+
+    def test_changed_file_imported_again(self):
+        self.node_info()
+        self.write_node_file(NODE_FILE % "Changed Registry Node")
+
+        self.assertEqual(self.node_info()["name"], "Changed Registry Node")
+
+        node_class = self.registry.node_class("custom_nodes", "RegistryTestNode", "registry_test_node")
+        self.assertEqual(node_class.name, "Changed Registry Node")
+
+    def test_missing_packages_cached(self):
+        self.write_node_file("import registry_missing_package\n")
+        info = self.node_info()
+
+        self.assertListEqual(info["missing_packages"], ["registry_missing_package"])
+        self.assertIs(self.node_info(), info)
+        self.assertIsNone(self.registry.node_class("custom_nodes", "RegistryTestNode", "registry_test_node"))
+
+    def test_invalidate(self):
+        info = self.node_info()
+        self.registry.invalidate(self.file_path)
+
+        self.assertIsNot(self.node_info(), info)
+
+    def test_node_factory_custom_node(self):
+        node = node_factory({"node_type": "custom_nodes", "node_key": "RegistryTestNode",
+                             "filename": "registry_test_node", "node_id": "1"})
+        self.assertEqual(type(node).name, "Registry Node")
+
+    def test_node_factory_custom_node_error(self):
+        self.write_node_file(NODE_FILE % "Broken Registry Node" + """
+    def __init__(self, node_info):
+        raise ValueError("broken")
+""")
+
+        node = node_factory({"node_type": "custom_nodes", "node_key": "RegistryTestNode",
+                             "filename": "registry_test_node", "node_id": "1"})
+        self.assertIsNone(node)
+
+
+class NodeClassTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = NodeRegistry()
+
+    def test_builtin_node_class(self):
+        self.assertIs(self.registry.node_class("io", "ReadCsvNode"), ReadCsvNode)
+        self.assertIsNone(self.registry.node_class("io", "foobar"))
+
+    def test_node_factory_builtin_error(self):
+        # Errors in built-in Nodes are bugs, so are not hidden
+        with self.assertRaises(ValueError):
+            with mock.patch.object(ReadCsvNode, "__init__", side_effect=ValueError("broken")):
+                node_factory({"node_type": "io", "node_key": "ReadCsvNode", "node_id": "1"})
+
+    def test_register_lazy_node_class(self):
+        self.registry.register("plugin", "PluginNode", "pyworkflow.tests.test_registry:PluginNode")
+        self.assertEqual(self.registry.node_class("plugin", "PluginNode").name, "Plugin Node")
+
+        self.registry.register("plugin", "MissingNode", "pyworkflow.tests.foobar:MissingNode")
+        self.assertIsNone(self.registry.node_class("plugin", "MissingNode"))
+
+    def test_entry_point_node_class(self):
+        site_dir = tempfile.mkdtemp()
+        dist_dir = os.path.join(site_dir, "registry_plugin-0.0.0.dist-info")
+        os.mkdir(dist_dir)
+
+        with open(os.path.join(dist_dir, "METADATA"), "w") as f:
+            f.write("Metadata-Version: 2.1\nName: registry-plugin\nVersion: 0.0.0\n")
+        with open(os.path.join(dist_dir, "entry_points.txt"), "w") as f:
+            f.write(ENTRY_POINTS)
+
+        sys.path.insert(0, site_dir)
+        try:
+            self.assertListEqual(self.registry.plugin_nodes(), [("plugin", "PluginNode")])
+            self.assertEqual(self.registry.node_class("plugin", "PluginNode").name, "Plugin Node")
+        finally:
+            sys.path.remove(site_dir)
+            shutil.rmtree(site_dir)
@@ -0,0 +1,141 @@
+import unittest
+import os
+import pandas as pd
+
+from pyworkflow.store import DiskResultStore, MemoryResultStore
+
+
+class ResultStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"key": ["K0", "K1", "K2"], "A": [0, 1, 2]})
+        self.size = MemoryResultStore.sizeof(self.df)
+
+        for name in ["store-1", "store-2", "store-3"]:
+            if os.path.exists(os.path.join("/tmp", name)):
+                os.remove(os.path.join("/tmp", name))
+
+    def test_disk_store_round_trip(self):
+        store = DiskResultStore("/tmp")
+        store.put("store-1", self.df)
+
+        with open("/tmp/store-1", "rb") as f:
+            self.assertEqual(f.read(6), b"ARROW1")
+
+        pd.testing.assert_frame_equal(store.get("store-1"), self.df)
+
+    def test_disk_store_parquet(self):
+        df = self.df.set_index("key")
+        store = DiskResultStore("/tmp", format="parquet")
+        store.put("store-1", df)
+
+        pd.testing.assert_frame_equal(store.get("store-1"), df)
+
+    def test_disk_store_json(self):
+        store = DiskResultStore("/tmp", format="json")
+        store.put("store-1", self.df)
+
+        pd.testing.assert_frame_equal(store.get("store-1"), self.df)
+
+    def test_disk_store_falls_back_to_json(self):
+        store = DiskResultStore("/tmp")
+        store.put("store-1", pd.DataFrame({"mixed": [1, "one"]}))
+        store.put("store-2", {"message": "not a DataFrame"})
+
+        pd.testing.assert_frame_equal(store.get("store-1"), pd.DataFrame({"mixed": [1, "one"]}))
+        self.assertDictEqual(store.get("store-2"), {"message": "not a DataFrame"})
+
+    def test_disk_store_duplicate_index(self):
+        df = pd.DataFrame({"mixed": [1, "one", 2.5]}, index=[0, 0, 1])
+        store = DiskResultStore("/tmp")
+        store.put("store-1", df)
+
+        pd.testing.assert_frame_equal(store.get("store-1"), df)
+
+    def test_disk_store_unknown_format(self):
+        with self.assertRaises(ValueError):
+            DiskResultStore("/tmp", format="csv")
+
+    def test_memory_store_returns_live_object(self):
+        store = MemoryResultStore("/tmp")
+        store.put("store-1", self.df)
+
+        self.assertIs(store.get("store-1"), self.df)
+        self.assertFalse(os.path.exists("/tmp/store-1"))
+
+    def test_memory_store_flush(self):
+        store = MemoryResultStore("/tmp")
+        store.put("store-1", self.df)
+        store.flush()
+
+        self.assertTrue(os.path.exists("/tmp/store-1"))
+        self.assertIs(store.get("store-1"), self.df)
+
+    def test_memory_store_evicts_least_recently_used(self):
+        store = MemoryResultStore("/tmp", max_bytes=self.size * 2)
+        store.put("store-1", self.df)
+        store.put("store-2", self.df)
+
+        # Touch the first entry so the second is evicted next
+        store.get("store-1")
+        store.put("store-3", self.df)
+
+        self.assertEqual(store.size, self.size * 2)
+        self.assertTrue(os.path.exists("/tmp/store-2"))
+        self.assertFalse(os.path.exists("/tmp/store-1"))
+        pd.testing.assert_frame_equal(store.get("store-2"), self.df)
+
+    def test_memory_store_entry_over_budget(self):
+        store = MemoryResultStore("/tmp", max_bytes=1)
+        store.put("store-1", self.df)
+
+        self.assertEqual(store.size, 0)
+        self.assertTrue(os.path.exists("/tmp/store-1"))
+
+    def test_memory_store_missing_entry(self):
+        store = MemoryResultStore("/tmp")
+
+        with self.assertRaises(OSError):
+            store.get("store-1")
+
+    def test_get_page(self):
+        expected = self.df.iloc[1:2][["A"]]
+
+        for store in [DiskResultStore("/tmp"), DiskResultStore("/tmp", format="parquet"), MemoryResultStore("/tmp")]:
+            store.put("store-1", self.df)
+            page = store.get_page("store-1", offset=1, limit=1, columns=["A"])
+
+            pd.testing.assert_frame_equal(page["data"], expected, check_index_type=False)
+            self.assertEqual(page["total_rows"], 3)
+            self.assertListEqual(page["columns"], ["key", "A"])
+
+    def test_get_page_sorted(self):
+        df = self.df.set_index("key")
+        store = DiskResultStore("/tmp")
+        store.put("store-1", df)
+
+        page = store.get_page("store-1", limit=2, sort=[("A", False)])
+        pd.testing.assert_frame_equal(page["data"], df.iloc[[2, 1]])
+
+    def test_get_page_json(self):
+        store = DiskResultStore("/tmp", format="json")
+        store.put("store-1", self.df)
+
+        page = store.get_page("store-1", offset=2)
+        self.assertEqual(page["data"].to_json(), '{"key":{"2":"K2"},"A":{"2":2}}')
+
+        # Files saved by earlier versions, with `DataFrame.to_json()`
+        with open("/tmp/store-3", "w") as f:
+            f.write(self.df.to_json())
+        page = store.get_page("store-3", offset=2)
+        self.assertEqual(page["data"].to_json(), '{"key":{"2":"K2"},"A":{"2":2}}')
+
+        store.put("store-2", {"not": "a table"})
+        with self.assertRaises(ValueError):
+            store.get_page("store-2")
+
+    def test_get_page_missing_column(self):
+        store = MemoryResultStore("/tmp")
+        store.put("store-1", self.df)
+
+        with self.assertRaises(ValueError):
+            store.get_page("store-1", columns=["foobar"])
@@ -0,0 +1,182 @@
+import unittest
+import os
+import shutil
+import tempfile
+import networkx as nx
+import pandas as pd
+
+from pyworkflow import Workflow, WorkflowException, Node, node_factory
+from pyworkflow.cache import ExecutionCache
+from pyworkflow.tests.sample_test_data import GOOD_NODES, DATA_FILES
+
+
+class StreamingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+        with open(os.path.join(self.root_dir, "sample1.csv"), "w") as f:
+            f.write(DATA_FILES["sample1"])
+
+        self.workflow = Workflow("Streamed", root_dir=self.root_dir, graph=nx.DiGraph(),
+                                 cache=ExecutionCache(os.path.join(self.root_dir, "cache")))
+
+        nodes = [
+            dict(GOOD_NODES["read_csv_node"], options={"file": "sample1.csv"}),
+            dict(GOOD_NODES["filter_node"], options={"items": ["key"], "axis": "columns"}),
+            dict(GOOD_NODES["write_csv_node"], options={"file": "out.csv", "index": False}),
+        ]
+        for node_info in nodes:
+            self.workflow.update_or_add_node(Node(node_info))
+
+        self.workflow.add_edge(self.workflow.get_node("1"), self.workflow.get_node("4"))
+        self.workflow.add_edge(self.workflow.get_node("4"), self.workflow.get_node("2"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def read_output(self):
+        return pd.read_csv(os.path.join(self.root_dir, "out.csv"))
+
+    def test_execution_plan(self):
+        order = self.workflow.execution_order()
+
+        self.assertEqual(self.workflow.execution_plan(order), [["1"], ["4"], ["2"]])
+        self.assertEqual(self.workflow.execution_plan(order, chunksize=2), [["1", "4", "2"]])
+
+    def test_branch_ends_chain(self):
+        pivot_node = node_factory(dict(GOOD_NODES["pivot_node"], node_id="6"))
+        self.workflow.update_or_add_node(pivot_node)
+        self.workflow.add_edge(self.workflow.get_node("4"), pivot_node)
+
+        plan = self.workflow.execution_plan(self.workflow.execution_order(), chunksize=2)
+
+        self.assertIn(["1", "4"], plan)
+        self.assertIn(["2"], plan)
+
+    def test_streamed_output_matches(self):
+        self.assertDictEqual(self.workflow.execute_all(), {})
+        expected = self.read_output()
+
+        self.assertDictEqual(self.workflow.execute_all(chunksize=2), {})
+        pd.testing.assert_frame_equal(self.read_output(), expected)
+        self.assertEqual(len(expected), 6)
+
+        # Nodes inside the chain do not keep their output
+        self.assertIsNone(self.workflow.get_node("4").data)
+        self.assertEqual(self.workflow.stale_nodes(), [])
+
+    def test_stream_error_reports_node(self):
+        filter_node = self.workflow.get_node("4")
+        filter_node.option_values["axis"] = "foobar"
+        self.workflow.update_or_add_node(filter_node)
+
+        errors = self.workflow.execute_all(chunksize=2)
+
+        self.assertEqual(errors["4"].action, "filter")
+        self.assertListEqual(sorted(errors), ["1", "2", "4"])
+
+    def add_second_filter(self):
+        filter_node = Node(dict(GOOD_NODES["filter_node"], node_id="8", options={"items": ["key"], "axis": "columns"}))
+        self.workflow.update_or_add_node(filter_node)
+
+        self.workflow.remove_edge(self.workflow.get_node("4"), self.workflow.get_node("2"))
+        self.workflow.add_edge(self.workflow.get_node("4"), filter_node)
+        self.workflow.add_edge(filter_node, self.workflow.get_node("2"))
+
+    def test_fused_plan(self):
+        self.add_second_filter()
+        order = self.workflow.execution_order()
+
+        self.assertEqual(self.workflow.execution_plan(order, fuse=True), [["1", "4", "8"], ["2"]])
+
+    def test_fused_output_matches(self):
+        self.add_second_filter()
+        self.assertDictEqual(self.workflow.execute_all(), {})
+        expected = self.workflow.retrieve_node_data(self.workflow.get_node("8"))
+
+        self.assertDictEqual(self.workflow.execute_all(fuse=True), {})
+        pd.testing.assert_frame_equal(self.workflow.retrieve_node_data(self.workflow.get_node("8")), expected)
+
+        # Only the end of the chain keeps its output
+        self.assertIsNone(self.workflow.get_node("1").data)
+        self.assertIsNone(self.workflow.get_node("4").data)
+        self.assertEqual(self.workflow.stale_nodes(), [])
+
+        # Inspecting a fused Node re-executes it
+        self.assertDictEqual(self.workflow.execute_to("4"), {})
+        self.assertIsNotNone(self.workflow.get_node("4").data)
+
+    def test_fused_chain_uses_cache(self):
+        self.add_second_filter()
+        self.workflow.execute_all(fuse=True)
+        misses = self.workflow.cache.misses
+
+        # The whole chain is loaded from the end's cache entry
+        self.assertDictEqual(self.workflow.execute_all(fuse=True), {})
+        self.assertEqual(self.workflow.cache.misses, misses)
+
+    def test_fused_error_reports_node(self):
+        self.add_second_filter()
+        filter_node = self.workflow.get_node("8")
+        filter_node.option_values["axis"] = "foobar"
+        self.workflow.update_or_add_node(filter_node)
+
+        errors = self.workflow.execute_all(fuse=True)
+
+        self.assertEqual(errors["8"].action, "filter")
+        self.assertListEqual(sorted(errors), ["1", "2", "4", "8"])
+
+    def test_retrieve_node_page(self):
+        self.workflow.execute_all()
+        page = self.workflow.retrieve_node_page(self.workflow.get_node("1"), offset=4, limit=10, columns=["key"])
+
+        self.assertDictEqual(page["data"], {"key": {"4": "K4", "5": "K5"}})
+        self.assertEqual(page["total_rows"], 6)
+        self.assertListEqual(page["columns"], ["Unnamed: 0", "key", "A"])
+
+        with self.assertRaises(WorkflowException):
+            self.workflow.retrieve_node_page(self.workflow.get_node("1"), columns=["foobar"])
+
+    def test_column_pushdown(self):
+        nodes = [self.workflow.get_node("1"), self.workflow.get_node("4")]
+        read_options = self.workflow.execution_steps(nodes)[0][1]
+
+        self.assertDictEqual(read_options["column_filter"].get_value(), {"items": ["key"]})
+        self.assertListEqual(list(nodes[0].execute([], read_options).columns), ["key"])
+
+    def test_row_pushdown(self):
+        filter_node = self.workflow.get_node("4")
+        filter_node.option_values = {"items": [0, 2], "axis": "index"}
+        self.workflow.update_or_add_node(filter_node)
+
+        self.assertDictEqual(self.workflow.execute_all(), {})
+        expected = self.read_output()
+
+        for options in [dict(fuse=True), dict(chunksize=4)]:
+            self.assertDictEqual(self.workflow.execute_all(**options), {})
+            pd.testing.assert_frame_equal(self.read_output(), expected)
+
+        self.assertEqual(len(expected), 2)
+
+    def test_filter_items_string(self):
+        filter_node = self.workflow.get_node("4")
+        filter_node.option_values["items"] = "key, A"
+
+        options = filter_node.get_execution_options(self.workflow, dict())
+        self.assertDictEqual(filter_node.pushdown(options), {"column_filter": {"items": ["key", "A"]}})
+
+    def test_write_empty_stream(self):
+        write_node = self.workflow.get_node("2")
+        options = write_node.get_execution_options(self.workflow, dict())
+
+        with open(os.path.join(self.root_dir, "out.csv"), "w") as f:
+            f.write("old output\n")
+
+        chunks = list(write_node.execute_stream([iter([])], options, 2))
+
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].empty)
+
+        # Previous output is replaced
+        with open(os.path.join(self.root_dir, "out.csv")) as f:
+            self.assertEqual(f.read().strip(), "")
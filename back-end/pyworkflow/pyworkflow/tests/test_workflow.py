@@ -1,5 +1,7 @@
 import unittest
 import os
+import shutil
+import tempfile
 from pyworkflow import Workflow, WorkflowException, Node, NodeException, node_factory
 import networkx as nx
 
@@ -120,6 +122,11 @@ class WorkflowTestCase(unittest.TestCase):
     # Node operations
     ##########################
     def test_add_custom_node(self):
+        # Not the packaged custom_nodes directory, so the file isn't shipped
+        node_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, node_dir)
+        self.workflow = Workflow("Untitled", root_dir="/tmp", node_dir=node_dir)
+
         with open(self.workflow.node_path('custom_nodes', 'good_custom_node.py'), 'w') as f:
             f.write((DATA_FILES['good_custom_node']))
 
@@ -237,6 +244,7 @@ class WorkflowTestCase(unittest.TestCase):
         file = self.workflow.download_file("1")
 
         self.assertEqual(file.name, "/tmp/sample1.csv")
+        self.assertEqual(file.mode, "rb")
         file.close()
 
     def test_download_file_error(self):
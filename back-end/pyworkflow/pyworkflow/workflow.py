@@ -1,17 +1,23 @@
+import hashlib
 import inspect
 import importlib
 import json
 import os
 import networkx as nx
 import sys
+import threading
+import time
 
 from collections import OrderedDict
-from modulefinder import ModuleFinder
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-from pyworkflow.nodes import ReadCsvNode, WriteCsvNode
-
-from .node import Node, NodeException
+from .node import Node, ManipulationNode, NodeException
+from .parameters import Parameter
 from .node_factory import node_factory
+from .registry import node_registry
+from .store import MemoryResultStore
+from .metrics import NodeMetrics, measure_stream
+from .cache import ExecutionCache
 
 
 class Workflow:
@@ -23,20 +29,35 @@ class Workflow:
         node_dir: Location of custom nodes
         graph: A NetworkX Directed Graph
         flow_vars: Global flow variables associated with workflow
+        store: ResultStore used to save/load Node output
+        cache: ExecutionCache used to skip re-executing unchanged Nodes, or
+            None to execute every Node
+        version: Counter incremented each time the Workflow is modified
     """
 
     DEFAULT_ROOT_PATH = os.getcwd()
     DEFAULT_NODE_PATH = os.path.join(os.getcwd(), '../pyworkflow/pyworkflow/nodes')
+    CACHE_DIR_NAME = '.pyworkflow_cache'
+    UPLOAD_CHUNK_SIZE = 64 * 1024
 
     def __init__(self, name="Untitled", root_dir=DEFAULT_ROOT_PATH,
                  node_dir=DEFAULT_NODE_PATH, graph=nx.DiGraph(),
-                 flow_vars=nx.Graph()):
+                 flow_vars=nx.Graph(), store=None, cache=None):
         try:
             self._name = name
             self._root_dir = WorkflowUtils.set_dir(root_dir)
             self._node_dir = WorkflowUtils.set_dir(node_dir, custom_nodes=True)
             self._graph = graph
             self._flow_vars = flow_vars
+            self._store = store or MemoryResultStore(self._root_dir)
+            self._cache = cache
+            self._version = 0
+
+            # Node instances built from each graph, by node_id
+            self._nodes = dict()
+            self._flow_var_nodes = dict()
+
+            self._hooks = list()
         except OSError as e:
             raise WorkflowException('init workflow', str(e))
 
@@ -50,6 +71,7 @@ class Workflow:
     @name.setter
     def name(self, name: str):
         self._name = name
+        self.changed()
 
     @property
     def root_dir(self):
@@ -67,6 +89,69 @@ class Workflow:
     def flow_vars(self):
         return self._flow_vars
 
+    @property
+    def store(self):
+        return self._store
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def version(self):
+        return self._version
+
+    def changed(self):
+        """Record a modification, e.g. to tell if the Workflow needs saving."""
+        self._version += 1
+
+    def add_hook(self, hook):
+        """Call an ExecutionHook before and after each Node executes."""
+        if hook not in self._hooks:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self._hooks.remove(hook)
+
+    def before_node(self, node):
+        for hook in self._hooks:
+            hook.before_node(self, node)
+
+    def record_metrics(self, node, metrics, error=None):
+        """Save the metrics of a Node's execution, and pass them to the hooks.
+
+        Metrics are kept in the graph, with other execution state of the
+        Node, until it is executed again.
+
+        Args:
+            node: The executed Node.
+            metrics: NodeMetrics of the execution.
+            error: The exception raised executing the Node, or None.
+        """
+        metrics.stop(error)
+        self.graph.nodes[node.node_id]['metrics'] = metrics.to_json()
+
+        for hook in self._hooks:
+            hook.after_node(self, node, metrics, error)
+
+    def node_metrics(self, node_id):
+        """Retrieve the metrics of a Node's last execution.
+
+        Args:
+            node_id: The Node to look up.
+
+        Returns:
+            dict of the Node's metrics, or None if the Node was not executed
+            since its options were last changed
+
+        Raises:
+            WorkflowException: the Node does not exist
+        """
+        if node_id not in self.graph.nodes:
+            raise WorkflowException('retrieve metrics', 'The workflow does not contain node %s' % node_id)
+
+        return self.graph.nodes[node_id].get('metrics')
+
     @property
     def filename(self):
         return self.name + '.json'
@@ -111,6 +196,8 @@ class Workflow:
             raise WorkflowException('add_node', 'Edge between nodes already exists.')
 
         self.graph.add_edge(from_id, to_id)
+        self.mark_stale(to_id)
+        self.changed()
 
         return (from_id, to_id)
 
@@ -131,6 +218,9 @@ class Workflow:
         except nx.NetworkXError:
             raise WorkflowException('remove_edge', 'Edge from %s to %s does not exist in graph.' % (from_id, to_id))
 
+        self.mark_stale(to_id)
+        self.changed()
+
         return (from_id, to_id)
 
     ##################
@@ -167,11 +257,7 @@ class Workflow:
         Return:
             FlowNode object, if one exists. Otherwise, None.
         """
-        if self.flow_vars.has_node(node_id) is not True:
-            return None
-
-        node_info = self.flow_vars.nodes[node_id]
-        return node_factory(node_info)
+        return self.cached_node(self.flow_vars, self._flow_var_nodes, node_id)
 
     def get_node(self, node_id):
         """Retrieves Node from workflow, if exists
@@ -179,11 +265,41 @@ class Workflow:
         Return:
             Node object, if one exists. Otherwise, None.
         """
-        if self.graph.has_node(node_id) is not True:
+        return self.cached_node(self.graph, self._nodes, node_id)
+
+    def cached_node(self, graph, nodes, node_id):
+        """Retrieve a copy of a Node, building it only on first use.
+
+        The cached instance is discarded when the Node is updated or removed,
+        via `uncache_node()`.
+
+        Args:
+            graph: The graph containing the Node
+            nodes: dict of cached Node instances for `graph`
+            node_id: The Node to retrieve
+
+        Return:
+            Node object, if one exists. Otherwise, None.
+        """
+        if graph.has_node(node_id) is not True:
             return None
 
-        node_info = self.graph.nodes[node_id]
-        return node_factory(node_info)
+        node = nodes.get(node_id)
+        if node is None:
+            node = node_factory(graph.nodes[node_id])
+
+            if node is None:
+                return None
+
+            nodes[node_id] = node
+
+        # Callers may change the Node before saving it; don't share changes
+        return node.copy()
+
+    def uncache_node(self, node_id, is_global=False):
+        """Discard the cached instance of a Node, after its info changed."""
+        nodes = self._flow_var_nodes if is_global else self._nodes
+        nodes.pop(node_id, None)
 
     def get_node_predecessors(self, node_id):
         try:
@@ -208,6 +324,10 @@ class Workflow:
         directories. Any custom nodes that the user has installed are included
         in this search, given they are located in the 'custom_nodes' directory.
 
+        Node files are only parsed again if they changed since the last
+        search; see `NodeRegistry`. Nodes that other packages register
+        through entry points are added to the list of their `node_type`.
+
         Args:
             root_path: Root location where Nodes are defined.
             node_type: The type of Node, defined by sub-directory name.
@@ -253,9 +373,18 @@ class Workflow:
             if node == '__init__' or ext != '.py':
                 continue
 
-            nodes.append(WorkflowUtils.extract_node_info(node_type, node, file_path))
+            nodes.append(node_registry.node_info(node_type, node, file_path))
 
         if root_path == self.node_dir:
+            # Add Nodes installed by other packages to their type
+            for plugin_type, node_key in node_registry.plugin_nodes():
+                klass = node_registry.node_class(plugin_type, node_key)
+
+                if klass is not None:
+                    display_name = WorkflowUtils.get_display_name(plugin_type)
+                    info = WorkflowUtils.node_class_info(klass, plugin_type, klass.__module__)
+                    data.setdefault(display_name, []).append(info)
+
             # When traversal returns to `node_dir` return the entire OrderedDict()
             data.move_to_end('Custom Nodes')
             return data
@@ -273,7 +402,16 @@ class Workflow:
             # Select the correct graph to modify
             graph = self.flow_vars if node.is_global else self.graph
 
+            # Nodes that used this Node's output or value are now out of date
+            if node.is_global:
+                self.mark_flow_var_consumers_stale(node.node_id)
+            else:
+                for successor in self.get_node_successors(node.node_id):
+                    self.mark_stale(successor)
+
             graph.remove_node(node.node_id)
+            self.uncache_node(node.node_id, node.is_global)
+            self.changed()
             return node
         except (AttributeError, nx.NetworkXError):
             raise WorkflowException('remove_node', 'Node does not exist in graph.')
@@ -289,6 +427,14 @@ class Workflow:
 
         if graph.has_node(node.node_id) is False:
             graph.add_node(node.node_id)
+        elif (graph.nodes[node.node_id].get('options') != node.option_values
+              or graph.nodes[node.node_id].get('option_replace') != node.option_replace):
+            # Configuration changed; any previous output is out of date
+            if node.is_global:
+                self.mark_flow_var_consumers_stale(node.node_id)
+            else:
+                self.mark_stale(node.node_id)
+                graph.nodes[node.node_id].pop('metrics', None)
 
         # NetworkX cannot store mutable data, so iterate through all Node
         # attributes to add to graph
@@ -299,6 +445,8 @@ class Workflow:
                 out_key = "options"
             graph.nodes[node.node_id][out_key] = node_dict[key]
 
+        self.uncache_node(node.node_id, node.is_global)
+        self.changed()
         return node
 
     ####################
@@ -309,8 +457,13 @@ class Workflow:
 
         Reads any stored data from preceding Nodes and passes in to
         'node_to_execute` as a list(). After execution, the new/updated
-        DataFrame is returned as a JSON object that is written to a new
-        file, with the file name saved to the executed Node.
+        DataFrame is saved to the Workflow's ResultStore, with the entry name
+        saved to the executed Node. Call `flush_node_data()` to make sure the
+        output has been written to disk.
+
+        If the Node, its options, and its input data are unchanged since a
+        previous execution, the output is loaded from the ExecutionCache
+        instead of calling the Node's `execute()` method.
 
         Returns:
             Executed Node object
@@ -321,28 +474,736 @@ class Workflow:
         if node_to_execute is None:
             raise WorkflowException('execute', 'The workflow does not contain node %s' % node_id)
 
-        # Load predecessor data and FlowNode values
-        preceding_data = self.load_input_data(node_to_execute.node_id)
-        flow_nodes = self.load_flow_nodes(node_to_execute.option_replace)
+        metrics = NodeMetrics(node_id)
+        self.before_node(node_to_execute)
 
         try:
+            # Load predecessor data and FlowNode values
+            with metrics.timer('load_input'):
+                preceding_data = self.load_input_data(node_to_execute.node_id)
+                flow_nodes = self.load_flow_nodes(node_to_execute.option_replace)
+
+            for data in preceding_data:
+                metrics.count_data('in', data)
+
             # Validate input data, and replace flow variables
             node_to_execute.validate_input_data(len(preceding_data))
             execution_options = node_to_execute.get_execution_options(self, flow_nodes)
+            cache_key = self.get_cache_key(node_to_execute, execution_options)
+
+            output = self.cache.get(cache_key) if cache_key is not None else None
+
+            if output is None:
+                # Pass in data to current Node to use in execution
+                with metrics.timer('execute'):
+                    output = node_to_execute.execute(preceding_data, execution_options)
+
+                if cache_key is not None:
+                    self.cache.put(cache_key, output)
+            else:
+                metrics.count('cache_hits')
 
-            # Pass in data to current Node to use in execution
-            output = node_to_execute.execute(preceding_data, execution_options)
+            metrics.count_data('out', output)
 
-            # Save new execution data to disk
-            node_to_execute.data = Workflow.store_node_data(self, node_id, output)
-        except NodeException as e:
+            # Descendants hash this Node's output by how it was produced
+            previous_hash = self.graph.nodes[node_id].get('data_hash')
+            self.graph.nodes[node_id]['data_hash'] = cache_key
+
+            # Save new execution data to the ResultStore
+            with metrics.timer('store'):
+                node_to_execute.data = Workflow.store_node_data(self, node_id, output)
+
+            if node_to_execute.data is None and node_to_execute.node_type != "flow_control":
+                raise WorkflowException('execute', 'There was a problem saving node output.')
+        except (NodeException, WorkflowException) as e:
+            self.record_metrics(node_to_execute, metrics, e)
             raise e
+        except Exception as e:
+            # e.g., a bug in the Node; reported like any other failed Node
+            error = WorkflowException('execute', str(e))
+            self.record_metrics(node_to_execute, metrics, error)
+            raise error from e
+
+        self.record_metrics(node_to_execute, metrics)
+
+        # Descendants are only out of date if the output may have changed
+        if cache_key is None or cache_key != previous_hash:
+            for successor in self.get_node_successors(node_id):
+                self.mark_stale(successor)
 
-        if node_to_execute.data is None and node_to_execute.node_type != "flow_control":
-            raise WorkflowException('execute', 'There was a problem saving node output.')
+        self.graph.nodes[node_id]['stale'] = False
 
         return node_to_execute
 
+    def get_cache_key(self, node, execution_options):
+        """Hash a Node execution for the ExecutionCache.
+
+        Input data is identified by the key that produced it, stored in the
+        graph as each predecessor's 'data_hash'.
+
+        Returns:
+            Hex digest, or None if the execution should not be cached.
+        """
+        if self.cache is None or not (node.is_cacheable() and node.use_cache):
+            return None
+
+        input_hashes = list()
+        for predecessor_id in self.get_node_predecessors(node.node_id):
+            predecessor = self.graph.nodes[predecessor_id]
+
+            if predecessor.get('node_type') != 'flow_control':
+                input_hashes.append(predecessor.get('data_hash'))
+
+        return ExecutionCache.make_key(node, execution_options, input_hashes)
+
+    def execute_all(self, max_workers=None, chunksize=None, fuse=False):
+        """Execute every Node in the graph.
+
+        Independent branches of the graph are run concurrently; see
+        `execute_nodes()` for details.
+
+        Args:
+            max_workers: Maximum number of Nodes to execute at once.
+            chunksize: If set, stream chains of row-wise Nodes in chunks of
+                this many rows. See `execute_stream()`.
+            fuse: If True, run chains of ManipulationNodes as one step
+                without storing intermediate output. See `execute_fused()`.
+
+        Returns:
+            dict of exceptions raised during execution, indexed by node_id.
+        """
+        return self.execute_nodes(self.execution_order(), max_workers, chunksize, fuse)
+
+    def execute_nodes(self, node_ids, max_workers=None, chunksize=None, fuse=False,
+                      on_task_done=None, cancel=None):
+        """Execute a set of Nodes, running each as soon as its inputs are ready.
+
+        The Nodes are split into tasks by `execution_plan()`. Each task is
+        submitted to a thread pool once every predecessor that is part of
+        `node_ids` has finished executing. Executed Nodes are saved back to
+        the graph as they complete. If a Node fails, its exception is
+        recorded and any of its descendants in `node_ids` are skipped.
+        Exceptions other than NodeException are recorded as a
+        WorkflowException, so one broken Node does not stop the others.
+
+        Args:
+            node_ids: The Nodes to execute.
+            max_workers: Maximum number of tasks to execute at once. Defaults
+                to the ThreadPoolExecutor default.
+            chunksize: If set, stream chains of row-wise Nodes in chunks of
+                this many rows.
+            fuse: If True, fuse chains of ManipulationNodes.
+            on_task_done: Optional function called as each task finishes,
+                with the list of node_ids in the task, the time taken in
+                seconds, and the exception raised (or None).
+            cancel: Optional object with an `is_set()` method, such as a
+                threading.Event. Once set, no more tasks are started, and
+                any Nodes not yet started are recorded as cancelled.
+
+        Returns:
+            dict of exceptions raised during execution, indexed by node_id.
+            Empty if all Nodes executed successfully.
+        """
+        to_execute = set(node_ids)
+        order = [node_id for node_id in self.execution_order() if node_id in to_execute]
+
+        # Tasks are referenced by the id of their first Node
+        tasks = OrderedDict((task[0], task) for task in self.execution_plan(order, chunksize, fuse))
+        task_of = {node_id: head for head, task in tasks.items() for node_id in task}
+
+        # Tasks each task is still waiting on before it can be submitted
+        waiting_on = dict()
+        for head, task in tasks.items():
+            waiting_on[head] = {
+                task_of[p] for node_id in task for p in self.get_node_predecessors(node_id)
+                if p in task_of and task_of[p] != head
+            }
+
+        errors = dict()
+        durations = dict()
+
+        def timed_task(task):
+            start = time.perf_counter()
+            try:
+                return self.execute_task(task, chunksize)
+            finally:
+                durations[task[0]] = time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = dict()
+
+            def submit_ready():
+                if cancel is not None and cancel.is_set():
+                    for waiting_head in list(waiting_on):
+                        for cancelled_id in tasks.pop(waiting_head):
+                            errors[cancelled_id] = WorkflowException(
+                                'execute', 'Node %s was cancelled.' % cancelled_id
+                            )
+                        del waiting_on[waiting_head]
+                    return
+
+                for head in tasks:
+                    if head in waiting_on and not waiting_on[head]:
+                        del waiting_on[head]
+                        running[executor.submit(timed_task, tasks[head])] = head
+
+            submit_ready()
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    head = running.pop(future)
+
+                    try:
+                        for executed_node in future.result():
+                            self.update_or_add_node(executed_node)
+                    except Exception as e:
+                        if not isinstance(e, (NodeException, WorkflowException)):
+                            # Unexpected errors fail the task, not the whole run
+                            error = WorkflowException('execute', str(e))
+                            error.node_id = head
+                            error.__cause__ = e
+                            e = error
+
+                        failed_id = getattr(e, 'node_id', None) or head
+                        errors[failed_id] = e
+
+                        if on_task_done is not None:
+                            on_task_done(tasks[head], durations[head], e)
+
+                        # Nothing downstream of a failed Node can run
+                        descendants = nx.descendants(self.graph, failed_id)
+                        skipped = [n for n in tasks[head] if n != failed_id]
+                        for waiting_head in list(waiting_on):
+                            if descendants.intersection(tasks[waiting_head]):
+                                del waiting_on[waiting_head]
+                                skipped.extend(tasks[waiting_head])
+
+                        for skipped_id in skipped:
+                            errors[skipped_id] = WorkflowException(
+                                'execute',
+                                'Node %s was skipped because node %s failed.' % (skipped_id, failed_id)
+                            )
+                        continue
+
+                    if on_task_done is not None:
+                        on_task_done(tasks[head], durations[head], None)
+
+                    for waiting_head in waiting_on:
+                        waiting_on[waiting_head].discard(head)
+
+                submit_ready()
+
+        self.flush_node_data()
+        return errors
+
+    def execute_task(self, task, chunksize=None):
+        """Execute one task from `execution_plan()`.
+
+        Returns:
+            list of executed Node objects
+        """
+        if len(task) == 1:
+            return [self.execute(task[0])]
+
+        nodes = [self.get_node(node_id) for node_id in task]
+
+        if chunksize is not None and nodes[0].num_in == 0 and all(node.streamable for node in nodes):
+            return self.execute_stream(task, chunksize)
+
+        return self.execute_fused(task)
+
+    def execution_plan(self, node_ids, chunksize=None, fuse=False):
+        """Group Nodes into the tasks used by `execute_nodes()`.
+
+        Each Node is normally its own task. Linear chains of Nodes are
+        grouped into a single task, where each Node after the first has the
+        previous Node as its only input, and the previous Node has no other
+        consumers.
+
+        When a `chunksize` is given, chains of streamable Nodes (see
+        `Node.streamable`) starting at a Node with no inputs are streamed by
+        `execute_stream()`. When `fuse` is True, chains of ManipulationNodes
+        are run as one step by `execute_fused()`; a Node that accepts
+        pushdown (see `Node.accepts_pushdown`) may start the chain.
+
+        Args:
+            node_ids: The Nodes to execute, in execution order.
+            chunksize: Rows per chunk when streaming, or None to disable.
+            fuse: True to fuse chains of ManipulationNodes.
+
+        Returns:
+            list of tasks, in execution order. Each task is a list of node_ids.
+        """
+        tasks = list()
+        planned = set()
+
+        for node_id in node_ids:
+            if node_id in planned:
+                continue
+
+            node = self.get_node(node_id)
+            task = [node_id]
+
+            if chunksize is not None and node.streamable and node.num_in == 0:
+                task = self.linear_chain(node_id, node_ids, lambda n: n.streamable)
+
+            if len(task) == 1 and fuse and (isinstance(node, ManipulationNode) or node.accepts_pushdown):
+                task = self.linear_chain(node_id, node_ids, lambda n: isinstance(n, ManipulationNode))
+
+            planned.update(task)
+            tasks.append(task)
+
+        return tasks
+
+    def linear_chain(self, node_id, node_ids, can_join):
+        """Find the linear chain of Nodes starting at `node_id`.
+
+        Args:
+            node_id: The first Node in the chain.
+            node_ids: The Nodes that may be part of the chain.
+            can_join: Function that returns True if a Node may be added.
+
+        Returns:
+            list of node_ids in the chain; just `node_id` if there is none.
+        """
+        chain = [node_id]
+
+        while True:
+            successors = [s for s in self.get_node_successors(chain[-1])
+                          if self.graph.nodes[s].get('node_type') != 'flow_control']
+
+            if len(successors) != 1 or successors[0] not in node_ids:
+                break
+
+            successor = self.get_node(successors[0])
+            inputs = [p for p in self.get_node_predecessors(successor.node_id)
+                      if self.graph.nodes[p].get('node_type') != 'flow_control']
+
+            if not can_join(successor) or inputs != [chain[-1]]:
+                break
+
+            chain.append(successor.node_id)
+
+        return chain
+
+    def execution_steps(self, nodes):
+        """Load the execution options for each Node in a chain.
+
+        If the first Node accepts pushdown (see `Node.accepts_pushdown`),
+        the second Node's `pushdown()` result is added to the first Node's
+        options, so it can skip reading data the chain never uses.
+
+        Returns:
+            list of (Node, execution options) tuples
+
+        Raises:
+            NodeException/WorkflowException: with a `node_id` attribute set
+                to the Node that raised it.
+        """
+        steps = list()
+
+        for node in nodes:
+            try:
+                flow_nodes = self.load_flow_nodes(node.option_replace)
+                steps.append((node, node.get_execution_options(self, flow_nodes)))
+            except (NodeException, WorkflowException) as e:
+                e.node_id = node.node_id
+                raise e
+
+        if len(steps) > 1 and steps[0][0].accepts_pushdown:
+            consumer, consumer_options = steps[1]
+
+            for key, value in consumer.pushdown(consumer_options).items():
+                steps[0][1][key] = Parameter(key, default=value)
+
+        return steps
+
+    def execute_fused(self, node_ids):
+        """Execute a fused chain of Nodes as one step.
+
+        The first Node's input is loaded as usual, then each Node's output
+        DataFrame is passed straight to the next Node. Only the last Node's
+        output is stored, so the Nodes inside the chain are left without
+        data; they are re-executed if their output is needed later.
+
+        If the last Node's output is in the ExecutionCache, no Node in the
+        chain is executed.
+
+        Args:
+            node_ids: The chain of Nodes, from `linear_chain()`.
+
+        Returns:
+            list of executed Node objects
+
+        Raises:
+            NodeException/WorkflowException: with a `node_id` attribute set
+                to the Node that raised it.
+        """
+        nodes = [self.get_node(node_id) for node_id in node_ids]
+        last_node = nodes[-1]
+        previous_hash = self.graph.nodes[last_node.node_id].get('data_hash')
+        steps = self.execution_steps(nodes)
+        metrics = {node.node_id: NodeMetrics(node.node_id, node_ids) for node in nodes}
+
+        try:
+            for current_node, execution_options in steps:
+                # Keys chain through the 'data_hash' of each previous Node
+                cache_key = self.get_cache_key(current_node, execution_options)
+                self.graph.nodes[current_node.node_id]['data_hash'] = cache_key
+
+            output = self.cache.get(cache_key) if cache_key is not None else None
+
+            if output is None:
+                current_node = nodes[0]
+                self.before_node(current_node)
+
+                with metrics[current_node.node_id].timer('load_input'):
+                    output = self.load_input_data(current_node.node_id)
+
+                for data in output:
+                    metrics[current_node.node_id].count_data('in', data)
+
+                current_node.validate_input_data(len(output))
+
+                for current_node, execution_options in steps:
+                    node_metrics = metrics[current_node.node_id]
+
+                    if current_node is not nodes[0]:
+                        self.before_node(current_node)
+                        node_metrics.count_input(previous_metrics)
+
+                    predecessor_data = output if current_node is nodes[0] else [output]
+
+                    with node_metrics.timer('execute'):
+                        output = current_node.execute(predecessor_data, execution_options)
+
+                    node_metrics.count_data('out', output)
+                    previous_metrics = node_metrics
+
+                    if current_node is not last_node:
+                        self.record_metrics(current_node, node_metrics)
+
+                if cache_key is not None:
+                    self.cache.put(cache_key, output)
+            else:
+                # The whole chain is loaded from the cache
+                for current_node in nodes:
+                    self.before_node(current_node)
+                    metrics[current_node.node_id].count('cache_hits')
+
+                    if current_node is not last_node:
+                        self.record_metrics(current_node, metrics[current_node.node_id])
+
+                metrics[last_node.node_id].count_data('out', output)
+        except Exception as e:
+            for node in nodes:
+                self.graph.nodes[node.node_id]['data_hash'] = None
+
+            error = e
+            if not isinstance(e, (NodeException, WorkflowException)):
+                # e.g., a bug in the Node; reported like any other failed Node
+                error = WorkflowException('execute', str(e))
+                error.__cause__ = e
+
+            error.node_id = current_node.node_id
+            self.record_metrics(current_node, metrics[current_node.node_id], error)
+            raise error
+
+        for node in nodes[:-1]:
+            node.data = None
+            self.graph.nodes[node.node_id]['stale'] = False
+
+        try:
+            with metrics[last_node.node_id].timer('store'):
+                last_node.data = Workflow.store_node_data(self, last_node.node_id, output)
+
+            if last_node.data is None:
+                raise WorkflowException('execute', 'There was a problem saving node output.')
+        except WorkflowException as e:
+            e.node_id = last_node.node_id
+            self.record_metrics(last_node, metrics[last_node.node_id], e)
+            raise e
+
+        self.record_metrics(last_node, metrics[last_node.node_id])
+
+        if cache_key is None or cache_key != previous_hash:
+            for successor in self.get_node_successors(last_node.node_id):
+                self.mark_stale(successor)
+
+        self.graph.nodes[last_node.node_id]['stale'] = False
+
+        return nodes
+
+    def execute_stream(self, node_ids, chunksize):
+        """Execute a chain of streamable Nodes chunk by chunk.
+
+        The first Node produces an iterator of DataFrame chunks, each
+        containing up to `chunksize` rows. Every following Node transforms
+        the chunks of the Node before it, so only a few chunks are held in
+        memory at once.
+
+        Output is not stored for Nodes inside the chain. The last Node's
+        output is stored in full only if it has an output port for other
+        Nodes to read from.
+
+        Args:
+            node_ids: The chain of Nodes, from `linear_chain()`.
+            chunksize: Number of rows per chunk.
+
+        Returns:
+            list of executed Node objects
+
+        Raises:
+            NodeException/WorkflowException: with a `node_id` attribute set
+                to the Node that raised it.
+        """
+        nodes = [self.get_node(node_id) for node_id in node_ids]
+        metrics = [NodeMetrics(node_id, node_ids) for node_id in node_ids]
+        chunks = None
+
+        for (node, execution_options), node_metrics in zip(self.execution_steps(nodes), metrics):
+            predecessor_chunks = [] if chunks is None else [chunks]
+            chunks = WorkflowUtils.tag_stream_errors(
+                node.node_id,
+                node.execute_stream(predecessor_chunks, execution_options, chunksize)
+            )
+            chunks = measure_stream(chunks, node_metrics)
+
+        for node in nodes:
+            self.before_node(node)
+
+        # Pull chunks through the whole chain
+        output = list()
+        try:
+            for chunk in chunks:
+                if nodes[-1].num_out > 0:
+                    output.append(chunk)
+        except (NodeException, WorkflowException) as e:
+            failed = nodes[node_ids.index(e.node_id)]
+            self.record_metrics(failed, metrics[node_ids.index(e.node_id)], e)
+            raise e
+
+        # Each Node's time includes pulling chunks through the Nodes before it
+        for i in reversed(range(1, len(nodes))):
+            metrics[i].add_time('execute', -metrics[i - 1].timers.get('execute', 0))
+            metrics[i].count_input(metrics[i - 1])
+
+        for node in nodes:
+            node.data = None
+            self.graph.nodes[node.node_id]['data_hash'] = None
+            self.graph.nodes[node.node_id]['stale'] = False
+
+        last_node = nodes[-1]
+        if last_node.num_out > 0:
+            import pandas as pd
+            data = pd.concat(output) if output else pd.DataFrame()
+
+            try:
+                with metrics[-1].timer('store'):
+                    last_node.data = Workflow.store_node_data(self, last_node.node_id, data)
+
+                if last_node.data is None:
+                    raise WorkflowException('execute', 'There was a problem saving node output.')
+            except WorkflowException as e:
+                e.node_id = last_node.node_id
+                self.record_metrics(last_node, metrics[-1], e)
+                raise e
+
+        for node, node_metrics in zip(nodes, metrics):
+            self.record_metrics(node, node_metrics)
+
+        for successor in self.get_node_successors(last_node.node_id):
+            self.mark_stale(successor)
+
+        return nodes
+
+    def execute_to(self, node_id, max_workers=None):
+        """Execute a Node, along with any ancestors needed to produce its input.
+
+        See `ancestors_to_execute()`; Nodes are run as described in
+        `execute_nodes()`.
+
+        Returns:
+            dict of exceptions raised during execution, indexed by node_id.
+        """
+        return self.execute_nodes(self.ancestors_to_execute(node_id), max_workers)
+
+    def ancestors_to_execute(self, node_id):
+        """Find the minimal set of Nodes to run in order to execute a Node.
+
+        Walks backwards from `node_id`. Predecessors with up-to-date output
+        are loaded as-is, so the walk stops there; any other predecessor must
+        be executed as well, along with its own out-of-date predecessors.
+
+        Args:
+            node_id: The Node to execute.
+
+        Returns:
+            list of node_ids, in execution order, ending with `node_id`.
+
+        Raises:
+            WorkflowException: the workflow does not contain `node_id`
+        """
+        if not self.graph.has_node(node_id):
+            raise WorkflowException('execute', 'The workflow does not contain node %s' % node_id)
+
+        to_execute = set()
+        to_visit = [node_id]
+
+        while to_visit:
+            current = to_visit.pop()
+
+            if current in to_execute:
+                continue
+
+            to_execute.add(current)
+
+            for predecessor_id in self.get_node_predecessors(current):
+                if self.needs_execution(predecessor_id):
+                    to_visit.append(predecessor_id)
+
+        return [n for n in self.execution_order() if n in to_execute]
+
+    def needs_execution(self, node_id):
+        """Check whether a Node's output is unavailable or out of date."""
+        node_info = self.graph.nodes[node_id]
+
+        if node_info.get('node_type') != 'flow_control' and node_info.get('data') is None:
+            return True
+
+        return self.is_stale(node_id)
+
+    def execute_stale(self, max_workers=None):
+        """Execute only the Nodes whose output is out of date.
+
+        See `stale_nodes()`; Nodes are run as described in `execute_nodes()`.
+
+        Returns:
+            dict of exceptions raised during execution, indexed by node_id.
+        """
+        return self.execute_nodes(self.stale_nodes(), max_workers)
+
+    def is_stale(self, node_id):
+        """Check whether a Node needs to be (re-)executed.
+
+        A Node is stale if it has never been executed, or if its options, its
+        incoming edges, or any Node upstream of it changed since it was last
+        executed.
+        """
+        return self.graph.nodes[node_id].get('stale', True)
+
+    def mark_stale(self, node_id):
+        """Mark a Node, and every Node downstream of it, as stale."""
+        if not self.graph.has_node(node_id):
+            return
+
+        for stale_id in nx.descendants(self.graph, node_id) | {node_id}:
+            self.graph.nodes[stale_id]['stale'] = True
+
+        self.changed()
+
+    def mark_flow_var_consumers_stale(self, flow_var_id):
+        """Mark Nodes that use a global flow variable, and their descendants, as stale."""
+        for node_id, node_info in self.graph.nodes(data=True):
+            for option in (node_info.get('option_replace') or dict()).values():
+                if option.get('is_global') and option.get('node_id') == flow_var_id:
+                    self.mark_stale(node_id)
+
+    def stale_nodes(self):
+        """List stale Nodes, in execution order."""
+        return [node_id for node_id in self.execution_order() if self.is_stale(node_id)]
+
+    def export_results(self, node_ids):
+        """Describe the output of executed Nodes.
+
+        Used to copy results from one copy of a Workflow, e.g. one executed
+        in the background, to another with `import_results()`.
+
+        Args:
+            node_ids: The Nodes to export. Stale Nodes are left out.
+
+        Returns:
+            list of JSON-serializable dicts, one per Node
+        """
+        results = list()
+
+        for node_id in node_ids:
+            if not self.graph.has_node(node_id) or self.is_stale(node_id):
+                continue
+
+            results.append({
+                'node_id': node_id,
+                'data': self.graph.nodes[node_id].get('data'),
+                'data_hash': self.graph.nodes[node_id].get('data_hash'),
+                'metrics': self.graph.nodes[node_id].get('metrics'),
+                'fingerprint': self.config_fingerprint(node_id),
+            })
+
+        return results
+
+    def import_results(self, results):
+        """Apply results from `export_results()` to this Workflow.
+
+        A result is ignored if its Node, or anything the Node depends on, was
+        removed or re-configured after the results were exported.
+
+        Returns:
+            list of node_ids whose results were applied
+        """
+        applied = list()
+
+        for result in results:
+            node_id = result['node_id']
+
+            if not self.graph.has_node(node_id) or self.config_fingerprint(node_id) != result['fingerprint']:
+                continue
+
+            attributes = self.graph.nodes[node_id]
+            if result['data_hash'] is None or result['data_hash'] != attributes.get('data_hash'):
+                for successor in self.get_node_successors(node_id):
+                    self.mark_stale(successor)
+
+            # The output was written to disk by the other Workflow; don't
+            # serve an older copy this Workflow still holds in memory
+            if result['data'] is not None:
+                self.store.discard(result['data'])
+
+            attributes['data'] = result['data']
+            attributes['data_hash'] = result['data_hash']
+            attributes['metrics'] = result.get('metrics')
+            attributes['stale'] = False
+            self.uncache_node(node_id)
+            applied.append(node_id)
+
+        if applied:
+            self.changed()
+
+        return applied
+
+    def config_fingerprint(self, node_id):
+        """Hash the configuration of a Node and everything it depends on.
+
+        Covers the options and inputs of the Node and its ancestors, and all
+        global flow variables.
+
+        Returns:
+            Hex digest
+        """
+        def describe(graph, node_ids):
+            return [[
+                node_id,
+                graph.nodes[node_id].get('options'),
+                graph.nodes[node_id].get('option_replace'),
+                sorted(graph.predecessors(node_id)) if graph.is_directed() else [],
+            ] for node_id in sorted(node_ids)]
+
+        node_ids = nx.ancestors(self.graph, node_id) | {node_id}
+        config = [describe(self.graph, node_ids), describe(self.flow_vars, self.flow_vars.nodes)]
+
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
     def execution_order(self):
         try:
             return list(nx.topological_sort(self.graph))
@@ -405,7 +1266,7 @@ class Workflow:
             node_id: The Node with predecessors
 
         Returns:
-            list of dict-like DataFrames, used for Node execution
+            list of DataFrames (or dict-like data), used for Node execution
         """
         input_data = list()
 
@@ -443,7 +1304,7 @@ class Workflow:
 
             # Construct path to file in Workflow dir
             to_open = self.path(filename)
-            return open(to_open)
+            return open(to_open, 'rb')
         except KeyError:
             raise WorkflowException('download_file', '%s does not have an associated file' % node_id)
         except OSError as e:
@@ -452,76 +1313,176 @@ class Workflow:
     def retrieve_node_data(self, node_to_retrieve):
         """Retrieve Node data
 
-        Reads a saved DataFrame, referenced by the Node's 'data' attribute.
+        Loads the output referenced by the Node's 'data' attribute from the
+        Workflow's ResultStore. Output still held in memory is returned as-is,
+        without being re-read from disk.
 
         Args:
             node_to_retrieve: The Node containing a DataFrame saved to disk.
 
         Returns:
-            Contents of the file (a DataFrame) in a JSON object.
+            The stored output (a DataFrame), or the contents of the file in a
+            JSON object.
 
         Raises:
             WorkflowException: Node does not exist, file does not exist, or
                 problem parsing the file.
         """
-        try:
-            with open(self.path(node_to_retrieve.data)) as f:
-                return json.load(f)
-        except OSError as e:
-            raise WorkflowException('retrieve node data', str(e))
-        except TypeError:
+        if node_to_retrieve is None:
+            raise WorkflowException('retrieve node data', 'The workflow does not contain the requested node.')
+
+        if node_to_retrieve.data is None:
             raise WorkflowException(
                 'retrieve node data',
                 'Node %s has not yet been executed. No data to retrieve.' % node_to_retrieve.node_id
             )
+
+        try:
+            return self.store.get(node_to_retrieve.data)
+        except OSError as e:
+            raise WorkflowException('retrieve node data', str(e))
         except json.JSONDecodeError as e:
             raise WorkflowException('retrieve node data', str(e))
 
+    def retrieve_node_json(self, node_to_retrieve):
+        """Retrieve Node data in a JSON-serializable format.
+
+        DataFrames are converted to the dict-like format produced by
+        `DataFrame.to_json()`.
+        """
+        data = self.retrieve_node_data(node_to_retrieve)
+
+        if hasattr(data, 'to_json'):
+            data = data.to_json()
+
+        if isinstance(data, str):
+            return json.loads(data)
+
+        return data
+
+    def retrieve_node_page(self, node_to_retrieve, offset=0, limit=None, columns=None, sort=None):
+        """Retrieve some rows and columns of a Node's output, in a JSON-serializable format.
+
+        Only the requested part of the stored output is loaded; see
+        `ResultStore.get_page()` for the arguments.
+
+        Returns:
+            dict with the page of rows ('data', in the format of
+            `retrieve_node_json()`), the number of rows in the output
+            ('total_rows'), all of its columns ('columns'), and the
+            requested 'offset' and 'limit'
+
+        Raises:
+            WorkflowException: Node does not exist or was not executed, its
+                output is not a table, or has no such column.
+        """
+        # Reports missing Nodes and data the same way as whole retrievals
+        if node_to_retrieve is None or node_to_retrieve.data is None:
+            self.retrieve_node_data(node_to_retrieve)
+
+        try:
+            page = self.store.get_page(node_to_retrieve.data, offset, limit, columns, sort)
+        except (OSError, ValueError) as e:
+            raise WorkflowException('retrieve node data', str(e))
+
+        return {
+            'data': json.loads(page['data'].to_json()),
+            'total_rows': page['total_rows'],
+            'columns': page['columns'],
+            'offset': offset,
+            'limit': limit,
+        }
+
     @staticmethod
     def store_node_data(workflow, node_id, data):
         """Store Node data
 
-        Writes the current DataFrame to disk in JSON format.
+        Saves the output of a Node to the Workflow's ResultStore.
 
         Args:
             workflow: The Workflow that stores the graph.
             node_id: The Node which contains a DataFrame to save.
-            data: A pandas DataFrame converted to JSON.
+            data: A pandas DataFrame, or JSON data.
 
         Returns:
+            Name of the stored entry, or None if there is no data to save.
 
+        Raises:
+            WorkflowException: the data could not be serialized or written.
         """
+        if data is None:
+            return None
+
         file_name = Workflow.generate_file_name(workflow, node_id)
-        file_path = workflow.path(file_name)
 
         try:
-            with open(file_path, 'w') as f:
-                f.write(data)
+            workflow.store.put(file_name, data)
             return file_name
-        except Exception as e:
-            return None
+        except (OSError, TypeError, ValueError) as e:
+            raise WorkflowException('execute', 'There was a problem saving node output: %s' % str(e))
+
+    def flush_node_data(self):
+        """Write any Node output held in memory to disk.
+
+        Raises:
+            WorkflowException: on issue writing to disk
+        """
+        try:
+            self.store.flush()
+        except OSError as e:
+            raise WorkflowException('flush node data', str(e))
 
     @staticmethod
     def upload_file(uploaded_file, to_open):
+        """Save an uploaded file.
+
+        The file is copied a chunk at a time, under a temporary name that
+        replaces `to_open` once complete, so large uploads are not held in
+        memory and a failed upload never leaves a partial file behind.
+
+        Args:
+            uploaded_file: Django UploadedFile, or any binary file object
+            to_open: Path to save the file to
+
+        Returns:
+            The path the file was saved to
+
+        Raises:
+            WorkflowException: on issue writing to disk
+        """
+        # Unique to this thread, as the same file may be uploaded twice at once
+        tmp_path = '%s.%d-%d.tmp' % (to_open, os.getpid(), threading.get_ident())
+
+        if hasattr(uploaded_file, 'chunks'):
+            chunks = uploaded_file.chunks()
+        else:
+            chunks = iter(lambda: uploaded_file.read(Workflow.UPLOAD_CHUNK_SIZE), b'')
+
         try:
-            # TODO: Change to a stream/other method for large files?
-            with open(to_open, 'wb') as f:
-                f.write(uploaded_file.read())
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
 
-            uploaded_file.close()
+            os.replace(tmp_path, to_open)
             return to_open
         except OSError as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
             raise WorkflowException('upload_file', str(e))
+        finally:
+            uploaded_file.close()
 
     ############################
     # WORKFLOW (DE)SERIALIZATION
     ############################
     @classmethod
-    def from_json(cls, json_data):
+    def from_json(cls, json_data, cache=None):
         """Load Workflow from JSON data.
 
         Args:
             json_data: JSON-like data from session, or uploaded file
+            cache: ExecutionCache for the Workflow, or None
 
         Returns:
             New Workflow object
@@ -537,6 +1498,7 @@ class Workflow:
                 node_dir=json_data['node_dir'],
                 graph=Workflow.read_graph_json(json_data['graph']),
                 flow_vars=Workflow.read_graph_json(json_data['flow_vars']),
+                cache=cache,
             )
         except KeyError as e:
             raise WorkflowException('from_json', str(e))
@@ -623,6 +1585,24 @@ class WorkflowUtils:
 
         return dir_path
 
+    @staticmethod
+    def tag_stream_errors(node_id, chunks):
+        """Record which Node raised an exception while streaming.
+
+        Exceptions raised by an earlier Node in the chain pass through
+        unchanged, so the innermost (first failing) Node is recorded.
+        """
+        try:
+            yield from chunks
+        except (NodeException, WorkflowException) as e:
+            if getattr(e, 'node_id', None) is None:
+                e.node_id = node_id
+            raise e
+        except Exception as e:
+            e = NodeException('execute', str(e))
+            e.node_id = node_id
+            raise e
+
     @staticmethod
     def check_missing_packages(node_path):
         """Check Python file for uninstalled packages.
@@ -637,6 +1617,8 @@ class WorkflowUtils:
         Returns:
             list of package names that are not installed
         """
+        from modulefinder import ModuleFinder
+
         finder = ModuleFinder(node_path)
         finder.run_script(node_path)
 
@@ -676,32 +1658,32 @@ class WorkflowUtils:
         # Parse module for Node Class information
         for name, klass in inspect.getmembers(module):
             if inspect.isclass(klass) and klass.__module__.startswith('pyworkflow.nodes.' + node_type):
-                try:
-                    color = klass.color
-                except AttributeError:
-                    color = 'black'
-
-                parsed_node = {
-                    'name': klass.name,
-                    'node_key': klass.__name__,
-                    'node_type': node_type,
-                    'num_in': klass.num_in,
-                    'num_out': klass.num_out,
-                    'color': color,
-                    'filename': node,
-                    'doc': klass.__doc__,
-                    'options': {k: v.get_value() for k, v in klass.options.items()},
-                    'option_types': klass.option_types,
-                    'download_result': getattr(klass, "download_result", False)
-                }
-
-                # if node_type == 'custom_nodes':
-                #     parsed_node['filename'] = node
-
-                return parsed_node
+                return WorkflowUtils.node_class_info(klass, node_type, node)
 
         return None
 
+    @staticmethod
+    def node_class_info(klass, node_type, filename):
+        """Information about a Node class, as listed to the front-end."""
+        try:
+            color = klass.color
+        except AttributeError:
+            color = 'black'
+
+        return {
+            'name': klass.name,
+            'node_key': klass.__name__,
+            'node_type': node_type,
+            'num_in': klass.num_in,
+            'num_out': klass.num_out,
+            'color': color,
+            'filename': filename,
+            'doc': klass.__doc__,
+            'options': {k: v.get_value() for k, v in klass.options.items()},
+            'option_types': klass.option_types,
+            'download_result': getattr(klass, "download_result", False)
+        }
+
 
 class WorkflowException(Exception):
     def __init__(self, action: str, reason: str):
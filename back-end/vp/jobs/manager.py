@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from pyworkflow import WorkflowException
+
+
+class JobManager:
+    """Runs Workflow executions in the background on a local thread pool.
+
+    The state of each job is saved as a JSON file in `job_dir`, so any
+    server process can report on a job. A job is cancelled by creating a
+    marker file next to it, which the worker checks before starting each
+    task; Nodes already running are allowed to finish.
+
+    Job states: 'queued', 'running', 'succeeded', 'failed', 'cancelled'.
+    Node states: 'pending', 'succeeded', 'failed', 'skipped', 'cancelled'.
+
+    Attributes:
+        job_dir: Directory the job files are written to.
+    """
+    FINISHED = ['succeeded', 'failed', 'cancelled']
+
+    def __init__(self, job_dir, max_workers=None):
+        if not os.path.exists(job_dir):
+            os.makedirs(job_dir)
+
+        self.job_dir = job_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, workflow, node_ids):
+        """Queue Nodes of a Workflow for execution.
+
+        Args:
+            workflow: Workflow to execute. It is modified by the job, so it
+                should not be shared with the request.
+            node_ids: The Nodes to execute.
+
+        Returns:
+            The new job's id
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'progress': {'completed': 0, 'total': len(node_ids)},
+            'nodes': {node_id: {'status': 'pending', 'seconds': None, 'error': None} for node_id in node_ids},
+            'results': [],
+        }
+
+        self.save(job)
+        self._executor.submit(self.run, job, workflow, node_ids)
+
+        return job_id
+
+    def run(self, job, workflow, node_ids):
+        cancel = CancelMarker(self.cancel_path(job['job_id']))
+
+        job['status'] = 'running'
+        job['started_at'] = time.time()
+        self.save(job)
+
+        def on_task_done(task, seconds, e):
+            failed_id = None if e is None else (getattr(e, 'node_id', None) or task[0])
+
+            for node_id in task:
+                node = job['nodes'][node_id]
+                node['seconds'] = seconds
+
+                if e is None:
+                    node['status'] = 'succeeded'
+                elif node_id == failed_id:
+                    node['status'] = 'failed'
+                    node['error'] = {e.action: e.reason}
+
+            job['progress']['completed'] += len(task)
+            self.save(job)
+
+        try:
+            errors = workflow.execute_nodes(node_ids, fuse=True, on_task_done=on_task_done, cancel=cancel)
+        except Exception as e:
+            # Don't leave the job 'running' if execution crashes
+            if not isinstance(e, WorkflowException):
+                e = WorkflowException('execute', str(e))
+
+            errors = {node_id: e for node_id in node_ids}
+
+        for node_id, e in errors.items():
+            node = job['nodes'][node_id]
+
+            if node['status'] == 'pending':
+                node['status'] = 'cancelled' if cancel.is_set() else 'skipped'
+                node['error'] = {e.action: e.reason}
+
+        if cancel.is_set():
+            job['status'] = 'cancelled'
+        else:
+            job['status'] = 'failed' if errors else 'succeeded'
+
+        job['results'] = workflow.export_results(node_ids)
+        job['finished_at'] = time.time()
+        self.save(job)
+
+    def get(self, job_id):
+        """Load the state of a job.
+
+        Raises:
+            WorkflowException: the job does not exist
+        """
+        try:
+            with open(self.job_path(job_id)) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            raise WorkflowException('job', 'Job %s does not exist' % job_id)
+
+        job['cancel_requested'] = os.path.exists(self.cancel_path(job_id))
+        return job
+
+    def cancel(self, job_id):
+        """Request that a job stops before starting any more Nodes.
+
+        Returns:
+            The state of the job
+        """
+        job = self.get(job_id)
+
+        if job['status'] not in JobManager.FINISHED:
+            open(self.cancel_path(job_id), 'w').close()
+            job['cancel_requested'] = True
+
+        return job
+
+    def save(self, job):
+        # Write under a temporary name so readers never see partial files
+        path = self.job_path(job['job_id'])
+        with open(path + '.tmp', 'w') as f:
+            json.dump(job, f)
+
+        os.replace(path + '.tmp', path)
+
+    def job_path(self, job_id):
+        # Only hex ids are created; anything else cannot be a job
+        if not job_id.isalnum():
+            raise WorkflowException('job', 'Job %s does not exist' % job_id)
+
+        return os.path.join(self.job_dir, job_id + '.json')
+
+    def cancel_path(self, job_id):
+        return os.path.join(self.job_dir, job_id + '.cancel')
+
+
+class CancelMarker:
+    """Cancel flag for `Workflow.execute_nodes()`, set by a marker file."""
+    def __init__(self, path):
+        self.path = path
+
+    def is_set(self):
+        return os.path.exists(self.path)
+
+
+def apply_finished_jobs(session, workflow):
+    """Copy the output of finished background jobs into a session's Workflow.
+
+    Jobs submitted from a session are listed in its 'jobs' key; each one is
+    removed from the list once it has finished and been applied.
+    """
+    pending = list()
+
+    for job_id in session.get('jobs', []):
+        try:
+            job = job_manager().get(job_id)
+        except WorkflowException:
+            continue
+
+        if job['status'] in JobManager.FINISHED:
+            workflow.import_results(job['results'])
+        else:
+            pending.append(job_id)
+
+    # Only touch the session if something changed, so it isn't rewritten
+    if pending != session.get('jobs', []):
+        session['jobs'] = pending
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def job_manager():
+    """The JobManager shared by all requests in this process."""
+    global _job_manager
+
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager(
+                os.path.join(settings.MEDIA_ROOT, '.pyworkflow_jobs'),
+                max_workers=settings.JOB_WORKERS
+            )
+
+    return _job_manager
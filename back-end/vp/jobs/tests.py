@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import threading
+
+import networkx as nx
+from django.test import SimpleTestCase
+from pyworkflow import Workflow, Node, WorkflowException
+
+from .manager import JobManager
+
+
+NODES = [
+    {"name": "Read CSV", "node_id": "1", "node_type": "io", "node_key": "ReadCsvNode",
+     "is_global": False, "options": {"file": "sample.csv"}},
+    {"name": "Filter", "node_id": "2", "node_type": "manipulation", "node_key": "FilterNode",
+     "is_global": False, "options": {"items": ["key"], "axis": "columns"}},
+    {"name": "Write CSV", "node_id": "3", "node_type": "io", "node_key": "WriteCsvNode",
+     "is_global": False, "options": {"file": "out.csv", "index": False}},
+]
+
+
+class JobManagerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+        with open(os.path.join(self.root_dir, "sample.csv"), "w") as f:
+            f.write("key,A\nK0,A0\nK1,A1\n")
+
+        self.manager = JobManager(os.path.join(self.root_dir, ".pyworkflow_jobs"), max_workers=1)
+        self.workflow = Workflow("Jobs", root_dir=self.root_dir, graph=nx.DiGraph())
+
+        for node_info in NODES:
+            self.workflow.update_or_add_node(Node(node_info))
+
+        self.workflow.add_edge(self.workflow.get_node("1"), self.workflow.get_node("2"))
+        self.workflow.add_edge(self.workflow.get_node("2"), self.workflow.get_node("3"))
+
+    def tearDown(self):
+        self.manager._executor.shutdown(wait=True)
+        shutil.rmtree(self.root_dir)
+
+    def run_job(self):
+        workflow = Workflow.from_json(self.workflow.to_json())
+        job_id = self.manager.submit(workflow, workflow.execution_order())
+
+        # Wait for the job to finish
+        self.manager._executor.shutdown(wait=True)
+
+        return self.manager.get(job_id)
+
+    def test_completed_job(self):
+        job = self.run_job()
+
+        self.assertEqual(job["status"], "succeeded")
+        self.assertDictEqual(job["progress"], {"completed": 3, "total": 3})
+        self.assertListEqual([node["status"] for node in job["nodes"].values()], ["succeeded"] * 3)
+        self.assertTrue(os.path.exists(os.path.join(self.root_dir, "out.csv")))
+
+        # Results can be applied to the session's Workflow
+        self.assertListEqual(self.workflow.import_results(job["results"]), ["1", "2", "3"])
+        self.assertListEqual(self.workflow.stale_nodes(), [])
+        self.assertListEqual(list(self.workflow.retrieve_node_data(self.workflow.get_node("2")).columns), ["key"])
+
+    def test_failed_node(self):
+        read_csv_node = self.workflow.get_node("1")
+        read_csv_node.option_values["file"] = "missing.csv"
+        self.workflow.update_or_add_node(read_csv_node)
+
+        job = self.run_job()
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["nodes"]["1"]["status"], "failed")
+        self.assertIn("read csv", job["nodes"]["1"]["error"])
+        self.assertEqual(job["nodes"]["3"]["status"], "skipped")
+
+    def test_cancel(self):
+        # Keep the only worker busy, so the job is cancelled before it starts
+        blocker = threading.Event()
+        self.manager._executor.submit(blocker.wait)
+
+        workflow = Workflow.from_json(self.workflow.to_json())
+        job_id = self.manager.submit(workflow, workflow.execution_order())
+
+        job = self.manager.cancel(job_id)
+        self.assertTrue(job["cancel_requested"])
+
+        blocker.set()
+        self.manager._executor.shutdown(wait=True)
+        job = self.manager.get(job_id)
+
+        self.assertEqual(job["status"], "cancelled")
+        self.assertListEqual([node["status"] for node in job["nodes"].values()], ["cancelled"] * 3)
+        self.assertFalse(os.path.exists(os.path.join(self.root_dir, "out.csv")))
+
+        # A finished job cannot be cancelled again
+        self.assertEqual(self.manager.cancel(job_id)["status"], "cancelled")
+
+    def test_missing_job(self):
+        with self.assertRaises(WorkflowException):
+            self.manager.get("foobar")
+
+        with self.assertRaises(WorkflowException):
+            self.manager.get("../foobar")
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.jobs, name='jobs'),
+    path('<str:job_id>', views.handle_job, name='handle job'),
+]
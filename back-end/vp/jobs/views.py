@@ -0,0 +1,96 @@
+import json
+
+from django.http import JsonResponse
+from pyworkflow import Workflow, WorkflowException
+from rest_framework.decorators import api_view
+from drf_yasg.utils import swagger_auto_schema
+
+from vp.metrics import instrument
+
+from .manager import job_manager
+
+
+@swagger_auto_schema(method='post',
+                     operation_summary='Execute the workflow in the background.',
+                     operation_description='Starts a background job to execute a node and any ancestors '
+                                           'it needs, or the whole workflow if no node is specified. '
+                                           'Returns the job id to poll for status.',
+                     responses={
+                         202: 'Job started',
+                         500: 'Workflow does not contain specified node/error creating job'
+                     })
+@api_view(['POST'])
+def jobs(request):
+    """Start a background execution job.
+
+    Args:
+        request: Django request Object, with an optional JSON body:
+            {
+                node_id: Node to execute, with its out-of-date ancestors
+            }
+
+    Returns:
+        202 - Job id and initial status
+        500 - Workflow does not contain specified node/error creating job
+    """
+    try:
+        json_data = json.loads(request.body or '{}')
+        node_id = json_data.get('node_id')
+
+        if node_id is None:
+            node_ids = request.pyworkflow.execution_order()
+        else:
+            node_ids = request.pyworkflow.ancestors_to_execute(node_id)
+
+        # The job runs on its own copy of the Workflow; results are copied
+        # back into the session once it finishes
+        workflow = Workflow.from_json(request.pyworkflow.to_json(), cache=request.pyworkflow.cache)
+        instrument(workflow)
+        job_id = job_manager().submit(workflow, node_ids)
+    except json.JSONDecodeError as e:
+        return JsonResponse({'No valid JSON in request body': str(e)}, status=500)
+    except WorkflowException as e:
+        return JsonResponse({e.action: e.reason}, status=500)
+
+    request.session['jobs'] = request.session.get('jobs', []) + [job_id]
+
+    job = job_manager().get(job_id)
+    job.pop('results')
+
+    return JsonResponse(job, status=202)
+
+
+@swagger_auto_schema(method='get',
+                     operation_summary='Retrieve the status of a job.',
+                     operation_description='Retrieves status, progress, per-node timings and errors of a job.',
+                     responses={
+                         200: 'Job status',
+                         404: 'Job not found'
+                     })
+@swagger_auto_schema(method='delete',
+                     operation_summary='Cancel a job.',
+                     operation_description='Stops a job before it starts any more nodes.',
+                     responses={
+                         200: 'Cancellation requested',
+                         404: 'Job not found'
+                     })
+@api_view(['GET', 'DELETE'])
+def handle_job(request, job_id):
+    """Retrieve or cancel a background execution job.
+
+    Returns:
+        200 - Job status, progress, per-node timings and errors
+        404 - Job not found
+    """
+    try:
+        if request.method == 'DELETE':
+            job = job_manager().cancel(job_id)
+        else:
+            job = job_manager().get(job_id)
+    except WorkflowException as e:
+        return JsonResponse({e.action: e.reason}, status=404)
+
+    # Results are applied to the session's Workflow by the middleware
+    job.pop('results')
+
+    return JsonResponse(job)
@@ -1,3 +1,80 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+import networkx as nx
+from django.test import RequestFactory, SimpleTestCase
+from pyworkflow import Workflow, Node
+
+from .views import execute_to_node
+
+
+NODES = [
+    {"name": "Read CSV", "node_id": "1", "node_type": "io", "node_key": "ReadCsvNode",
+     "is_global": False, "options": {"file": "sample.csv"}},
+    {"name": "Filter", "node_id": "2", "node_type": "manipulation", "node_key": "FilterNode",
+     "is_global": False, "options": {"items": ["key"], "axis": "columns"}},
+    {"name": "Write CSV", "node_id": "3", "node_type": "io", "node_key": "WriteCsvNode",
+     "is_global": False, "options": {"file": "out.csv", "index": False}},
+]
+
+
+class ExecuteToNodeTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+        with open(os.path.join(self.root_dir, "sample.csv"), "w") as f:
+            f.write("key,A\nK0,A0\nK1,A1\n")
+
+        self.workflow = Workflow("Execute To", root_dir=self.root_dir, graph=nx.DiGraph())
+
+        for node_info in NODES:
+            self.workflow.update_or_add_node(Node(node_info))
+
+        self.workflow.add_edge(self.workflow.get_node("1"), self.workflow.get_node("2"))
+        self.workflow.add_edge(self.workflow.get_node("2"), self.workflow.get_node("3"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def execute_to(self, node_id):
+        request = RequestFactory().get('/node/%s/execute_to' % node_id)
+        request.pyworkflow = self.workflow
+
+        response = execute_to_node(request, node_id)
+        return response.status_code, json.loads(response.content)
+
+    def test_execute_to(self):
+        status, data = self.execute_to("2")
+
+        self.assertEqual(status, 200)
+        self.assertListEqual(data["executed"], ["1", "2"])
+        self.assertListEqual(data["up_to_date"], [])
+
+        # Ancestors with valid output are reported, not executed again
+        status, data = self.execute_to("3")
+
+        self.assertListEqual(data["executed"], ["3"])
+        self.assertListEqual(data["up_to_date"], ["1", "2"])
+
+    def test_execute_to_failed_node(self):
+        write_csv_node = self.workflow.get_node("3")
+        write_csv_node.option_values["file"] = os.path.join(self.root_dir, "missing", "out.csv")
+        self.workflow.update_or_add_node(write_csv_node)
+
+        status, data = self.execute_to("3")
+
+        self.assertEqual(status, 500)
+        self.assertEqual(data["node_id"], "3")
+        self.assertListEqual(data["executed"], ["1", "2"])
+
+        # Fixing the Node only executes it again
+        write_csv_node.option_values["file"] = "out.csv"
+        self.workflow.update_or_add_node(write_csv_node)
+
+        status, data = self.execute_to("3")
+
+        self.assertEqual(status, 200)
+        self.assertListEqual(data["executed"], ["3"])
+        self.assertListEqual(data["up_to_date"], ["1", "2"])
@@ -6,6 +6,8 @@ urlpatterns = [
     path('<str:node_id>', views.handle_node, name='handle node'),
     path('global/<str:node_id>', views.handle_node, name='handle node'),
     path('<str:node_id>/execute', views.execute_node, name='execute node'),
+    path('<str:node_id>/execute_to', views.execute_to_node, name='execute to node'),
     path('<str:node_id>/retrieve_data', views.retrieve_data, name='retrieve data'),
+    path('<str:node_id>/metrics', views.retrieve_metrics, name='retrieve metrics'),
     path('edge/<str:node_from_id>/<str:node_to_id>', views.handle_edge, name='handle edge')
 ]
@@ -1,9 +1,11 @@
 import json
+import networkx as nx
 
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from pyworkflow import WorkflowException, NodeException, ParameterValidationError, node_factory
 from rest_framework.decorators import api_view
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
 
@@ -244,22 +246,160 @@ def execute_node(request, node_id):
         return JsonResponse({e.action: e.reason}, status=500)
 
 
+@swagger_auto_schema(method='get',
+                     operation_summary='Execute a node and any ancestors it needs.',
+                     operation_description='Executes a node, along with any preceding nodes '
+                                           'whose output is missing or out of date.',
+                     responses={
+                         200: 'Nodes successfully executed',
+                         500: 'Workflow does not contain specified node/error during execution'
+                     })
+@api_view(['GET'])
+def execute_to_node(request, node_id):
+    """Execute the specified node, and any ancestors it needs
+
+    Ancestors whose output is still valid are not re-executed. All other
+    Nodes are run in a single pass on the server, with chains of
+    manipulation nodes fused into one step. Returns the ids of the Nodes
+    that were executed, and of the ancestors that were already up to date,
+    in execution order.
+    """
+    try:
+        to_execute = request.pyworkflow.ancestors_to_execute(node_id)
+        errors = request.pyworkflow.execute_nodes(to_execute, fuse=True)
+    except (NodeException, WorkflowException) as e:
+        return JsonResponse({e.action: e.reason}, status=500)
+
+    executed = [executed_id for executed_id in to_execute if executed_id not in errors]
+
+    # Ancestors that were skipped because their output is still valid
+    ancestors = nx.ancestors(request.pyworkflow.graph, node_id)
+    up_to_date = [
+        ancestor_id for ancestor_id in request.pyworkflow.execution_order()
+        if ancestor_id in ancestors and ancestor_id not in to_execute
+        and not request.pyworkflow.is_stale(ancestor_id)
+    ]
+
+    if errors:
+        # The first error is the Node that failed; the rest were skipped
+        failed_id, e = next(iter(errors.items()))
+        return JsonResponse({
+            e.action: e.reason,
+            'node_id': failed_id,
+            'executed': executed,
+            'up_to_date': up_to_date,
+        }, status=500)
+
+    return JsonResponse({
+        'message': 'Node Execution successful!',
+        'executed': executed,
+        'up_to_date': up_to_date,
+        'data_file': request.pyworkflow.get_node(node_id).data,
+    }, safe=False)
+
+
+PAGE_PARAMETERS = [
+    openapi.Parameter('offset', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description='Number of rows to skip'),
+    openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description='Maximum number of rows to return'),
+    openapi.Parameter('columns', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description='Comma-separated columns to return'),
+    openapi.Parameter('sort', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description='Comma-separated columns to order rows by; prefix with "-" for descending'),
+]
+
+
 @swagger_auto_schema(method='get',
                      operation_summary='Gets the data frame at the executed node.',
-                     operation_description='Retrieves the state of data at that point in the graph.',
+                     operation_description='Retrieves the state of data at that point in the graph. With any of '
+                                           'offset, limit, columns or sort, only that page of the data is '
+                                           'returned in "data", along with "total_rows" and all "columns".',
+                     manual_parameters=PAGE_PARAMETERS,
                      responses={
-                         200: 'Data successfully retrieved'
+                         200: 'Data successfully retrieved',
+                         400: 'Invalid page parameters'
                      })
 @api_view(['GET'])
 def retrieve_data(request, node_id):
+    try:
+        page = page_parameters(request.GET)
+    except ValueError as e:
+        return JsonResponse({'Invalid page parameters': str(e)}, status=400)
+
     try:
         node_to_retrieve = request.pyworkflow.get_node(node_id)
-        data = request.pyworkflow.retrieve_node_data(node_to_retrieve)
+
+        # Output inside a fused chain is only stored once it is inspected
+        if (node_to_retrieve is not None and node_to_retrieve.data is None
+                and node_to_retrieve.node_type != 'flow_control'
+                and not request.pyworkflow.is_stale(node_id)):
+            errors = request.pyworkflow.execute_to(node_id)
+
+            if errors:
+                e = next(iter(errors.values()))
+                return JsonResponse({e.action: e.reason}, status=500)
+
+            node_to_retrieve = request.pyworkflow.get_node(node_id)
+
+        if page is None:
+            data = request.pyworkflow.retrieve_node_json(node_to_retrieve)
+        else:
+            data = request.pyworkflow.retrieve_node_page(node_to_retrieve, **page)
+
         return JsonResponse(data, safe=False, status=200)
     except WorkflowException as e:
         return JsonResponse({e.action: e.reason}, status=500)
 
 
+def page_parameters(query):
+    """Read the page of data requested in a query string.
+
+    Returns:
+        dict of arguments for `Workflow.retrieve_node_page()`, or None if
+        no page was requested
+
+    Raises:
+        ValueError: a parameter is invalid
+    """
+    if not any(key in query for key in ['offset', 'limit', 'columns', 'sort']):
+        return None
+
+    offset = int(query.get('offset', 0))
+    limit = int(query['limit']) if 'limit' in query else None
+
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError('offset and limit cannot be negative')
+
+    columns = [column for column in query.get('columns', '').split(',') if column] or None
+    sort = [(column.lstrip('-'), not column.startswith('-'))
+            for column in query.get('sort', '').split(',') if column.lstrip('-')] or None
+
+    return {'offset': offset, 'limit': limit, 'columns': columns, 'sort': sort}
+
+
+@swagger_auto_schema(method='get',
+                     operation_summary='Gets metrics of the last execution of a node.',
+                     operation_description='Retrieves the time spent loading input, executing and storing '
+                                           'output, and the size of the data the node read and wrote.',
+                     responses={
+                         200: 'Metrics successfully retrieved',
+                         404: 'Node has not been executed',
+                         500: 'Workflow does not contain specified node'
+                     })
+@api_view(['GET'])
+def retrieve_metrics(request, node_id):
+    try:
+        metrics = request.pyworkflow.node_metrics(node_id)
+    except WorkflowException as e:
+        return JsonResponse({e.action: e.reason}, status=500)
+
+    if metrics is None:
+        return JsonResponse({'retrieve metrics': 'Node %s has not been executed.' % node_id}, status=404)
+
+    return JsonResponse(metrics, safe=False, status=200)
+
+
 def create_node(request):
     """Pass all request info to Node Factory.
 
@@ -0,0 +1,134 @@
+"""Prometheus metrics for the back-end, served at /metrics.
+
+Metrics are only collected if `prometheus_client` is installed. When the
+server runs several worker processes, set the PROMETHEUS_MULTIPROC_DIR
+environment variable to an empty directory writable by all workers before
+they start: each process then writes its metrics to files there, and
+/metrics adds up the files of all processes. Empty the directory when the
+server restarts, and call `prometheus_client.multiprocess.mark_process_dead()`
+when a worker exits (e.g. from gunicorn's `child_exit` hook) so its memory
+gauge is no longer counted.
+"""
+import importlib.util
+import os
+import time
+
+from contextlib import nullcontext
+from django.core.exceptions import MiddlewareNotUsed
+from pyworkflow import ExecutionHook
+
+
+HAS_PROMETHEUS = importlib.util.find_spec('prometheus_client') is not None
+MULTIPROCESS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+if HAS_PROMETHEUS:
+    from prometheus_client import Counter, Gauge, Histogram
+
+    REQUEST_SECONDS = Histogram(
+        'vp_request_seconds', 'Time to respond to HTTP requests.',
+        ['method', 'route', 'status']
+    )
+    NODE_EXECUTIONS = Counter(
+        'vp_node_executions_total', 'Node executions, by whether they succeeded.',
+        ['node_key', 'status']
+    )
+    NODE_SECONDS = Histogram(
+        'vp_node_execution_seconds', 'Time to execute a Node, including loading input and storing output.',
+        ['node_key']
+    )
+    NODE_OUTPUT_BYTES = Counter(
+        'vp_node_output_bytes_total', 'In-memory size of Node output.',
+        ['node_key']
+    )
+    CACHE_REQUESTS = Counter(
+        'vp_execution_cache_requests_total', 'Node executions, by whether output was loaded from the cache.',
+        ['result']
+    )
+    SESSION_SECONDS = Histogram(
+        'vp_workflow_session_seconds', "Time to load a session's Workflow, and to save it after the request.",
+        ['operation']
+    )
+    STORE_BYTES = Gauge(
+        'vp_store_memory_bytes', 'Node output held in memory by the Workflows of the process.',
+        multiprocess_mode='livesum'
+    )
+
+
+class PrometheusHook(ExecutionHook):
+    """Counts Node executions, and their duration and output, by node_key."""
+    def after_node(self, workflow, node, metrics, error):
+        node_key = node.node_key or 'unknown'
+
+        NODE_EXECUTIONS.labels(node_key, 'failed' if error is not None else 'succeeded').inc()
+        NODE_SECONDS.labels(node_key).observe(metrics.seconds)
+
+        if error is None:
+            NODE_OUTPUT_BYTES.labels(node_key).inc(metrics.counters['bytes_out'])
+            CACHE_REQUESTS.labels('hit' if metrics.counters['cache_hits'] else 'miss').inc()
+
+
+prometheus_hook = PrometheusHook()
+
+
+def instrument(workflow):
+    """Collect metrics when the Workflow executes Nodes."""
+    if HAS_PROMETHEUS:
+        workflow.add_hook(prometheus_hook)
+
+
+def session_timer(operation):
+    """Time loading ('load') or saving ('save') a session's Workflow."""
+    if not HAS_PROMETHEUS:
+        return nullcontext()
+
+    return SESSION_SECONDS.labels(operation).time()
+
+
+def set_store_size(workflows):
+    """Record the memory used by the ResultStores of the process's Workflows."""
+    if HAS_PROMETHEUS:
+        STORE_BYTES.set(sum(getattr(workflow.store, 'size', 0) for workflow in workflows))
+
+
+class RequestMetricsMiddleware:
+    """Times each request, labelled by the URL pattern that handled it.
+
+    Routes are the patterns from the urlconf (e.g. 'node/<str:node_id>'),
+    so every Node shares one label. Requests matching no pattern are
+    labelled 'unmatched'.
+    """
+    def __init__(self, get_response):
+        if not HAS_PROMETHEUS:
+            raise MiddlewareNotUsed('prometheus_client is not installed')
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None and match.route else 'unmatched'
+
+        REQUEST_SECONDS.labels(request.method, route, response.status_code).observe(time.perf_counter() - start)
+        return response
+
+
+def generate_latest():
+    """Render the metrics of all server processes in the Prometheus text format.
+
+    Returns:
+        Tuple of the content and its content type
+    """
+    from prometheus_client import CollectorRegistry, REGISTRY, CONTENT_TYPE_LATEST
+    from prometheus_client import generate_latest as render
+
+    if MULTIPROCESS_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return render(registry), CONTENT_TYPE_LATEST
@@ -45,10 +45,12 @@ INSTALLED_APPS = [
     # Project apps
     'workflow.apps.WorkflowConfig',
     'node.apps.NodeConfig',
+    'jobs.apps.JobsConfig',
     'drf_yasg'
 ]
 
 MIDDLEWARE = [
+    'vp.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,6 +93,24 @@ DATABASES = {}
 
 MEDIA_ROOT = '/tmp'
 
+# Number of workflow executions run at once in the background
+JOB_WORKERS = 2
+
+# Workflows kept in memory, and seconds between saving changed workflows.
+# With several worker processes, use 0 to save each change immediately.
+WORKFLOW_REGISTRY_SIZE = 100
+WORKFLOW_WRITE_INTERVAL = 1.0
+
+# Size cap of the on-disk cache of unchanged node output, shared by all
+# workflows; 0 disables the cache, so every node is executed
+EXECUTION_CACHE_MAX_BYTES = 1024 ** 3
+
+# Compress downloads of text files for clients that accept gzip
+DOWNLOAD_GZIP = True
+
+# Seconds a chunked upload is kept without receiving any data
+UPLOAD_MAX_AGE = 24 * 60 * 60
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -38,6 +38,8 @@ urlpatterns = [
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path('admin/', admin.site.urls),
     path('info/', views.info),
+    path('metrics', views.metrics),
     path('node/', include('node.urls')),
-    path('workflow/', include('workflow.urls'))
+    path('workflow/', include('workflow.urls')),
+    path('jobs/', include('jobs.urls'))
 ]
@@ -1,7 +1,9 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from rest_framework.decorators import api_view
 from drf_yasg.utils import swagger_auto_schema
 
+from . import metrics as prometheus
+
 
 @swagger_auto_schema(method='get', responses={200: 'JSON response with data'})
 @api_view(['GET'])
@@ -20,3 +22,30 @@ def info(request):
         "about": "super-duper workflows!"
     }
     return JsonResponse(data)
+
+
+@swagger_auto_schema(method='get',
+                     operation_summary='Metrics in the Prometheus text format.',
+                     operation_description='Request latency by route, node executions by node type, '
+                                           'session load/save time, memory held by node output, and '
+                                           'execution cache hits, added up over all server processes.',
+                     responses={
+                         200: 'Metrics in the Prometheus text format',
+                         501: 'prometheus_client is not installed'
+                     })
+@api_view(['GET'])
+def metrics(request):
+    """Serve metrics to Prometheus.
+
+       Args:
+           request: Django request Object
+
+       Returns:
+           200 - Metrics in the Prometheus text exposition format.
+           501 - Metrics are not collected.
+       """
+    if not prometheus.HAS_PROMETHEUS:
+        return JsonResponse({'metrics': 'prometheus_client is not installed'}, status=501)
+
+    content, content_type = prometheus.generate_latest()
+    return HttpResponse(content, content_type=content_type)
@@ -1,5 +1,11 @@
-from pyworkflow import Workflow, WorkflowException
+from contextlib import nullcontext
+
+from pyworkflow import WorkflowException
 from django.http import JsonResponse
+from jobs.manager import apply_finished_jobs
+from vp.metrics import instrument, session_timer, set_store_size
+
+from .registry import session_workflow, workflow_registry
 
 
 class WorkflowMiddleware:
@@ -16,33 +22,48 @@ class WorkflowMiddleware:
         # Code executed each request before view (and later middleware) called
 
         path = request.path
+        lock = nullcontext()
 
-        if not path.startswith('/workflow/') and not path.startswith('/node/'):
-            # Workflow needed only for /workflow and /node routes
+        if not path.startswith(('/workflow/', '/node/', '/jobs/')):
+            # Workflow needed only for /workflow, /node, and /jobs routes
             pass
         elif path == '/workflow/open' or path == '/workflow/new':
             # 'open' loads from file upload, 'new' inits new Workflow
             pass
         else:
-            # All other cases, load workflow from session
+            # All other cases, look up the session's workflow in the registry
             try:
-                request.pyworkflow = Workflow.from_json(request.session)
-
-                # Check if a graph is present
-                if request.pyworkflow.graph is None:
-                    return JsonResponse({
-                        'message': 'A workflow has not been created yet.'
-                    }, status=404)
+                with session_timer('load'):
+                    workflow_id = session_workflow(request.session)
+                    lock = workflow_registry().lock(workflow_id)
+                    request.pyworkflow = workflow_registry().get(workflow_id)
             except WorkflowException as e:
                 return JsonResponse({e.action: e.reason}, status=500)
 
-        response = self.get_response(request)
+            instrument(request.pyworkflow)
+
+        # Requests for the same workflow take turns
+        with lock:
+            if hasattr(request, 'pyworkflow'):
+                # Pick up output from any finished background jobs
+                apply_finished_jobs(request.session, request.pyworkflow)
+
+            response = self.get_response(request)
+
+            # Code executed for each request/response after the view is called
+
+            # Request should have 'pyworkflow' attribute, but do not crash if not
+            if hasattr(request, 'pyworkflow'):
+                with session_timer('save'):
+                    # Write any Node output still held in memory to disk
+                    try:
+                        request.pyworkflow.flush_node_data()
+                    except WorkflowException as e:
+                        return JsonResponse({e.action: e.reason}, status=500)
 
-        # Code executed for each request/response after the view is called
+                    # Queue the workflow to be saved, if it changed
+                    workflow_registry().save(request.session['workflow_id'])
 
-        # Request should have 'pyworkflow' attribute, but do not crash if not
-        if hasattr(request, 'pyworkflow'):
-            # Save Workflow back to session
-            request.session.update(request.pyworkflow.to_json())
+                set_store_size(workflow_registry().workflows())
 
         return response
@@ -0,0 +1,270 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+
+from django.conf import settings
+from pyworkflow import Workflow, WorkflowException
+from pyworkflow.cache import ExecutionCache
+
+
+class WorkflowRegistry:
+    """Keeps Workflows in memory between requests.
+
+    Each Workflow is registered under a random id, which is all that needs
+    to be stored in the session. Saving is write-behind: `save()` only
+    queues a Workflow if its version changed since it was last written, and
+    a background thread writes queued Workflows to `storage_dir` every
+    `interval` seconds. Workflows that are not in memory, e.g. after a
+    restart or once evicted, are loaded from their file.
+
+    Each registry belongs to one server process. When `get()` finds that a
+    Workflow's file was replaced since this process read or wrote it, e.g.
+    by another worker process, the Workflow is loaded again, unless it has
+    changes of its own not yet written; then the last write wins. With
+    several worker processes, set `interval` to 0 so each change is written
+    as soon as it is saved, and other processes see it on their next
+    request.
+
+    Attributes:
+        storage_dir: Directory Workflows are written to.
+        interval: Seconds between writes of queued Workflows; 0 writes
+            each Workflow as soon as it is saved.
+        max_workflows: Number of Workflows kept in memory.
+        cache: ExecutionCache of the Workflows loaded from disk, or None.
+    """
+    def __init__(self, storage_dir, interval=1.0, max_workflows=100, cache=None):
+        if not os.path.exists(storage_dir):
+            os.makedirs(storage_dir)
+
+        self.storage_dir = storage_dir
+        self.interval = interval
+        self.max_workflows = max_workflows
+        self.cache = cache
+
+        # workflow_id -> [Workflow, version last written, lock, stamp of file
+        # last read or written]
+        self._entries = OrderedDict()
+        self._dirty = set()
+        self._lock = threading.RLock()
+
+        if interval > 0:
+            writer = threading.Thread(target=self._write_behind, daemon=True)
+            writer.start()
+
+        atexit.register(self.flush)
+
+    def register(self, workflow):
+        """Add a new Workflow to the registry.
+
+        Returns:
+            The id to retrieve the Workflow with
+        """
+        workflow_id = uuid.uuid4().hex
+
+        with self._lock:
+            self._entries[workflow_id] = [workflow, None, threading.RLock(), None]
+            self._dirty.add(workflow_id)
+            self._evict()
+
+        return workflow_id
+
+    def get(self, workflow_id):
+        """Retrieve a Workflow, loading it from disk if not in memory, or
+        if its file was replaced by another process.
+
+        Raises:
+            WorkflowException: no Workflow is registered with the id
+        """
+        with self._lock:
+            entry = self._entries.get(workflow_id)
+
+            if entry is None:
+                workflow, version, stamp = self._read(workflow_id)
+                self._entries[workflow_id] = [workflow, version, threading.RLock(), stamp]
+                self._evict()
+            elif self._replaced(workflow_id, entry):
+                # Keep the lock, which requests may be waiting on
+                entry[0], entry[1], entry[3] = self._read(workflow_id)
+
+            self._entries.move_to_end(workflow_id)
+            return self._entries[workflow_id][0]
+
+    def workflows(self):
+        """The Workflows currently held in memory."""
+        with self._lock:
+            return [entry[0] for entry in self._entries.values()]
+
+    def lock(self, workflow_id):
+        """Lock held while a request uses the Workflow."""
+        self.get(workflow_id)
+
+        with self._lock:
+            return self._entries[workflow_id][2]
+
+    def save(self, workflow_id):
+        """Queue a Workflow to be written, if it changed since the last write.
+
+        If `interval` is 0, the Workflow is written now.
+        """
+        with self._lock:
+            entry = self._entries.get(workflow_id)
+
+            if entry is not None and entry[0].version != entry[1]:
+                self._dirty.add(workflow_id)
+
+        if self.interval <= 0:
+            self.flush()
+
+    def flush(self):
+        """Write all queued Workflows to disk now."""
+        with self._lock:
+            dirty = [(workflow_id, self._entries[workflow_id])
+                     for workflow_id in self._dirty if workflow_id in self._entries]
+            self._dirty.clear()
+
+        for workflow_id, entry in dirty:
+            try:
+                self._write(workflow_id, entry)
+            except OSError:
+                with self._lock:
+                    self._dirty.add(workflow_id)
+                raise
+
+    def path(self, workflow_id):
+        # Only hex ids are created; anything else cannot be a Workflow
+        if not workflow_id.isalnum():
+            raise WorkflowException('load workflow', 'Workflow %s does not exist' % workflow_id)
+
+        return os.path.join(self.storage_dir, workflow_id + '.json')
+
+    def _read(self, workflow_id):
+        try:
+            with open(self.path(workflow_id)) as f:
+                stamp = WorkflowRegistry.file_stamp(f.fileno())
+                workflow = Workflow.from_json(json.load(f), cache=self.cache)
+        except (OSError, ValueError):
+            raise WorkflowException('load workflow', 'Workflow %s does not exist' % workflow_id)
+
+        return workflow, workflow.version, stamp
+
+    def _replaced(self, workflow_id, entry):
+        # Workflows with unwritten changes are kept; the last write wins
+        if entry[3] is None or workflow_id in self._dirty or entry[0].version != entry[1]:
+            return False
+
+        try:
+            return WorkflowRegistry.file_stamp(self.path(workflow_id)) != entry[3]
+        except OSError:
+            return False
+
+    @staticmethod
+    def file_stamp(path):
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _write(self, workflow_id, entry):
+        workflow, lock = entry[0], entry[2]
+
+        # Don't serialize while a request is modifying the Workflow
+        with lock:
+            version = workflow.version
+            data = json.dumps(workflow.to_json())
+
+        # Write under a temporary name so readers never see partial files
+        path = self.path(workflow_id)
+        with open(path + '.tmp', 'w') as f:
+            f.write(data)
+            f.flush()
+
+            # The file keeps its inode and times when renamed
+            stamp = WorkflowRegistry.file_stamp(f.fileno())
+
+        os.replace(path + '.tmp', path)
+        entry[1] = version
+        entry[3] = stamp
+
+    def _evict(self):
+        for workflow_id in list(self._entries):
+            if len(self._entries) <= self.max_workflows:
+                break
+
+            # Skip Workflows that are in use by a request
+            entry = self._entries[workflow_id]
+            if not entry[2].acquire(blocking=False):
+                continue
+
+            try:
+                if workflow_id in self._dirty or entry[0].version != entry[1]:
+                    self._dirty.discard(workflow_id)
+                    self._write(workflow_id, entry)
+
+                del self._entries[workflow_id]
+            finally:
+                entry[2].release()
+
+    def _write_behind(self):
+        while True:
+            time.sleep(self.interval)
+
+            try:
+                self.flush()
+            except (OSError, WorkflowException):
+                # Entries stay unsaved; try again on the next save
+                continue
+
+
+def session_workflow(session):
+    """Find the id of the Workflow used by a session.
+
+    Sessions created before the registry stored the whole Workflow; these
+    are moved into the registry.
+
+    Raises:
+        WorkflowException: the session has no Workflow
+    """
+    if 'workflow_id' in session:
+        return session['workflow_id']
+
+    if session.get('graph') is None:
+        raise WorkflowException('load workflow', 'A workflow has not been created yet.')
+
+    registry = workflow_registry()
+    workflow_id = registry.register(Workflow.from_json(session, cache=registry.cache))
+
+    for key in ['name', 'root_dir', 'node_dir', 'graph', 'flow_vars']:
+        session.pop(key, None)
+
+    session['workflow_id'] = workflow_id
+    return workflow_id
+
+
+_workflow_registry = None
+_workflow_registry_lock = threading.Lock()
+
+
+def workflow_registry():
+    """The WorkflowRegistry shared by all requests in this process."""
+    global _workflow_registry
+
+    with _workflow_registry_lock:
+        if _workflow_registry is None:
+            cache = None
+            if settings.EXECUTION_CACHE_MAX_BYTES:
+                cache = ExecutionCache(
+                    os.path.join(settings.MEDIA_ROOT, Workflow.CACHE_DIR_NAME),
+                    max_bytes=settings.EXECUTION_CACHE_MAX_BYTES
+                )
+
+            _workflow_registry = WorkflowRegistry(
+                os.path.join(settings.MEDIA_ROOT, '.pyworkflow_workflows'),
+                interval=settings.WORKFLOW_WRITE_INTERVAL,
+                max_workflows=settings.WORKFLOW_REGISTRY_SIZE,
+                cache=cache
+            )
+
+    return _workflow_registry
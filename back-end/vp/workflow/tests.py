@@ -1,3 +1,334 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
 
-# Create your tests here.
+import networkx as nx
+from django.test import RequestFactory, SimpleTestCase
+from pyworkflow import Workflow, Node, WorkflowException
+from pyworkflow.cache import ExecutionCache
+
+from .registry import WorkflowRegistry
+from .uploads import UploadManager, UploadOffsetMismatch
+from .views import file_response, parse_range
+
+
+READ_CSV_NODE = {"name": "Read CSV", "node_id": "1", "node_type": "io", "node_key": "ReadCsvNode",
+                 "is_global": False, "options": {"file": "sample.csv"}}
+
+
+class WorkflowRegistryTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.storage_dir = os.path.join(self.root_dir, ".pyworkflow_workflows")
+
+        # Long interval, so only the test writes Workflows
+        self.registry = WorkflowRegistry(self.storage_dir, interval=3600, max_workflows=2)
+
+    def tearDown(self):
+        # Nothing is left to write at exit
+        self.registry.flush()
+        shutil.rmtree(self.root_dir)
+
+    def new_workflow(self, name="Registered"):
+        return Workflow(name, root_dir=self.root_dir, graph=nx.DiGraph(), flow_vars=nx.Graph())
+
+    def test_write_behind(self):
+        workflow_id = self.registry.register(self.new_workflow())
+        path = self.registry.path(workflow_id)
+
+        # Nothing is written until the queued Workflows are flushed
+        self.assertFalse(os.path.exists(path))
+        self.registry.flush()
+        self.assertTrue(os.path.exists(path))
+
+        # Unchanged Workflows are not queued again
+        self.registry.save(workflow_id)
+        self.assertSetEqual(self.registry._dirty, set())
+
+        self.registry.get(workflow_id).update_or_add_node(Node(READ_CSV_NODE))
+        self.registry.save(workflow_id)
+        self.assertSetEqual(self.registry._dirty, {workflow_id})
+
+    def test_read_back_saved_workflow(self):
+        workflow = self.new_workflow("Saved")
+        workflow.update_or_add_node(Node(READ_CSV_NODE))
+        workflow_id = self.registry.register(workflow)
+        self.registry.flush()
+
+        # e.g., after a restart
+        cache = ExecutionCache(os.path.join(self.root_dir, ".pyworkflow_cache"))
+        registry = WorkflowRegistry(self.storage_dir, interval=3600, cache=cache)
+        loaded = registry.get(workflow_id)
+
+        self.assertIsNot(loaded, workflow)
+        self.assertIs(loaded.cache, cache)
+        self.assertEqual(loaded.name, "Saved")
+        self.assertEqual(loaded.get_node("1").option_values, {"file": "sample.csv"})
+
+    def test_eviction(self):
+        workflow_ids = [self.registry.register(self.new_workflow(str(i))) for i in range(3)]
+
+        # The least recently used Workflow is written out and dropped
+        self.assertListEqual(list(self.registry._entries), workflow_ids[1:])
+        self.assertTrue(os.path.exists(self.registry.path(workflow_ids[0])))
+
+        self.assertEqual(self.registry.get(workflow_ids[0]).name, "0")
+        self.assertListEqual(list(self.registry._entries), [workflow_ids[2], workflow_ids[0]])
+
+    def test_reload_when_replaced(self):
+        workflow_id = self.registry.register(self.new_workflow())
+        self.registry.flush()
+
+        # Another process changes the Workflow and writes it immediately
+        other = WorkflowRegistry(self.storage_dir, interval=0)
+        other.get(workflow_id).update_or_add_node(Node(READ_CSV_NODE))
+        other.save(workflow_id)
+
+        self.assertEqual(self.registry.get(workflow_id).get_node("1").name, "Read CSV")
+
+        # Unwritten changes are not replaced
+        self.registry.get(workflow_id).name = "Changed here"
+        other.get(workflow_id).name = "Changed there"
+        other.save(workflow_id)
+
+        self.assertEqual(self.registry.get(workflow_id).name, "Changed here")
+
+    def test_missing_workflow(self):
+        with self.assertRaises(WorkflowException):
+            self.registry.get("foobar")
+
+        with self.assertRaises(WorkflowException):
+            self.registry.get("../foobar")
+
+
+class WorkflowMiddlewareTestCase(SimpleTestCase):
+    def test_no_workflow(self):
+        response = self.client.get('/workflow/globals')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertDictEqual(response.json(), {'load workflow': 'A workflow has not been created yet.'})
+
+
+class FileResponseTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.root_dir, "out.csv")
+
+        with open(self.path, "w") as f:
+            f.write("key,A\nK0,A0\nK1,A1\n")
+
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def download(self, path=None, **headers):
+        response = file_response(self.factory.get('/workflow/download', **headers), open(path or self.path, 'rb'))
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+
+        return response, content
+
+    def test_whole_file(self):
+        response, content = self.download()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, b"key,A\nK0,A0\nK1,A1\n")
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range(self):
+        response, content = self.download(HTTP_RANGE='bytes=6-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, b"K0,A0")
+        self.assertEqual(response['Content-Range'], 'bytes 6-10/18')
+
+        response, content = self.download(HTTP_RANGE='bytes=-6')
+        self.assertEqual(content, b"K1,A1\n")
+        self.assertEqual(response['Content-Range'], 'bytes 12-17/18')
+
+        # Only the part of the range inside the file is sent
+        response, content = self.download(HTTP_RANGE='bytes=12-100')
+        self.assertEqual(content, b"K1,A1\n")
+
+        # Malformed ranges are ignored
+        response, _ = self.download(HTTP_RANGE='bytes=10-6')
+        self.assertEqual(response.status_code, 200)
+
+    def test_range_not_satisfiable(self):
+        for header in ['bytes=18-', 'bytes=-0']:
+            response, _ = self.download(HTTP_RANGE=header)
+
+            self.assertEqual(response.status_code, 416)
+            self.assertEqual(response['Content-Range'], 'bytes */18')
+
+        # Nothing can be sent from an empty file
+        empty_path = os.path.join(self.root_dir, "empty.csv")
+        open(empty_path, "w").close()
+
+        response, _ = self.download(empty_path, HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_if_range(self):
+        response, _ = self.download()
+
+        response, _ = self.download(HTTP_RANGE='bytes=0-2', HTTP_IF_RANGE=response['ETag'])
+        self.assertEqual(response.status_code, 206)
+
+        # The file changed since the client's copy
+        response, _ = self.download(HTTP_RANGE='bytes=0-2', HTTP_IF_RANGE='"foobar"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match(self):
+        response, _ = self.download()
+
+        response, content = self.download(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(content, b"")
+
+        response, _ = self.download(HTTP_IF_NONE_MATCH='"foobar"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_gzip(self):
+        with self.settings(DOWNLOAD_GZIP=True):
+            response, content = self.download(HTTP_ACCEPT_ENCODING='gzip')
+            etag = response['ETag']
+
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(content), b"key,A\nK0,A0\nK1,A1\n")
+
+            # Ranges are of the uncompressed file
+            response, content = self.download(HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=0-2')
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(content, b"key")
+
+            # The compressed and uncompressed files have different ETags
+            response, _ = self.download()
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=-20', 10), (0, 9))
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+        self.assertIsNone(parse_range('items=0-1', 10))
+        self.assertIsNone(parse_range('bytes=-', 10))
+        self.assertIsNone(parse_range('bytes=a-b', 10))
+
+        with self.assertRaises(ValueError):
+            parse_range('bytes=10-', 10)
+
+
+class UploadManagerTestCase(SimpleTestCase):
+    DATA = b"key,A\nK0,A0\nK1,A1\n"
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.root_dir, "upload.csv")
+        self.manager = UploadManager(os.path.join(self.root_dir, ".pyworkflow_uploads"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def start(self, size=len(DATA)):
+        return self.manager.start("workflow", self.path, size)["upload_id"]
+
+    def append(self, upload_id, offset, data):
+        return self.manager.append(upload_id, "workflow", offset, io.BytesIO(data))
+
+    def test_upload(self):
+        upload_id = self.start()
+
+        self.assertEqual(self.append(upload_id, 0, self.DATA[:6])["offset"], 6)
+        self.assertEqual(self.append(upload_id, 6, self.DATA[6:])["offset"], len(self.DATA))
+
+        checksum = hashlib.sha256(self.DATA).hexdigest()
+        self.assertEqual(self.manager.finish(upload_id, "workflow", checksum), self.path)
+
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), self.DATA)
+
+        # Nothing is left of a finished upload
+        self.assertListEqual(os.listdir(self.manager.upload_dir), [])
+        self.assertListEqual(sorted(os.listdir(self.root_dir)), [".pyworkflow_uploads", "upload.csv"])
+
+    def test_resume(self):
+        upload_id = self.start()
+        self.append(upload_id, 0, self.DATA[:6])
+
+        # e.g., the response to the second chunk was lost, and it is resent
+        with self.assertRaises(UploadOffsetMismatch) as context:
+            self.append(upload_id, 12, self.DATA[12:])
+
+        self.assertEqual(context.exception.offset, 6)
+        self.assertEqual(self.manager.get(upload_id, "workflow")["offset"], 6)
+
+    def test_too_large(self):
+        upload_id = self.start(size=10)
+
+        with self.assertRaises(WorkflowException):
+            self.append(upload_id, 0, self.DATA)
+
+        # The chunk is dropped
+        self.assertEqual(self.manager.get(upload_id, "workflow")["offset"], 0)
+
+    def test_bad_checksum(self):
+        with open(self.path, "wb") as f:
+            f.write(b"previous")
+
+        upload_id = self.start()
+        self.append(upload_id, 0, self.DATA)
+
+        with self.assertRaises(WorkflowException):
+            self.manager.finish(upload_id, "workflow", hashlib.sha256(b"foobar").hexdigest())
+
+        # The destination is only replaced by a complete, matching file
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"previous")
+
+    def test_incomplete(self):
+        upload_id = self.start()
+        self.append(upload_id, 0, self.DATA[:6])
+
+        with self.assertRaises(WorkflowException):
+            self.manager.finish(upload_id, "workflow", hashlib.sha256(self.DATA[:6]).hexdigest())
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_other_workflow(self):
+        upload_id = self.start()
+
+        for workflow_id in ["other", None]:
+            with self.assertRaises(WorkflowException):
+                self.manager.get(upload_id, workflow_id)
+
+        with self.assertRaises(WorkflowException):
+            self.manager.get("../foobar", "workflow")
+
+    def test_abort(self):
+        upload_id = self.start()
+        self.append(upload_id, 0, self.DATA[:6])
+        self.manager.abort(upload_id, "workflow")
+
+        with self.assertRaises(WorkflowException):
+            self.manager.get(upload_id, "workflow")
+
+        self.assertListEqual(os.listdir(self.manager.upload_dir), [])
+        self.assertListEqual(os.listdir(self.root_dir), [".pyworkflow_uploads"])
+
+    def test_remove_expired(self):
+        expired_id = self.start()
+        active_id = self.start()
+
+        old = time.time() - self.manager.max_age - 1
+        os.utime(self.manager.upload_path(expired_id), (old, old))
+        self.manager.remove_expired()
+
+        with self.assertRaises(WorkflowException):
+            self.manager.get(expired_id, "workflow")
+
+        self.assertEqual(self.manager.get(active_id, "workflow")["offset"], 0)
@@ -0,0 +1,261 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from pyworkflow import WorkflowException
+
+
+class UploadOffsetMismatch(WorkflowException):
+    """A chunk was sent for an offset other than the end of the upload."""
+    def __init__(self, upload_id, offset):
+        super().__init__('upload', 'Upload %s is at offset %d' % (upload_id, offset))
+        self.offset = offset
+
+
+class UploadManager:
+    """Receives large files in chunks, so an interrupted upload can resume.
+
+    An upload is started with the path the file will be saved to. Its data
+    is appended to a partial file next to that path, and each chunk must
+    start at the current end of that file; after a failure, the client asks
+    for the current offset and continues from there. Once every chunk is
+    sent, the SHA-256 checksum of the partial file is checked and the file
+    renamed over its destination, so the destination is only ever replaced
+    by a complete file.
+
+    The state of each upload is saved as a JSON file in `upload_dir`, so
+    any server process can receive its chunks. Uploads are tied to the
+    Workflow that started them, and abandoned uploads are removed after
+    `max_age` seconds.
+
+    Attributes:
+        upload_dir: Directory the upload files are written to.
+        max_age: Seconds an upload is kept without receiving any data.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, upload_dir, max_age=24 * 60 * 60):
+        if not os.path.exists(upload_dir):
+            os.makedirs(upload_dir)
+
+        self.upload_dir = upload_dir
+        self.max_age = max_age
+
+    def start(self, workflow_id, path, size=None):
+        """Start an upload.
+
+        Args:
+            workflow_id: Workflow the upload belongs to.
+            path: Path to save the file to once complete.
+            size: Expected size of the file in bytes, if known. More data
+                than this is refused.
+
+        Returns:
+            The state of the new upload
+        """
+        self.remove_expired()
+
+        upload_id = uuid.uuid4().hex
+        upload = {
+            'upload_id': upload_id,
+            'workflow_id': workflow_id,
+            'path': path,
+            'size': size,
+            'started_at': time.time(),
+        }
+
+        try:
+            open(self.partial_path(upload), 'wb').close()
+            self.save(upload)
+        except OSError as e:
+            raise WorkflowException('upload', str(e))
+
+        return self.state(upload)
+
+    def get(self, upload_id, workflow_id):
+        """Load the state of an upload, including its current offset.
+
+        Raises:
+            WorkflowException: the upload does not exist for this Workflow
+        """
+        return self.state(self.load(upload_id, workflow_id))
+
+    def append(self, upload_id, workflow_id, offset, stream):
+        """Write the next chunk of an upload.
+
+        Args:
+            upload_id: The upload to write to.
+            workflow_id: Workflow the upload belongs to.
+            offset: Position of the chunk in the file; must be the current
+                size of the partial file.
+            stream: Binary file object to read the chunk from. It is copied
+                in blocks of CHUNK_SIZE, not read into memory at once.
+
+        Returns:
+            The state of the upload after writing the chunk
+
+        Raises:
+            UploadOffsetMismatch: the chunk does not start at the current offset
+            WorkflowException: the upload does not exist, or the chunk goes
+                past the expected size
+        """
+        upload = self.load(upload_id, workflow_id)
+
+        try:
+            with open(self.partial_path(upload), 'ab') as f:
+                # Chunks for one upload may arrive at different processes
+                fcntl.flock(f, fcntl.LOCK_EX)
+                current = f.seek(0, os.SEEK_END)
+
+                if offset != current:
+                    raise UploadOffsetMismatch(upload_id, current)
+
+                for block in iter(lambda: stream.read(UploadManager.CHUNK_SIZE), b''):
+                    current += len(block)
+
+                    if upload['size'] is not None and current > upload['size']:
+                        # Drop the whole chunk, so the client can resend it
+                        f.truncate(offset)
+                        raise WorkflowException('upload', 'Upload %s is larger than %d bytes'
+                                                % (upload_id, upload['size']))
+
+                    f.write(block)
+        except OSError as e:
+            raise WorkflowException('upload', str(e))
+
+        # Mark the upload as active, so it isn't expired while in progress
+        os.utime(self.upload_path(upload_id))
+
+        return self.state(upload)
+
+    def finish(self, upload_id, workflow_id, checksum):
+        """Check a complete upload and move it to its destination.
+
+        Args:
+            upload_id: The upload to finish.
+            workflow_id: Workflow the upload belongs to.
+            checksum: Hex SHA-256 digest of the whole file.
+
+        Returns:
+            The path the file was saved to
+
+        Raises:
+            WorkflowException: the upload does not exist, is incomplete, or
+                does not match the checksum
+        """
+        upload = self.load(upload_id, workflow_id)
+        partial_path = self.partial_path(upload)
+        sha256 = hashlib.sha256()
+
+        try:
+            with open(partial_path, 'rb') as f:
+                for block in iter(lambda: f.read(UploadManager.CHUNK_SIZE), b''):
+                    sha256.update(block)
+
+                size = f.tell()
+
+            if upload['size'] is not None and size != upload['size']:
+                raise WorkflowException('upload', 'Upload %s has %d of %d bytes'
+                                        % (upload_id, size, upload['size']))
+
+            if sha256.hexdigest() != str(checksum).lower():
+                raise WorkflowException('upload', 'Upload %s does not match the checksum' % upload_id)
+
+            os.replace(partial_path, upload['path'])
+            os.remove(self.upload_path(upload_id))
+        except OSError as e:
+            raise WorkflowException('upload', str(e))
+
+        return upload['path']
+
+    def abort(self, upload_id, workflow_id):
+        """Cancel an upload and delete the data received."""
+        self.remove(self.load(upload_id, workflow_id))
+
+    def remove_expired(self):
+        """Delete uploads that have not received data for `max_age` seconds."""
+        cutoff = time.time() - self.max_age
+
+        for name in os.listdir(self.upload_dir):
+            path = os.path.join(self.upload_dir, name)
+
+            try:
+                if name.endswith('.json') and os.path.getmtime(path) < cutoff:
+                    with open(path) as f:
+                        self.remove(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+    def remove(self, upload):
+        for path in [self.partial_path(upload), self.upload_path(upload['upload_id'])]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def state(self, upload):
+        try:
+            offset = os.path.getsize(self.partial_path(upload))
+        except OSError:
+            raise WorkflowException('upload', 'Upload %s does not exist' % upload['upload_id'])
+
+        return {
+            'upload_id': upload['upload_id'],
+            'filename': os.path.basename(upload['path']),
+            'size': upload['size'],
+            'offset': offset,
+        }
+
+    def load(self, upload_id, workflow_id):
+        try:
+            with open(self.upload_path(upload_id)) as f:
+                upload = json.load(f)
+        except (OSError, ValueError):
+            raise WorkflowException('upload', 'Upload %s does not exist' % upload_id)
+
+        # Don't reveal other sessions' uploads
+        if upload['workflow_id'] != workflow_id:
+            raise WorkflowException('upload', 'Upload %s does not exist' % upload_id)
+
+        return upload
+
+    def save(self, upload):
+        # Write under a temporary name so readers never see partial files
+        path = self.upload_path(upload['upload_id'])
+        with open(path + '.tmp', 'w') as f:
+            json.dump(upload, f)
+
+        os.replace(path + '.tmp', path)
+
+    def upload_path(self, upload_id):
+        # Only hex ids are created; anything else cannot be an upload
+        if not upload_id.isalnum():
+            raise WorkflowException('upload', 'Upload %s does not exist' % upload_id)
+
+        return os.path.join(self.upload_dir, upload_id + '.json')
+
+    @staticmethod
+    def partial_path(upload):
+        # Next to the destination, so the final rename stays on one filesystem
+        return '%s.%s.part' % (upload['path'], upload['upload_id'])
+
+
+_upload_manager = None
+_upload_manager_lock = threading.Lock()
+
+
+def upload_manager():
+    """The UploadManager shared by all requests in this process."""
+    global _upload_manager
+
+    with _upload_manager_lock:
+        if _upload_manager is None:
+            _upload_manager = UploadManager(
+                os.path.join(settings.MEDIA_ROOT, '.pyworkflow_uploads'),
+                max_age=settings.UPLOAD_MAX_AGE
+            )
+
+    return _upload_manager
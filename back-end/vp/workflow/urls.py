@@ -10,6 +10,9 @@ urlpatterns = [
     path('execute/<str:node_id>/successors', views.get_successors, name='get node successors'),
     path('globals', views.global_vars, name="retrieve global variables"),
     path('upload', views.upload_file, name='upload file'),
+    path('upload/start', views.start_upload, name='start upload'),
+    path('upload/<str:upload_id>', views.handle_upload, name='handle upload'),
+    path('upload/<str:upload_id>/finish', views.finish_upload, name='finish upload'),
     path('download', views.download_file, name='download file'),
     path('nodes', views.retrieve_nodes_for_user, name='retrieve node list'),
 ]
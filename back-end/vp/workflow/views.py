@@ -1,12 +1,19 @@
 import os
 import json
+import networkx as nx
 
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.text import compress_sequence
 from rest_framework.decorators import api_view
-from pyworkflow import Workflow, WorkflowException
+from pyworkflow import Workflow, WorkflowException, node_registry
 from drf_yasg.utils import swagger_auto_schema
 
+from .registry import workflow_registry
+from .uploads import UploadOffsetMismatch, upload_manager
+
 
 @swagger_auto_schema(method='post',
                      operation_summary='Create a new workflow.',
@@ -18,7 +25,8 @@ from drf_yasg.utils import swagger_auto_schema
 def new_workflow(request):
     """Create a new workflow.
 
-    Initialize a new, empty, NetworkX DiGraph object and store it in the session.
+    Initialize a new, empty, NetworkX DiGraph object and register it for
+    the session.
 
     Return:
         200 - Created new DiGraph
@@ -26,12 +34,17 @@ def new_workflow(request):
     try:
         workflow_id = json.loads(request.body)
 
-        # Create new Workflow
+        # Create new Workflow; the registry keeps it between requests, so it
+        # must not share the default graph objects
         request.pyworkflow = Workflow(
             name=workflow_id['id'],
-            root_dir=settings.MEDIA_ROOT
+            root_dir=settings.MEDIA_ROOT,
+            graph=nx.DiGraph(),
+            flow_vars=nx.Graph(),
+            cache=workflow_registry().cache
         )
-        request.session.update(request.pyworkflow.to_json())
+        request.session['workflow_id'] = workflow_registry().register(request.pyworkflow)
+        request.session.pop('jobs', None)
 
         return JsonResponse(Workflow.to_graph_json(request.pyworkflow.graph))
     except (json.JSONDecodeError, KeyError) as e:
@@ -84,8 +97,9 @@ def open_workflow(request):
         uploaded_file = request.FILES.get('file')
         combined_json = json.load(uploaded_file)
 
-        request.pyworkflow = Workflow.from_json(combined_json['pyworkflow'])
-        request.session.update(request.pyworkflow.to_json())
+        request.pyworkflow = Workflow.from_json(combined_json['pyworkflow'], cache=workflow_registry().cache)
+        request.session['workflow_id'] = workflow_registry().register(request.pyworkflow)
+        request.session.pop('jobs', None)
 
         # Send back front-end workflow
         return JsonResponse(combined_json['ui-graph'])
@@ -224,7 +238,8 @@ def get_successors(request, node_id):
 
 @swagger_auto_schema(method='post',
                      operation_summary='Uploads a file to server.',
-                     operation_description='Uploads a new file to server location.',
+                     operation_description='Uploads a new file to server location. Large files can '
+                                           'instead be sent in chunks, starting from /workflow/upload/start.',
                      responses={
                          200: 'File uploaded',
                          404: 'No specified file'
@@ -238,21 +253,195 @@ def upload_file(request):
 
     try:
         node_id = request.POST.get('nodeId')
+        file_path = upload_path(request, node_id, f.name)
+        save_name = Workflow.upload_file(f, file_path)
 
         if node_id is None:
-            # custom node file
-            file_path = request.pyworkflow.node_path('custom_nodes', f.name)
-        else:
-            # node data file
-            file_path = request.pyworkflow.path(f"{node_id}-{f.name}")
-
-        save_name = Workflow.upload_file(f, file_path)
+            # Don't serve the previous version of a replaced Node file
+            node_registry.invalidate(file_path)
     except WorkflowException as e:
         return JsonResponse({e.action: e.reason}, status=500)
 
     return JsonResponse({"filename": save_name}, status=201, safe=False)
 
 
+@swagger_auto_schema(method='post',
+                     operation_summary='Starts a chunked upload.',
+                     operation_description='Starts an upload of a large file, sent in chunks to '
+                                           '/workflow/upload/<upload_id>. The JSON body gives the "filename", '
+                                           'its total "size" in bytes, and the "nodeId" the file is for; '
+                                           'without a nodeId the file is a custom Node.',
+                     responses={
+                         201: 'Upload started',
+                         400: 'No filename, or invalid size',
+                         500: 'Error starting upload'
+                     })
+@api_view(['POST'])
+def start_upload(request):
+    """Start a chunked, resumable upload.
+
+    Args:
+        request: Django request Object, with a JSON body:
+            {
+                filename: Name of the file,
+                size: Total size of the file in bytes (optional),
+                nodeId: Node the file is for; omit for a custom Node file
+            }
+
+    Returns:
+        201 - Upload id and offset (0) to send the first chunk at
+        400 - No filename, or invalid size
+        500 - Error starting upload
+    """
+    try:
+        json_data = json.loads(request.body)
+        filename = os.path.basename(json_data['filename'])
+        size = json_data.get('size')
+
+        if not filename or (size is not None and (not isinstance(size, int) or size < 0)):
+            raise ValueError('A filename and a non-negative integer size are required')
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        return JsonResponse({'Invalid upload': str(e)}, status=400)
+
+    try:
+        file_path = upload_path(request, json_data.get('nodeId'), filename)
+        upload = upload_manager().start(request.session['workflow_id'], file_path, size)
+    except WorkflowException as e:
+        return JsonResponse({e.action: e.reason}, status=500)
+
+    return JsonResponse(upload, status=201)
+
+
+@swagger_auto_schema(method='get',
+                     operation_summary='Retrieves the progress of a chunked upload.',
+                     operation_description='Returns the offset to send the next chunk at, e.g. to '
+                                           'resume an interrupted upload.',
+                     responses={
+                         200: 'Upload offset',
+                         404: 'Upload not found'
+                     })
+@swagger_auto_schema(method='put',
+                     operation_summary='Sends a chunk of a chunked upload.',
+                     operation_description='Appends the request body to the upload. The "Upload-Offset" '
+                                           'header (or "offset" query parameter) gives the position of the '
+                                           'chunk, which must be the current offset of the upload.',
+                     responses={
+                         200: 'Chunk received',
+                         400: 'Missing offset, or too much data',
+                         404: 'Upload not found',
+                         409: 'Offset is not the end of the upload'
+                     })
+@swagger_auto_schema(method='delete',
+                     operation_summary='Cancels a chunked upload.',
+                     operation_description='Deletes the data received for the upload.',
+                     responses={
+                         204: 'Upload cancelled',
+                         404: 'Upload not found'
+                     })
+@api_view(['GET', 'PUT', 'DELETE'])
+def handle_upload(request, upload_id):
+    """Retrieve, continue, or cancel a chunked upload.
+
+    Returns:
+        200 - Upload id, filename, size, and offset to send the next chunk at
+        204 - Upload cancelled
+        400 - Missing offset, or too much data
+        404 - Upload not found
+        409 - Offset is not the end of the upload; the response has the
+            current offset
+    """
+    workflow_id = request.session['workflow_id']
+
+    try:
+        if request.method == 'GET':
+            return JsonResponse(upload_manager().get(upload_id, workflow_id))
+
+        if request.method == 'DELETE':
+            upload_manager().abort(upload_id, workflow_id)
+            return HttpResponse(status=204)
+
+        upload = upload_manager().get(upload_id, workflow_id)
+    except WorkflowException as e:
+        return JsonResponse({e.action: e.reason}, status=404)
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.GET.get('offset')))
+    except (TypeError, ValueError):
+        return JsonResponse({'Invalid upload': 'An integer Upload-Offset header is required'}, status=400)
+
+    try:
+        # Copy the body straight to disk, without loading it into memory
+        upload = upload_manager().append(upload_id, workflow_id, offset, request)
+    except UploadOffsetMismatch as e:
+        return JsonResponse(dict(upload, offset=e.offset, error=e.reason), status=409)
+    except WorkflowException as e:
+        return JsonResponse({e.action: e.reason}, status=400)
+
+    return JsonResponse(upload)
+
+
+@swagger_auto_schema(method='post',
+                     operation_summary='Completes a chunked upload.',
+                     operation_description='Checks the uploaded file against the "sha256" hex digest in '
+                                           'the JSON body, then saves it in place of any previous version.',
+                     responses={
+                         201: 'File uploaded',
+                         400: 'Upload incomplete or checksum does not match',
+                         404: 'Upload not found'
+                     })
+@api_view(['POST'])
+def finish_upload(request, upload_id):
+    """Complete a chunked upload.
+
+    Args:
+        request: Django request Object, with a JSON body:
+            {
+                sha256: Hex SHA-256 digest of the whole file
+            }
+
+    Returns:
+        201 - Name the file was saved as
+        400 - Upload incomplete or checksum does not match
+        404 - Upload not found
+    """
+    workflow_id = request.session['workflow_id']
+
+    try:
+        checksum = json.loads(request.body)['sha256']
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        return JsonResponse({'Invalid upload': 'A sha256 checksum is required: %s' % e}, status=400)
+
+    try:
+        upload_manager().get(upload_id, workflow_id)
+    except WorkflowException as e:
+        return JsonResponse({e.action: e.reason}, status=404)
+
+    try:
+        save_name = upload_manager().finish(upload_id, workflow_id, checksum)
+    except WorkflowException as e:
+        return JsonResponse({e.action: e.reason}, status=400)
+
+    # Don't serve the previous version of a replaced Node file; other
+    # files are not known to the registry
+    node_registry.invalidate(save_name)
+
+    return JsonResponse({"filename": save_name}, status=201)
+
+
+def upload_path(request, node_id, filename):
+    """Path to save an uploaded file to.
+
+    Files for a Node are saved in the Workflow's directory, prefixed with
+    the Node's id; files without a Node are custom Nodes.
+    """
+    if node_id is None:
+        # custom node file
+        return request.pyworkflow.node_path('custom_nodes', filename)
+
+    # node data file
+    return request.pyworkflow.path(f"{node_id}-{filename}")
+
+
 @swagger_auto_schema(method='get',
                      operation_summary='Retrieve a list of installed Nodes',
                      operation_description='Retrieves a list of installed Nodes, in JSON.',
@@ -271,39 +460,205 @@ def retrieve_nodes_for_user(request):
     return JsonResponse(data, safe=False)
 
 
-@swagger_auto_schema(method='post',
+@swagger_auto_schema(methods=['get', 'post'],
                      operation_summary='Downloads a file from the server',
-                     operation_description='Downloads a file associated with Node from server.',
+                     operation_description='Downloads a file associated with Node from server. The node is '
+                                           'given by the "node_id" query parameter, or in the JSON body of a '
+                                           'POST. Supports Range requests, conditional requests with '
+                                           'ETag/Last-Modified, and gzip encoding of text files.',
                      responses={
                          200: 'File downloaded',
-                         404: 'Could not read specified file'
+                         206: 'Part of the file downloaded',
+                         304: 'File not modified',
+                         404: 'Could not read specified file',
+                         416: 'Requested range is outside the file'
                      })
-@api_view(['POST'])
+@api_view(['GET', 'POST'])
 def download_file(request):
     try:
         # Retrieve Node info, and related File object
-        json_data = json.loads(request.body)
-        f = request.pyworkflow.download_file(json_data['node_id'])
-
-        # Parse file type
-        _, ext = os.path.splitext(f.name)
-        if ext == ".csv":
-            content = "text/csv"
-        elif ext == ".json":
-            content = "application/json"
+        if request.method == 'GET':
+            node_id = request.GET['node_id']
         else:
-            content = "application/octet-stream"
+            node_id = json.loads(request.body)['node_id']
 
-        # Construct response
-        response = HttpResponse(content_type=content)
-        response['Content-Disposition'] = os.path.basename(f.name)
-        response.write(f.read())
-
-        # File not opened with `with`; need to close
-        f.close()
-        return response
+        f = request.pyworkflow.download_file(node_id)
+    except (KeyError, ValueError) as e:
+        return JsonResponse({'No node_id in request': str(e)}, status=400)
     except OSError:
         return JsonResponse({"message": "Could not find or read file"},
                             status=404)
     except WorkflowException as e:
         return JsonResponse({e.action: e.reason}, status=500)
+
+    if f is None:
+        return JsonResponse({"message": "Could not find or read file"}, status=404)
+
+    try:
+        return file_response(request, f)
+    except BaseException:
+        f.close()
+        raise
+
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+CONTENT_TYPES = {'.csv': 'text/csv', '.json': 'application/json'}
+
+
+def file_response(request, f):
+    """Stream an open file in binary chunks, honouring Range and conditional headers.
+
+    The file is closed once the response has been sent.
+    """
+    stat = os.fstat(f.fileno())
+    size = stat.st_size
+    etag = '"%x-%x"' % (stat.st_mtime_ns, size)
+    last_modified = int(stat.st_mtime)
+
+    # Parse file type
+    _, ext = os.path.splitext(f.name)
+    content_type = CONTENT_TYPES.get(ext, 'application/octet-stream')
+
+    # Ranges are of the file as stored, so are never compressed
+    gzip = ('HTTP_RANGE' not in request.META and getattr(settings, 'DOWNLOAD_GZIP', False)
+            and content_type != 'application/octet-stream'
+            and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    if gzip:
+        # The compressed file is a different representation
+        etag = etag[:-1] + '-gzip"'
+
+    # 304 Not Modified, or 412 for failed preconditions
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        f.close()
+        return not_modified
+
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            f.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % size
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    chunks = FileChunks(f, start, end - start + 1)
+
+    if gzip:
+        response = StreamingHttpResponse(ClosingIterable(compress_sequence(chunks), chunks.close),
+                                         content_type=content_type)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+
+    if byte_range is not None:
+        response.status_code = 206
+        response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+
+    response['Content-Disposition'] = os.path.basename(f.name)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Accept-Encoding'])
+
+    return response
+
+
+def parse_range(header, size):
+    """Find the first and last byte of a 'bytes=start-end' Range header.
+
+    Returns:
+        Tuple of (first, last) byte, or None to send the whole file, e.g. for
+        several ranges, which are not supported
+
+    Raises:
+        ValueError: the range is outside the file
+    """
+    unit, _, ranges = header.partition('=')
+
+    if unit.strip() != 'bytes' or ',' in ranges:
+        return None
+
+    first, _, last = [part.strip() for part in ranges.partition('-')]
+
+    if not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        # Malformed ranges are ignored
+        return None
+
+    if not first:
+        # Suffix range: the last `last` bytes
+        length = int(last)
+
+        if length == 0 or size == 0:
+            raise ValueError('Range not satisfiable')
+
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    last = int(last) if last else size - 1
+
+    if first >= size:
+        raise ValueError('Range not satisfiable')
+
+    if last < first:
+        # Invalid, so ignored like other malformed ranges
+        return None
+
+    return first, min(last, size - 1)
+
+
+def if_range_matches(request, etag, last_modified):
+    """Whether a Range request still applies to the current file."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+
+    if if_range is None:
+        return True
+
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+
+    return parse_http_date_safe(if_range) == last_modified
+
+
+class FileChunks:
+    """Iterates over `length` bytes of a file from `start`.
+
+    The file is closed when iteration ends, or when the response is closed,
+    even if it was never read.
+    """
+    def __init__(self, f, start, length):
+        self.f = f
+        self.start = start
+        self.length = length
+
+    def __iter__(self):
+        try:
+            self.f.seek(self.start)
+            remaining = self.length
+
+            while remaining > 0:
+                chunk = self.f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        self.f.close()
+
+
+class ClosingIterable:
+    """Calls `close` when the response streaming `iterable` is closed."""
+    def __init__(self, iterable, close):
+        self.iterable = iterable
+        self.close = close
+
+    def __iter__(self):
+        return iter(self.iterable)
@@ -252,6 +252,16 @@ export async function execute(node) {
     return fetchWrapper(`/node/${id}/execute`);
 }
 
+/**
+ * Execute given node on server, along with any preceding nodes it needs
+ * @param {CustomNodeModel} node - node to execute
+ * @returns {Promise<Object>} - server response (IDs of executed and up-to-date nodes)
+ */
+export async function executeTo(node) {
+    const id = node.options.id;
+    return fetchWrapper(`/node/${id}/execute_to`);
+}
+
 /**
  * Retrieves the data at the state of the specified node
  * @param {string }nodeId - node identifier for an execution state
@@ -97,24 +97,43 @@ class Workspace extends React.Component {
 
     async execute() {
         const order = await API.executionOrder();
-        for (let i = 0; i < order.length; ++i) {
-            let node = this.model.getNode(order[i]);
+        const complete = new Set();
+
+        // Walk backwards so each request covers a whole branch on the
+        // server: its nodes are either executed or already up to date, so
+        // only nodes outside every earlier branch need another request
+        for (let i = order.length - 1; i >= 0; --i) {
+            if (complete.has(order[i])) continue;
+
+            let response;
             try {
-                await API.execute(node);
-                node.setStatus("complete");
-                // repainting canvas didn't update status light, so
-                // this is hack to re-render the node widget
-                node.setSelected(true);
-                node.setSelected(false);
-                if (node.options.download_result) {
-                    // TODO: make this work for non-WriteCsvNode nodes
-                    API.downloadDataFile(node)
-                        .catch(err => console.log(err));
-                }
-            } catch {
+                response = await API.executeTo(this.model.getNode(order[i]));
+            } catch (err) {
                 console.log("Stopping execution because of failure");
+                [...(err.executed || []), ...(err.up_to_date || [])].forEach(id => this.markComplete(id));
                 break;
             }
+
+            [...response.executed, ...response.up_to_date].forEach(id => {
+                complete.add(id);
+                this.markComplete(id);
+            });
+        }
+    }
+
+    markComplete(nodeId) {
+        const node = this.model.getNode(nodeId);
+        if (!node) return;
+
+        node.setStatus("complete");
+        // repainting canvas didn't update status light, so
+        // this is hack to re-render the node widget
+        node.setSelected(true);
+        node.setSelected(false);
+        if (node.options.download_result) {
+            // TODO: make this work for non-WriteCsvNode nodes
+            API.downloadDataFile(node)
+                .catch(err => console.log(err));
         }
     }
 